@@ -3,11 +3,13 @@ Financial Analysis Agents
 Defines all specialized AI agents for financial analysis using LangChain
 """
 from langchain_core.prompts import PromptTemplate
-from langchain_community.llms import Ollama
+from ollama_client import OllamaClientLLM
 from langchain.chains import LLMChain
 from typing import List, Dict, Any
 import os
 from utils import check_model_availability
+from model_registry import get_registry
+from file_utils import env_flag
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -29,16 +31,20 @@ class FinancialAgents:
         print(f"  DEBUG: Using analysis model: {analysis_model}")
 
         # Check if the model is available
-        check_model_availability(analysis_model)
+        check_model_availability(analysis_model, ollama_base_url)
+        self.model_info = get_registry(ollama_base_url).get(analysis_model)
 
-        # Initialize analysis LLM using Ollama
-        self.analysis_llm = Ollama(
+        # Initialize analysis LLM through the shared Ollama client; streaming adds
+        # stall detection and can echo tokens to the console as they are generated
+        self.analysis_llm = OllamaClientLLM(
             model=analysis_model,
             base_url=ollama_base_url,
             temperature=0.1,  # Low temperature for more consistent financial analysis
+            streaming=env_flag('AGENT_STREAMING', 'true'),
+            stream_to_stdout=env_flag('AGENT_STREAM_OUTPUT', 'true')
         )
 
-        print(f"  Using analysis model: {analysis_model}")
+        print(f"  Using analysis model: {analysis_model} ({self.model_info.describe()})")
         print(f"  Ollama URL: {ollama_base_url}")
         
         # Store valuation RAG for tool access
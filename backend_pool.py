@@ -0,0 +1,392 @@
+"""
+Backend Pool
+Spreads Ollama traffic over several servers: health checks through
+/api/tags, least-outstanding-requests routing, model-aware backend
+selection and a circuit breaker per backend
+"""
+
+import os
+import time
+import threading
+import requests
+from typing import Callable, List, Optional
+
+from ollama_client import OllamaClient, RETRYABLE_STATUSES
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half-open"
+
+
+def backend_urls(base_url: Optional[str] = None) -> list:
+    """
+    Ollama servers to use for a base URL setting
+
+    OLLAMA_BASE_URLS (comma-separated) supersedes OLLAMA_BASE_URL for every
+    component; a comma-separated base_url also describes a pool.
+
+    Args:
+        base_url: Ollama base URL, or several separated by commas
+
+    Returns:
+        List of base URLs (one entry when no pool is configured)
+    """
+
+    def parse(value: str) -> list:
+        urls = []
+        for url in value.split(","):
+            url = url.strip().rstrip('/')
+            if url and url not in urls:
+                urls.append(url)
+        return urls
+
+    if base_url and "," in base_url:
+        return parse(base_url)
+    configured = parse(os.getenv('OLLAMA_BASE_URLS', ''))
+    if configured:
+        return configured
+    return [(base_url or os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')).rstrip('/')]
+
+
+def model_matches(model_name: str, installed: str) -> bool:
+    """Whether an installed model name satisfies a requested one ('llama3.1' matches 'llama3.1:latest')"""
+    return installed == model_name or (":" not in model_name and installed == f"{model_name}:latest")
+
+
+class Backend:
+    """One Ollama server in the pool, with its circuit breaker state"""
+
+    def __init__(self, client: OllamaClient):
+        self.client = client
+        self.url = client.base_url
+        self.models = None  # Installed model names, None until the first successful /api/tags
+        self.outstanding = 0
+        self.routed = 0
+        self.failures = 0
+        self.state = CIRCUIT_CLOSED
+        self.opened_at = 0.0
+        self.cooldown = 0.0
+        self.last_grant = 0
+
+    def serves(self, model_name: Optional[str]) -> bool:
+        """Whether the backend has a model (unknown model lists count as yes)"""
+
+        if not model_name or self.models is None:
+            return True
+        return any(model_matches(model_name, installed) for installed in self.models)
+
+
+class BackendPool:
+    """
+    Drop-in replacement for OllamaClient over several servers. Each request
+    goes to the backend with the fewest requests in flight (relative to its
+    concurrency limit) among the healthy backends that have the model.
+    Connection errors and 429/5xx responses move the request to another
+    backend; repeated failures open a backend's circuit for a cooldown that
+    doubles while the backend keeps failing, and a successful health check
+    or trial request closes it again.
+    """
+
+    def __init__(self, urls: List[str], health_interval: Optional[float] = None,
+                 failure_threshold: Optional[int] = None, cooldown: Optional[float] = None,
+                 max_cooldown: float = 300.0, max_attempts: Optional[int] = None):
+        """
+        Initialize the backend pool
+
+        Args:
+            urls: Base URLs of the Ollama servers
+            health_interval: Seconds between /api/tags health checks (default: from env or 15)
+            failure_threshold: Consecutive failures that open a circuit (default: from env or 3)
+            cooldown: Initial seconds a backend stays open before a trial request (default: from env or 30)
+            max_cooldown: Upper bound for the doubling cooldown
+            max_attempts: Backends tried per request (default: pool size, at least OLLAMA_MAX_RETRIES + 1)
+        """
+
+        if not urls:
+            raise ValueError("BackendPool needs at least one URL")
+
+        # Failover replaces per-server retries; each attempt is a single request
+        self.backends = [Backend(OllamaClient(url, max_retries=0)) for url in urls]
+        self.base_url = ", ".join(urls)
+        self.max_concurrency = sum(backend.client.max_concurrency for backend in self.backends)
+        self.retry_backoff = float(os.getenv('OLLAMA_RETRY_BACKOFF', '1.0'))
+        self.health_interval = health_interval or float(os.getenv('OLLAMA_HEALTH_INTERVAL', '15'))
+        self.failure_threshold = failure_threshold or int(os.getenv('OLLAMA_BACKEND_FAILURES', '3'))
+        self.base_cooldown = cooldown or float(os.getenv('OLLAMA_BACKEND_COOLDOWN', '30'))
+        self.max_cooldown = max_cooldown
+        self.max_attempts = max_attempts or max(len(self.backends), int(os.getenv('OLLAMA_MAX_RETRIES', '3')) + 1)
+
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._stop = threading.Event()
+        self._health_thread = threading.Thread(target=self._health_loop, daemon=True)
+        self._health_thread.start()
+
+    # Health and circuit breaking
+
+    def _health_loop(self):
+        """Refresh model lists and probe down backends until the pool is closed"""
+
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def check_health(self):
+        """Query /api/tags on every backend, updating model lists and circuits"""
+
+        for backend in self.backends:
+            try:
+                models = backend.client.list_models(refresh=True)
+            except requests.exceptions.RequestException:
+                self._failed(backend)
+                continue
+            with self._lock:
+                backend.models = [model.get("name") for model in models]
+            self._succeeded(backend, recovered_by="health check")
+
+    def _succeeded(self, backend: Backend, recovered_by: str = "trial request"):
+        """Close a backend's circuit after a successful call"""
+
+        with self._lock:
+            recovered = backend.state != CIRCUIT_CLOSED
+            backend.failures = 0
+            backend.state = CIRCUIT_CLOSED
+            backend.cooldown = 0.0
+        if recovered:
+            print(f"  Ollama backend {backend.url} recovered ({recovered_by})")
+
+    def _failed(self, backend: Backend):
+        """Count a failure; open the circuit at the threshold or when a trial fails"""
+
+        with self._lock:
+            backend.failures += 1
+            if backend.state == CIRCUIT_HALF_OPEN or (
+                    backend.state == CIRCUIT_CLOSED and backend.failures >= self.failure_threshold):
+                backend.cooldown = min(self.max_cooldown, backend.cooldown * 2 or self.base_cooldown)
+                backend.state = CIRCUIT_OPEN
+                backend.opened_at = time.monotonic()
+                opened = True
+            else:
+                opened = False
+        if opened:
+            print(f"  Ollama backend {backend.url} marked down for {backend.cooldown:.0f}s "
+                  f"after {backend.failures} failures")
+
+    def _usable(self, backend: Backend) -> bool:
+        """Whether a backend may take a request (lock held); moves expired circuits to half-open"""
+
+        if backend.state == CIRCUIT_OPEN and time.monotonic() - backend.opened_at >= backend.cooldown:
+            backend.state = CIRCUIT_HALF_OPEN
+        if backend.state == CIRCUIT_HALF_OPEN:
+            return backend.outstanding == 0  # A single trial request at a time
+        return backend.state == CIRCUIT_CLOSED
+
+    # Routing
+
+    def _acquire(self, model_name: Optional[str], exclude: set) -> Optional[Backend]:
+        """Pick the least loaded usable backend that serves the model and count the request"""
+
+        with self._lock:
+            candidates = [backend for backend in self.backends
+                          if backend.url not in exclude and backend.serves(model_name) and self._usable(backend)]
+            if not candidates:
+                return None
+            backend = min(candidates, key=lambda backend: (
+                backend.outstanding / backend.client.max_concurrency, backend.last_grant
+            ))
+            backend.outstanding += 1
+            backend.routed += 1
+            self._sequence += 1
+            backend.last_grant = self._sequence
+            return backend
+
+    def _release(self, backend: Backend):
+        with self._lock:
+            backend.outstanding -= 1
+
+    def _call(self, model_name: Optional[str], call: Callable[[OllamaClient], object]):
+        """
+        Run a call on the best backend, failing over to others on transport errors
+
+        Args:
+            model_name: Model the call needs (None: any backend)
+            call: Called with the chosen backend's client
+
+        Returns:
+            Result of the call
+        """
+
+        tried = set()
+        last_error = None
+        delay = self.retry_backoff
+        for _ in range(self.max_attempts):
+            backend = self._acquire(model_name, tried)
+            if backend is None and tried:
+                # Every usable backend failed this request once; back off and start over
+                time.sleep(delay)
+                delay *= 2
+                tried.clear()
+                backend = self._acquire(model_name, tried)
+            if backend is None:
+                break
+
+            try:
+                result = call(backend.client)
+            except (requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout) as e:
+                self._failed(backend)
+                tried.add(backend.url)
+                last_error = e
+                continue
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status == 404 and model_name:
+                    # Model missing on this server (removed since the last health check)
+                    with self._lock:
+                        if backend.models is not None:
+                            backend.models = [name for name in backend.models if not model_matches(model_name, name)]
+                elif status in RETRYABLE_STATUSES:
+                    self._failed(backend)
+                else:
+                    raise
+                tried.add(backend.url)
+                last_error = e
+                continue
+            finally:
+                self._release(backend)
+
+            self._succeeded(backend)
+            return result
+
+        if last_error is not None:
+            raise last_error
+        raise requests.exceptions.ConnectionError(
+            f"No healthy Ollama backend{f' with model {model_name}' if model_name else ''} "
+            f"among {self.base_url}"
+        )
+
+    # OllamaClient interface
+
+    def list_models(self, refresh: bool = False) -> list:
+        """
+        List models installed on any backend (each backend caches its list)
+
+        Args:
+            refresh: Fetch the lists again instead of using the caches
+
+        Returns:
+            List of model entries from /api/tags, one per distinct name
+        """
+
+        models, seen, last_error = [], set(), None
+        for backend in self.backends:
+            try:
+                backend_models = backend.client.list_models(refresh=refresh or backend.models is None)
+            except requests.exceptions.RequestException as e:
+                self._failed(backend)
+                last_error = e
+                continue
+            with self._lock:
+                backend.models = [model.get("name") for model in backend_models]
+            for model in backend_models:
+                if model.get("name") not in seen:
+                    seen.add(model.get("name"))
+                    models.append(model)
+        if last_error is not None and not seen and all(backend.models is None for backend in self.backends):
+            raise last_error
+        return models
+
+    def has_model(self, model_name: str) -> bool:
+        """Check whether any backend has a model installed"""
+        return any(model_matches(model_name, model.get("name", "")) for model in self.list_models())
+
+    def show(self, model_name: str) -> dict:
+        """Get model details from /api/show on a backend that has the model"""
+        return self._call(model_name, lambda client: client.show(model_name))
+
+    def generate(self, payload: dict, timeout: float = 300) -> dict:
+        """Non-streaming /api/generate on the least loaded backend (see OllamaClient.generate)"""
+        return self._call(payload.get("model"), lambda client: client.generate(payload, timeout=timeout))
+
+    def stream_generate(self, payload: dict, **kwargs) -> dict:
+        """Streaming /api/generate on the least loaded backend (see OllamaClient.stream_generate)"""
+        return self._call(payload.get("model"), lambda client: client.stream_generate(payload, **kwargs))
+
+    def embed(self, model: str, texts: List[str], timeout: float = 120) -> List[List[float]]:
+        """/api/embed on the least loaded backend (see OllamaClient.embed)"""
+        return self._call(model, lambda client: client.embed(model, texts, timeout=timeout))
+
+    def set_keep_alive(self, model: str, keep_alive):
+        """Set a model's keep_alive on every backend (see OllamaClient.set_keep_alive)"""
+
+        for backend in self.backends:
+            backend.client.set_keep_alive(model, keep_alive)
+
+    def load_model(self, model: str, keep_alive=None, embedding: bool = False, timeout: float = 600) -> dict:
+        """
+        Load a model on every healthy backend that has it, so the first
+        request finds it loaded wherever it is routed
+
+        Returns:
+            Response of the slowest load (its 'load_duration' bounds the warm-up)
+        """
+
+        slowest, last_error = None, None
+        for backend in self.backends:
+            with self._lock:
+                usable = backend.serves(model) and backend.state == CIRCUIT_CLOSED
+            if not usable:
+                continue
+            try:
+                result = backend.client.load_model(model, keep_alive, embedding, timeout)
+            except requests.exceptions.RequestException as e:
+                self._failed(backend)
+                last_error = e
+                continue
+            if slowest is None or result.get("load_duration", 0) > slowest.get("load_duration", 0):
+                slowest = result
+        if slowest is None and last_error is not None:
+            raise last_error
+        return slowest or {}
+
+    def unload_model(self, model: str, embedding: bool = False):
+        """Unload a model on every backend that has it"""
+
+        for backend in self.backends:
+            if backend.serves(model):
+                try:
+                    backend.client.unload_model(model, embedding)
+                except requests.exceptions.RequestException:
+                    pass  # A down backend has nothing loaded to free
+
+    def get_statistics(self) -> dict:
+        """
+        Get per-backend state and call statistics
+
+        Returns:
+            Dictionary keyed by backend URL
+        """
+
+        with self._lock:
+            states = {backend.url: {
+                "state": backend.state,
+                "outstanding": backend.outstanding,
+                "routed": backend.routed,
+                "failures": backend.failures,
+                "models": list(backend.models) if backend.models is not None else None
+            } for backend in self.backends}
+        for backend in self.backends:
+            states[backend.url]["calls"] = backend.client.get_statistics()
+        return states
+
+    def print_statistics(self):
+        """Print a short usage summary per backend"""
+
+        print(f"  Ollama backend pool ({len(self.backends)} servers):")
+        for url, state in self.get_statistics().items():
+            print(f"    {url}: {state['routed']} requests routed, circuit {state['state']}"
+                  + (f", {state['failures']} consecutive failures" if state['failures'] else ""))
+        for backend in self.backends:
+            backend.client.print_statistics()
+
+    def close(self):
+        """Stop the health checks"""
+        self._stop.set()
@@ -0,0 +1,249 @@
+"""
+Benchmark peak memory of holding extracted documents as strings versus
+streaming them to the memory-mapped document store
+Simulates the extraction output and task formatting of large filings, and
+the extraction of a single document (checkpoint journal, page results and
+manifest), using the text layer of the sample PDFs as page content
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from dotenv import load_dotenv
+
+load_dotenv()
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not available, tracemalloc still is
+    resource = None
+
+TASKS_WITH_DOCUMENTS = 4  # Extraction, business, growth and valuation tasks embed the documents
+
+
+def sample_pages(pdf_paths: list) -> list:
+    """Text layer of every page of the sample PDFs"""
+
+    import fitz  # PyMuPDF
+
+    pages = []
+    for pdf_path in pdf_paths:
+        with fitz.open(pdf_path) as doc:
+            pages.extend(page.get_text() for page in doc)
+    return [page for page in pages if page.strip()] or ["(empty page)"]
+
+
+def page_stream(pages: list, count: int):
+    """Yield (page_num, content) for a synthetic document of count pages"""
+
+    for page_num in range(count):
+        yield page_num, f"{pages[page_num % len(pages)]}\n[synthetic page {page_num + 1}]"
+
+
+def run_strings(pages: list, documents: int, pages_per_document: int) -> int:
+    """Previous behaviour: joined strings per document, all task inputs built up front"""
+
+    from tasks import FinancialTasks
+
+    extracted_docs = {}
+    for index in range(documents):
+        extracted = [f"DOCUMENT: filing_{index}.pdf", f"Total Pages: {pages_per_document}", "=" * 70]
+        for page_num, content in page_stream(pages, pages_per_document):
+            extracted.append(f"\n--- PAGE {page_num + 1} ---")
+            extracted.append(content)
+        extracted_docs[f"filing_{index}.pdf"] = "\n".join(extracted)
+
+    task_inputs = [f"Task {task}\n{FinancialTasks.format_documents(extracted_docs)}"
+                   for task in range(TASKS_WITH_DOCUMENTS)]
+    return sum(len(task_input) for task_input in task_inputs)
+
+
+def run_store(pages: list, documents: int, pages_per_document: int, store_dir: str) -> int:
+    """Streaming behaviour: pages written to the store, task inputs built one at a time"""
+
+    from tasks import FinancialTasks
+    from document_store import DocumentStore
+
+    store = DocumentStore(store_dir=store_dir, enabled=True)
+    extracted_docs = {}
+    for index in range(documents):
+        header = "\n".join([f"DOCUMENT: filing_{index}.pdf", f"Total Pages: {pages_per_document}", "=" * 70])
+        writer = store.writer(f"filing_{index}.pdf", header)
+        for page_num, content in page_stream(pages, pages_per_document):
+            writer.write_page(page_num, content)
+        extracted_docs[f"filing_{index}.pdf"] = writer.close()
+
+    total = 0
+    for task in range(TASKS_WITH_DOCUMENTS):
+        task_input = f"Task {task}\n{FinancialTasks.format_documents(extracted_docs)}"
+        total += len(task_input)
+        del task_input
+    return total
+
+
+def run_document_strings(pages: list, pages_per_document: int, work_dir: str) -> int:
+    """One document without the store: every page is kept until the text is joined"""
+
+    from document_manifest import DocumentManifest
+    from extraction_checkpoint import ExtractionCheckpoint
+
+    checkpoint = ExtractionCheckpoint("benchmark", "benchmark", checkpoint_dir=work_dir, enabled=True)
+    manifest = DocumentManifest("filing.pdf", "benchmark", manifest_dir=work_dir, enabled=True)
+    extracted = ["DOCUMENT: filing.pdf", f"Total Pages: {pages_per_document}", "=" * 70]
+    page_contents = []
+    for page_num, content in page_stream(pages, pages_per_document):
+        checkpoint.record(page_num, content)
+        page_contents.append(content)
+    checkpoint.finish()
+    manifest.update([str(page_num) for page_num in range(pages_per_document)], page_contents,
+                    "benchmark", "filing.pdf")
+    for page_num, content in enumerate(page_contents):
+        extracted.append(f"\n--- PAGE {page_num + 1} ---")
+        extracted.append(content)
+    return len("\n".join(extracted))
+
+
+def run_document_store(pages: list, pages_per_document: int, work_dir: str) -> int:
+    """One document with the store: pages go to disk as they complete and are read back one at a time"""
+
+    from document_store import DocumentStore
+    from document_manifest import DocumentManifest
+    from extraction_checkpoint import ExtractionCheckpoint
+
+    store = DocumentStore(store_dir=work_dir, enabled=True)
+    checkpoint = ExtractionCheckpoint("benchmark", "benchmark", checkpoint_dir=work_dir, enabled=True)
+    manifest = DocumentManifest("filing.pdf", "benchmark", manifest_dir=work_dir, enabled=True)
+    header = "\n".join(["DOCUMENT: filing.pdf", f"Total Pages: {pages_per_document}", "=" * 70])
+    writer = store.writer("filing.pdf", header)
+    for page_num, content in page_stream(pages, pages_per_document):
+        checkpoint.record(page_num, content)
+        writer.write_page(page_num, content)
+    checkpoint.finish()
+    with writer.close() as document:
+        manifest.update([str(page_num) for page_num in range(pages_per_document)],
+                        (document.page(page_num + 1) for page_num in range(pages_per_document)),
+                        "benchmark", "filing.pdf")
+        return len(document)
+
+
+def measure(mode: str, pdf_paths: list, documents: int, pages_per_document: int) -> dict:
+    """Run one mode in this process and report its memory use"""
+
+    pages = sample_pages(pdf_paths)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "strings":
+        characters = run_strings(pages, documents, pages_per_document)
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            if mode == "store":
+                characters = run_store(pages, documents, pages_per_document, work_dir)
+            elif mode == "document-strings":
+                characters = run_document_strings(pages, pages_per_document, work_dir)
+            else:
+                characters = run_document_store(pages, pages_per_document, work_dir)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "mode": mode,
+        "characters": characters,
+        "seconds": elapsed,
+        "heap_peak_mb": peak / 1e6,
+        "rss_growth_mb": (peak_rss - baseline_rss) * rss_unit / 1e6 if resource else None
+    }
+
+
+def benchmark(pdf_paths: list, documents: int, pages_per_document: int):
+    """
+    Run every mode in fresh processes and print comparison tables: all
+    documents through the tasks, then the extraction peak of one document
+
+    Args:
+        pdf_paths: PDFs whose text layer is used as page content
+        documents: Number of simulated documents
+        pages_per_document: Pages per simulated document
+    """
+
+    print(f"Simulating {documents} documents x {pages_per_document} pages, "
+          f"{TASKS_WITH_DOCUMENTS} tasks embedding all documents")
+
+    results = []
+    for mode in ("strings", "store", "document-strings", "document-store"):
+        # A fresh interpreter per mode, so peak RSS is not carried over
+        output = subprocess.run(
+            [sys.executable, __file__, "--measure", mode, "--documents", str(documents),
+             "--pages", str(pages_per_document), *pdf_paths],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for title, rows in ((f"All documents through {TASKS_WITH_DOCUMENTS} tasks", results[:2]),
+                        (f"Extraction of a single {pages_per_document}-page document", results[2:])):
+        print("\n" + title)
+        print("=" * 84)
+        print(f"{'Mode':<16} {'Characters':>14} {'Seconds':>9} {'Heap peak MB':>13} {'RSS growth MB':>14}")
+        print("-" * 84)
+        for result in rows:
+            rss = f"{result['rss_growth_mb']:.1f}" if result["rss_growth_mb"] is not None else "-"
+            print(f"{result['mode']:<16} {result['characters']:>14,} {result['seconds']:>9.2f} "
+                  f"{result['heap_peak_mb']:>13.1f} {rss:>14}")
+        print("=" * 84)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare peak memory of in-memory and memory-mapped extraction output"
+    )
+    parser.add_argument(
+        "pdf_paths",
+        nargs="*",
+        help="PDFs whose text layer is used as page content (default: data/financials/*.pdf)"
+    )
+    parser.add_argument(
+        "--documents",
+        type=int,
+        default=4,
+        help="Number of simulated documents (default: 4)"
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=400,
+        help="Pages per simulated document (default: 400)"
+    )
+    parser.add_argument(
+        "--measure",
+        choices=["strings", "store", "document-strings", "document-store"],
+        help=argparse.SUPPRESS
+    )
+
+    args = parser.parse_args()
+
+    pdf_paths = args.pdf_paths or sorted(glob.glob(os.path.join(
+        os.getenv('FILE_SHARE_PATH', 'data/financials'), "*.pdf"
+    )))
+    if not pdf_paths:
+        print("ERROR: No PDF files to sample page text from")
+        sys.exit(1)
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, pdf_paths, args.documents, args.pages)))
+    else:
+        benchmark(pdf_paths, args.documents, args.pages)
+
+
+if __name__ == "__main__":
+    main()
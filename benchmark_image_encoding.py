@@ -0,0 +1,160 @@
+"""
+Benchmark page image encoding policies for vision extraction
+Reports payload size and latency, and optionally extraction fidelity,
+for each policy on the sample PDFs
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+import statistics
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import fitz  # PyMuPDF
+from image_encoding import ImageEncodingPolicy, encode_page
+
+NUMBER_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+POLICIES = {
+    "baseline": ImageEncodingPolicy.baseline(),
+    "gray-png": ImageEncodingPolicy(dpi=144, autocrop=False),
+    "adaptive-png": ImageEncodingPolicy(),
+    "adaptive-jpeg": ImageEncodingPolicy(image_format='jpeg', quality=85),
+    "adaptive-webp": ImageEncodingPolicy(image_format='webp', quality=80),
+}
+
+
+def number_recall(reference_text: str, extracted_text: str) -> float:
+    """
+    Fraction of the numbers in the text layer that appear in the model output
+
+    Args:
+        reference_text: Text layer of the page
+        extracted_text: Vision model output for the page
+
+    Returns:
+        Recall between 0.0 and 1.0 (1.0 if the page has no numbers)
+    """
+
+    reference = {n.replace(',', '') for n in NUMBER_PATTERN.findall(reference_text) if len(n) > 1}
+    if not reference:
+        return 1.0
+    found = {n.replace(',', '') for n in NUMBER_PATTERN.findall(extracted_text)}
+    return len(reference & found) / len(reference)
+
+
+def benchmark(pdf_paths: list, policy_names: list, max_pages: int, infer: bool):
+    """
+    Run every policy over the sample pages and print a comparison table
+
+    Args:
+        pdf_paths: PDFs to sample pages from
+        policy_names: Names of policies from POLICIES to compare
+        max_pages: Maximum pages per PDF
+        infer: Also call the vision model and measure fidelity
+    """
+
+    extractor = None
+    if infer:
+        from vision_extractor import VisionDocumentExtractor, VISION_EXTRACTION_PROMPT
+        extractor = VisionDocumentExtractor()
+
+    results = {name: {"bytes": [], "render_ms": [], "infer_ms": [], "recall": []} for name in policy_names}
+
+    for pdf_path in pdf_paths:
+        doc = fitz.open(pdf_path)
+        page_count = min(len(doc), max_pages)
+        print(f"\n{os.path.basename(pdf_path)}: {page_count} pages")
+
+        for page_num in range(page_count):
+            page = doc[page_num]
+            reference_text = page.get_text()
+
+            for name in policy_names:
+                plan = POLICIES[name].plan(page)
+                start = time.perf_counter()
+                rendered = encode_page(page, plan)
+                results[name]["render_ms"].append((time.perf_counter() - start) * 1000)
+                results[name]["bytes"].append(len(rendered["image_base64"]))
+
+                if extractor:
+                    start = time.perf_counter()
+                    output = extractor._call_ollama_api_with_image(
+                        VISION_EXTRACTION_PROMPT, rendered["image_base64"]
+                    )
+                    results[name]["infer_ms"].append((time.perf_counter() - start) * 1000)
+                    results[name]["recall"].append(number_recall(reference_text, output))
+
+            print(f"  page {page_num + 1}/{page_count} done")
+        doc.close()
+
+    baseline_bytes = statistics.mean(results[policy_names[0]]["bytes"])
+
+    print("\n" + "=" * 108)
+    print(f"{'Policy':<15} {'Description':<56} {'Payload KB':>10} {'vs first':>8} "
+          f"{'Enc ms':>7} {'Infer ms':>9} {'Recall':>7}")
+    print("-" * 108)
+    for name in policy_names:
+        data = results[name]
+        mean_bytes = statistics.mean(data["bytes"])
+        infer_ms = f"{statistics.mean(data['infer_ms']):.0f}" if data["infer_ms"] else "-"
+        recall = f"{statistics.mean(data['recall']):.2f}" if data["recall"] else "-"
+        print(f"{name:<15} {POLICIES[name].describe():<56} {mean_bytes / 1024:>10.1f} "
+              f"{mean_bytes / baseline_bytes:>7.0%} {statistics.mean(data['render_ms']):>7.0f} "
+              f"{infer_ms:>9} {recall:>7}")
+    print("=" * 108)
+    if not infer:
+        print("Run with --infer to measure inference latency and number recall against the text layer.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare page image encoding policies for vision extraction"
+    )
+    parser.add_argument(
+        "pdf_paths",
+        nargs="*",
+        help="PDFs to benchmark (default: data/financials/*.pdf)"
+    )
+    parser.add_argument(
+        "--policies",
+        default=",".join(POLICIES),
+        help=f"Comma-separated policies to compare (default: {','.join(POLICIES)})"
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=10,
+        help="Maximum pages per PDF (default: 10)"
+    )
+    parser.add_argument(
+        "--infer",
+        action="store_true",
+        help="Call the vision model to measure latency and fidelity (requires Ollama)"
+    )
+
+    args = parser.parse_args()
+
+    pdf_paths = args.pdf_paths or sorted(glob.glob(os.path.join(
+        os.getenv('FILE_SHARE_PATH', 'data/financials'), "*.pdf"
+    )))
+    if not pdf_paths:
+        print("ERROR: No PDF files to benchmark")
+        sys.exit(1)
+
+    policy_names = [name.strip() for name in args.policies.split(",") if name.strip()]
+    unknown = [name for name in policy_names if name not in POLICIES]
+    if unknown:
+        print(f"ERROR: Unknown policies: {', '.join(unknown)}")
+        sys.exit(1)
+
+    benchmark(pdf_paths, policy_names, args.max_pages, args.infer)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,10 +8,11 @@ import sys
 import argparse
 from pathlib import Path
 import fitz  # PyMuPDF
-from langchain_community.embeddings import OllamaEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from ollama_client import OllamaClientEmbeddings
+from embedding_cache import EmbeddingCache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -56,7 +57,9 @@ def create_vector_database(
     chunk_size: int = 1000,
     chunk_overlap: int = 200,
     embedding_model: str = None,
-    ollama_base_url: str = None
+    ollama_base_url: str = None,
+    embed_batch_size: int = None,
+    embed_concurrency: int = None
 ):
     """
     Create a vector database from a PDF file
@@ -69,6 +72,8 @@ def create_vector_database(
         chunk_overlap: Overlap between chunks
         embedding_model: Ollama embedding model name
         ollama_base_url: Ollama base URL
+        embed_batch_size: Chunks per /api/embed request (default: from env or 32)
+        embed_concurrency: Embedding requests in flight (default: from env or 4)
     """
     
     # Get configuration
@@ -131,9 +136,12 @@ def create_vector_database(
     print("-"*80)
     print("This may take a few minutes...")
     
-    embeddings = OllamaEmbeddings(
+    embeddings = OllamaClientEmbeddings(
         model=embedding_model,
-        base_url=ollama_base_url
+        base_url=ollama_base_url,
+        batch_size=embed_batch_size,
+        max_concurrency=embed_concurrency,
+        cache=EmbeddingCache()  # Chunks embedded before, in any document or build, are reused
     )
     
     # Step 4: Create vector store
@@ -152,6 +160,8 @@ def create_vector_database(
     )
     
     print(f"✓ Vector database created successfully")
+    print(f"✓ Embedded {embeddings.describe_statistics()}")
+    embeddings.cache.flush()
     print(f"✓ Saved to: {output_dir}")
     
     # Step 5: Test the database
@@ -178,17 +188,18 @@ def create_vector_database(
     print(f"  Total Characters: {sum(len(doc.page_content) for doc in documents):,}")
     print(f"  Collection Name: {collection_name}")
     print(f"  Storage Location: {output_dir}")
+    print(f"  Embedding Throughput: {embeddings.get_statistics()['texts_per_second']:.1f} chunks/s")
     
     print("\n" + "="*80)
     print("HOW TO USE YOUR VECTOR DATABASE")
     print("="*80)
     print("\nIn your Python code:")
     print(f"""
-from langchain_community.embeddings import OllamaEmbeddings
 from langchain_community.vectorstores import Chroma
+from ollama_client import OllamaClientEmbeddings
 
-# Load the vector database
-embeddings = OllamaEmbeddings(model="{embedding_model}")
+# Load the vector database (embed queries the same way as at ingestion)
+embeddings = OllamaClientEmbeddings(model="{embedding_model}", base_url="{ollama_base_url}")
 vectorstore = Chroma(
     collection_name="{collection_name}",
     persist_directory="{output_dir}",
@@ -242,6 +253,18 @@ def main():
         default=None,
         help="Ollama base URL (default: from env or http://localhost:11434)"
     )
+    parser.add_argument(
+        "--embed-batch-size",
+        type=int,
+        default=None,
+        help="Chunks per embedding request (default: from env or 32)"
+    )
+    parser.add_argument(
+        "--embed-concurrency",
+        type=int,
+        default=None,
+        help="Embedding requests in flight at once (default: from env or 4)"
+    )
     
     args = parser.parse_args()
     
@@ -258,7 +281,9 @@ def main():
             chunk_size=args.chunk_size,
             chunk_overlap=args.chunk_overlap,
             embedding_model=args.embedding_model,
-            ollama_base_url=args.ollama_url
+            ollama_base_url=args.ollama_url,
+            embed_batch_size=args.embed_batch_size,
+            embed_concurrency=args.embed_concurrency
         )
     except Exception as e:
         print(f"\n{'='*80}")
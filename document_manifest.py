@@ -0,0 +1,192 @@
+"""
+Document Manifest
+Page-level manifest of each logical document (page hashes and extracted
+content), so a revised or amended filing only re-extracts the pages that changed
+"""
+
+import os
+import re
+import json
+import time
+import difflib
+import hashlib
+from typing import Iterable, Optional
+
+from file_utils import env_flag, atomic_write
+
+# Suffixes that mark a republished version of the same filing, e.g.
+# "q3_2025_amended.pdf", "q3_2025-v2.pdf", "q3_2025 (1).pdf", "q3_2025_rev3.pdf"
+REVISION_SUFFIX = re.compile(
+    r"(?:[\s_.-]*(?:\(\d+\)|v\d+|rev(?:ision)?\d*|amend(?:ed|ment)?\d*|correct(?:ed|ion)?|"
+    r"revised|restated|final|updated?|copy))+$",
+    re.IGNORECASE
+)
+
+
+def logical_document_name(filename: str) -> str:
+    """
+    Name shared by all revisions of a filing
+
+    Args:
+        filename: PDF filename or path
+
+    Returns:
+        Lowercase file stem without revision suffixes
+    """
+
+    stem = os.path.splitext(os.path.basename(filename))[0].strip()
+    return REVISION_SUFFIX.sub("", stem).lower() or stem.lower()
+
+
+def format_page_ranges(page_numbers: list) -> str:
+    """Compact page list for logs, e.g. [3, 4, 5, 9] -> '3-5, 9'"""
+
+    ranges = []
+    for page in sorted(page_numbers):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ", ".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+class DocumentManifest:
+    """
+    Manifest of the last extracted revision of a logical document: the
+    content hash of every page with its extracted content. A replacement
+    file is aligned against it page by page (difflib over the hash
+    sequences), so inserted or removed pages do not shift the rest of the
+    document out of alignment. Content is only carried over for pages whose
+    hash is identical, so two filings that happen to share a logical name
+    can never receive each other's extractions for different pages. Pages
+    that only have a fallback after a failed model call are stored without
+    content, so they are extracted again. Page content is written page by
+    page and not kept once the manifest is saved.
+    """
+
+    def __init__(self, filename: str, namespace: str, manifest_dir: Optional[str] = None,
+                 enabled: Optional[bool] = None):
+        """
+        Load the manifest of a logical document
+
+        Args:
+            filename: PDF filename or path; revisions share a manifest through logical_document_name()
+            namespace: Extraction configuration (model, prompts and every page extraction
+                setting); a manifest written under another one is ignored
+            manifest_dir: Directory for manifests (default: from env or ./data/cache/manifests)
+            enabled: Whether manifests are used at all (default: from env or True)
+        """
+
+        self.manifest_dir = manifest_dir or os.getenv('DOCUMENT_MANIFEST_DIR', './data/cache/manifests')
+        if enabled is None:
+            enabled = env_flag('DOCUMENT_MANIFESTS', 'true')
+        self.enabled = enabled
+        self.name = logical_document_name(filename)
+        self.namespace = namespace
+        digest = hashlib.sha256(self.name.encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(self.manifest_dir, f"{digest}.json")
+
+        self.previous = None  # Last extracted revision: source, source_name, pages
+        self.outdated = None  # Filename of a revision extracted under other settings
+
+        if self.enabled:
+            self._load()
+
+    def _load(self):
+        """Read the manifest of the previous revision"""
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("name") != self.name:
+            return  # Digest collision
+        if data.get("namespace") != self.namespace:
+            self.outdated = data.get("source_name")  # Nothing carries over under other settings
+            return
+        self.previous = data
+
+    def diff(self, page_hashes: list, source: str) -> dict:
+        """
+        Align a file's pages against the previous revision
+
+        Args:
+            page_hashes: Content hash of every page of the new file, in page order
+            source: Content hash of the new file
+
+        Returns:
+            Dictionary with 'unchanged' (content keyed by page number, 0-indexed),
+            'changed' and 'inserted' (0-indexed page numbers of the new file),
+            'removed' (1-indexed page numbers of the previous revision),
+            'previous' (filename of the previous revision, None without one)
+            and 'revision' (whether the file differs from the previous revision);
+            the previous revision's pages are released, so diff once per manifest
+        """
+
+        result = {"unchanged": {}, "changed": [], "inserted": [], "removed": [],
+                  "previous": None, "revision": False}
+        if not self.enabled or not self.previous:
+            return result
+
+        old_pages = self.previous.get("pages", [])
+        old_hashes = [page["hash"] for page in old_pages]
+        result["previous"] = self.previous.get("source_name")
+        result["revision"] = self.previous.get("source") != source
+
+        matcher = difflib.SequenceMatcher(None, old_hashes, page_hashes, autojunk=False)
+        for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+            if tag == "equal":
+                for offset in range(new_end - new_start):
+                    content = old_pages[old_start + offset].get("content")
+                    if content:
+                        result["unchanged"][new_start + offset] = content
+                    else:
+                        result["changed"].append(new_start + offset)  # Never extracted successfully
+            elif tag == "replace":
+                # Pair pages up; the surplus on either side was inserted or removed
+                paired = min(old_end - old_start, new_end - new_start)
+                result["changed"].extend(range(new_start, new_start + paired))
+                result["inserted"].extend(range(new_start + paired, new_end))
+                result["removed"].extend(range(old_start + paired + 1, old_end + 1))
+            elif tag == "insert":
+                result["inserted"].extend(range(new_start, new_end))
+            elif tag == "delete":
+                result["removed"].extend(range(old_start + 1, old_end + 1))
+        result["changed"].sort()
+        result["inserted"].sort()
+        # The carried-over content now lives in the result only
+        self.previous = {key: value for key, value in self.previous.items() if key != "pages"}
+        return result
+
+    def update(self, page_hashes: list, page_contents: Iterable[str], source: str, source_name: str):
+        """
+        Record the extracted revision (atomically replacing the previous one)
+
+        Args:
+            page_hashes: Content hash of every page, in page order
+            page_contents: Extracted content of every page, in page order ('' for pages
+                that must not carry over); read one page at a time, so it can be a
+                generator over the document store
+            source: Content hash of the file
+            source_name: Filename of the file
+        """
+
+        if not self.enabled:
+            return
+
+        data = {
+            "name": self.name,
+            "namespace": self.namespace,
+            "source": source,
+            "source_name": source_name,
+            "updated": time.time()
+        }
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        with atomic_write(self.path) as f:
+            f.write(json.dumps(data, ensure_ascii=False)[:-1] + ', "pages": [')
+            for page_num, (page_hash, content) in enumerate(zip(page_hashes, page_contents)):
+                f.write((", " if page_num else "")
+                        + json.dumps({"hash": page_hash, "content": content or ""}, ensure_ascii=False))
+            f.write("]}")
+        self.previous = None  # Reloaded by the next run; its pages are not kept in memory
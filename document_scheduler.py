@@ -0,0 +1,227 @@
+"""
+Document Scheduler
+Extracts several documents concurrently under one shared, fair budget of
+page requests in flight
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class FairRequestBudget:
+    """
+    Global limit on page requests in flight, shared by all documents.
+    When a slot frees up it goes to the waiting document with the fewest
+    requests in flight (ties: the one served least recently), so a large
+    document cannot starve the small ones queued behind it.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the request budget
+
+        Args:
+            capacity: Maximum page requests in flight across all documents
+        """
+
+        self.capacity = max(1, capacity)
+        self._condition = threading.Condition()
+        self._waiting = {}    # owner -> deque of tickets
+        self._in_flight = {}  # owner -> requests in flight
+        self._last_grant = {}  # owner -> grant sequence number
+        self._total = 0
+        self._sequence = 0
+        self._local = threading.local()  # owner of the slot each thread holds
+
+    def _next_owner(self):
+        """Owner whose turn it is (condition held)"""
+
+        waiting = [owner for owner, tickets in self._waiting.items() if tickets]
+        if not waiting:
+            return None
+        return min(waiting, key=lambda owner: (self._in_flight.get(owner, 0),
+                                               self._last_grant.get(owner, -1)))
+
+    def acquire(self, owner: str):
+        """
+        Wait for a slot
+
+        Args:
+            owner: Document the request belongs to
+        """
+
+        ticket = object()
+        with self._condition:
+            tickets = self._waiting.setdefault(owner, deque())
+            tickets.append(ticket)
+            while not (self._total < self.capacity and self._next_owner() == owner
+                       and tickets[0] is ticket):
+                self._condition.wait()
+
+            tickets.popleft()
+            if not tickets:
+                del self._waiting[owner]
+            self._grant(owner)
+            self._condition.notify_all()
+
+    def try_acquire(self, owner: str) -> bool:
+        """
+        Take a slot without waiting, only if one is free and no request is
+        queued for it (extra work such as hedged duplicates never delays
+        another document's pages)
+
+        Args:
+            owner: Document the request belongs to
+
+        Returns:
+            Whether a slot was taken; return it with release()
+        """
+
+        with self._condition:
+            if self._total >= self.capacity or self._waiting:
+                return False
+            self._grant(owner)
+            return True
+
+    def _grant(self, owner: str):
+        """Count a slot as taken by an owner (condition held)"""
+
+        self._in_flight[owner] = self._in_flight.get(owner, 0) + 1
+        self._total += 1
+        self._last_grant[owner] = self._sequence
+        self._sequence += 1
+
+    def release(self, owner: str):
+        """
+        Return a slot
+
+        Args:
+            owner: Document the request belonged to
+        """
+
+        with self._condition:
+            self._in_flight[owner] -= 1
+            if not self._in_flight[owner]:
+                del self._in_flight[owner]
+            self._total -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, owner: str):
+        """Hold a slot for the duration of a with-block"""
+
+        self.acquire(owner)
+        previous = getattr(self._local, "owner", None)
+        self._local.owner = owner
+        try:
+            yield
+        finally:
+            self._local.owner = previous
+            self.release(owner)
+
+    def current_owner(self) -> Optional[str]:
+        """Owner of the slot the calling thread holds through slot() (None outside one)"""
+        return getattr(self._local, "owner", None)
+
+
+class DocumentScheduler:
+    """
+    Runs document extractions concurrently and prints per-document progress.
+    Page-level fairness comes from the FairRequestBudget the extractor uses;
+    this class bounds how many documents are open at once.
+    """
+
+    def __init__(self, max_documents: Optional[int] = None, progress_interval: Optional[float] = None):
+        """
+        Initialize the document scheduler
+
+        Args:
+            max_documents: Documents extracted at the same time (default: from env or 4)
+            progress_interval: Seconds between progress reports (default: from env or 10)
+        """
+
+        self.max_documents = max(1, max_documents or int(os.getenv('DOCUMENT_MAX_PARALLEL', '4')))
+        self.progress_interval = progress_interval or float(os.getenv('DOCUMENT_PROGRESS_INTERVAL', '10'))
+
+    def run(self, pdf_paths: list, extract: Callable[[str], str],
+            progress: Optional[Callable[[str], Optional[tuple]]] = None) -> tuple:
+        """
+        Extract a list of documents
+
+        Args:
+            pdf_paths: Paths of the PDF files
+            extract: Called as extract(pdf_path), returns the document content
+            progress: Called as progress(pdf_path), returns (pages done, total pages) or None
+
+        Returns:
+            Tuple of (contents keyed by filename in input order, exceptions keyed by filename)
+        """
+
+        filenames = [os.path.basename(pdf_path) for pdf_path in pdf_paths]
+        states = {filename: "queued" for filename in filenames}
+        elapsed = {}
+        contents, errors = {}, {}
+        lock = threading.Lock()
+        finished = threading.Event()
+
+        def run_one(pdf_path: str):
+            filename = os.path.basename(pdf_path)
+            with lock:
+                states[filename] = "running"
+            start = time.perf_counter()
+            try:
+                content = extract(pdf_path)
+                with lock:
+                    contents[filename] = content
+                    states[filename] = "done"
+            except Exception as e:
+                with lock:
+                    errors[filename] = e
+                    states[filename] = "failed"
+            elapsed[filename] = time.perf_counter() - start
+
+        def report():
+            while not finished.wait(self.progress_interval):
+                print(f"    Progress: {self._format_progress(pdf_paths, states, lock, progress)}")
+
+        print(f"  Extracting {len(pdf_paths)} documents, up to {self.max_documents} at a time")
+        start = time.perf_counter()
+        reporter = threading.Thread(target=report, daemon=True)
+        reporter.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_documents) as executor:
+                list(executor.map(run_one, pdf_paths))
+        finally:
+            finished.set()
+            reporter.join()
+
+        total = time.perf_counter() - start
+        print(f"  ✓ Extracted {len(contents)}/{len(pdf_paths)} documents in {total:.1f}s "
+              f"(sum of per-document times {sum(elapsed.values()):.1f}s)")
+        for filename in filenames:
+            print(f"    {filename}: {states[filename]} in {elapsed.get(filename, 0.0):.1f}s")
+
+        ordered = {filename: contents[filename] for filename in filenames if filename in contents}
+        return ordered, errors
+
+    def _format_progress(self, pdf_paths: list, states: dict, lock, progress) -> str:
+        """One-line progress summary across documents"""
+
+        parts = []
+        with lock:
+            snapshot = dict(states)
+        for pdf_path in pdf_paths:
+            filename = os.path.basename(pdf_path)
+            state = snapshot[filename]
+            counts = progress(pdf_path) if progress and state == "running" else None
+            if counts:
+                done, total = counts
+                parts.append(f"{filename} {done}/{total} ({done / max(total, 1):.0%})")
+            else:
+                parts.append(f"{filename} {state}")
+        return " | ".join(parts)
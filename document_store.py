@@ -0,0 +1,277 @@
+"""
+Document Store
+On-disk, memory-mapped store for extracted documents: pages are streamed to
+disk as they complete, and consumers read them back through lazy views
+"""
+
+import os
+import re
+import json
+import mmap
+import hashlib
+import uuid
+import threading
+from typing import Iterator, Optional
+
+from file_utils import env_flag, atomic_write
+
+
+def _safe_name(filename: str) -> str:
+    """Filesystem-safe stem for a document filename"""
+    return re.sub(r"[^\w.-]+", "_", os.path.basename(filename)) or "document"
+
+
+def _document_key(pdf_path: str) -> str:
+    """Filesystem-safe name of a document, unique per full path (filings in different directories may share a filename)"""
+    digest = hashlib.sha256(os.path.abspath(pdf_path).encode('utf-8')).hexdigest()[:8]
+    return f"{_safe_name(pdf_path)}.{digest}"
+
+
+class StoredDocument:
+    """
+    Read-only, memory-mapped view of an extracted document. Page text is
+    decoded only when it is iterated, so holding many documents costs
+    little more than their page cache. str(document) materializes the
+    full text in the same layout extract_from_pdf() returns. close() (or a
+    with-block) releases the memory map.
+    """
+
+    def __init__(self, data_path: str, index: dict):
+        """
+        Open a stored document
+
+        Args:
+            data_path: File holding the UTF-8 page texts
+            index: Header text and byte offsets of every page
+        """
+
+        self.data_path = data_path
+        self.name = index["name"]
+        self.header = index["header"]
+        self._pages = sorted((int(page), start, end) for page, (start, end) in index["pages"].items())
+        self._offsets = {page: (start, end) for page, start, end in self._pages}
+        self._chars = index["chars"]
+        # The map keeps its own handle, so the file is closed right away
+        with open(data_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        """Number of characters of the materialized text"""
+        return self._chars
+
+    def __str__(self) -> str:
+        return "".join(self.iter_text())
+
+    def page_numbers(self) -> list:
+        """Stored page numbers (1-indexed), in page order"""
+        return [page for page, _, _ in self._pages]
+
+    def page(self, page_num: int) -> str:
+        """
+        Text of one page
+
+        Args:
+            page_num: Page number (1-indexed)
+
+        Returns:
+            Page text ('' if the page has no content)
+        """
+
+        if page_num not in self._offsets:
+            return ""
+        start, end = self._offsets[page_num]
+        return self._data[start:end].decode('utf-8')
+
+    def pages(self) -> Iterator[tuple]:
+        """Iterate (page number, text) in page order, decoding one page at a time"""
+
+        for page, start, end in self._pages:
+            yield page, self._data[start:end].decode('utf-8')
+
+    def iter_text(self) -> Iterator[str]:
+        """Iterate the document text in pieces (header, then one page at a time)"""
+
+        yield self.header
+        for page, text in self.pages():
+            yield f"\n\n--- PAGE {page} ---\n{text}"
+
+    def close(self):
+        """Release the memory map (the view cannot be read afterwards)"""
+
+        if isinstance(self._data, mmap.mmap) and not self._data.closed:
+            self._data.close()
+
+    def __enter__(self) -> "StoredDocument":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DocumentWriter:
+    """
+    Appends page results to a document file in completion order (safe to
+    call from concurrent page workers) and records their byte offsets, so
+    nothing but the offsets stays in memory.
+    """
+
+    def __init__(self, store: "DocumentStore", filename: str, header: str):
+        """
+        Start writing a document
+
+        Args:
+            store: Store the document belongs to
+            filename: Path of the PDF file
+            header: Header text that precedes the pages
+        """
+
+        self.store = store
+        self.path = filename
+        self.name = os.path.basename(filename)
+        self.header = header
+        # Every write goes to a new data file: a previous version may still be
+        # mapped by a reader (and cannot be replaced while mapped on Windows)
+        self.data_path = os.path.join(store.store_dir, f"{_document_key(filename)}.{uuid.uuid4().hex[:12]}.txt")
+        self._offsets = {}  # page (1-indexed) -> (start, end)
+        self._chars = {}    # page (1-indexed) -> characters in the materialized text
+        self._position = 0
+        self._lock = threading.Lock()
+        self._file = open(self.data_path, 'wb')
+
+    def write_page(self, page_num: int, content: str):
+        """
+        Append the result of a page
+
+        Args:
+            page_num: Page number (0-indexed, as used by the extractor)
+            content: Extracted page content; empty pages are not stored
+        """
+
+        if not content:
+            return
+        data = content.encode('utf-8')
+        with self._lock:
+            self._file.write(data)
+            self._offsets[page_num + 1] = (self._position, self._position + len(data))
+            self._chars[page_num + 1] = len(f"\n\n--- PAGE {page_num + 1} ---\n") + len(content)
+            self._position += len(data)
+
+    def has_page(self, page_num: int) -> bool:
+        """Whether a page (0-indexed) has been written"""
+
+        with self._lock:
+            return page_num + 1 in self._offsets
+
+    def close(self) -> StoredDocument:
+        """
+        Finish the document and publish it in the store
+
+        Returns:
+            Lazy view of the stored document
+        """
+
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            index = {
+                "name": self.name,
+                "data": os.path.basename(self.data_path),
+                "header": self.header,
+                "chars": len(self.header) + sum(self._chars.values()),
+                "pages": {str(page): list(offsets) for page, offsets in self._offsets.items()}
+            }
+        self.store._publish(self.path, index)
+        return StoredDocument(self.data_path, index)
+
+    def abort(self):
+        """Discard a partially written document"""
+
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        try:
+            os.remove(self.data_path)
+        except OSError:
+            pass
+
+
+class DocumentStore:
+    """
+    Directory of extracted documents: one data file of page texts per
+    document version and a small JSON index naming the current version.
+    """
+
+    def __init__(self, store_dir: Optional[str] = None, enabled: Optional[bool] = None):
+        """
+        Initialize the document store
+
+        Args:
+            store_dir: Directory for stored documents (default: from env or ./data/cache/documents)
+            enabled: Whether documents are stored on disk at all (default: from env or True)
+        """
+
+        self.store_dir = store_dir or os.getenv('DOCUMENT_STORE_DIR', './data/cache/documents')
+        if enabled is None:
+            enabled = env_flag('DOCUMENT_STORE', 'true')
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(self.store_dir, exist_ok=True)
+
+    def _index_path(self, filename: str) -> str:
+        return os.path.join(self.store_dir, f"{_document_key(filename)}.json")
+
+    def writer(self, filename: str, header: str) -> DocumentWriter:
+        """
+        Start writing a document
+
+        Args:
+            filename: Path of the PDF file
+            header: Header text that precedes the pages
+
+        Returns:
+            Writer to stream page results into
+        """
+
+        return DocumentWriter(self, filename, header)
+
+    def _publish(self, filename: str, index: dict):
+        """Point the index at a new data file and remove the previous one"""
+
+        index_path = self._index_path(filename)
+        with self._lock:
+            previous = None
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    previous = json.load(f).get("data")
+            except (OSError, ValueError):
+                pass
+
+            with atomic_write(index_path) as f:
+                json.dump(index, f, ensure_ascii=False)
+
+            if previous and previous != index["data"]:
+                try:
+                    os.remove(os.path.join(self.store_dir, previous))
+                except OSError:
+                    pass  # Still mapped by a reader (Windows)
+
+    def open(self, filename: str) -> Optional[StoredDocument]:
+        """
+        Open the current version of a stored document
+
+        Args:
+            filename: Path of the PDF file
+
+        Returns:
+            Lazy view of the document, or None if it is not stored
+        """
+
+        try:
+            with open(self._index_path(filename), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return StoredDocument(os.path.join(self.store_dir, index["data"]), index)
+        except (OSError, ValueError, KeyError):
+            return None
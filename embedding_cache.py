@@ -0,0 +1,263 @@
+"""
+Embedding Cache
+Persistent cache of chunk embeddings keyed by embedding model and the hash
+of the normalized chunk text; vectors live in memory-mapped float32/float16
+files with least-recently-used eviction
+"""
+
+import os
+import json
+import hashlib
+import heapq
+import atexit
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from file_utils import env_flag, atomic_write
+
+DTYPES = {"float32": np.float32, "float16": np.float16}
+
+
+def chunk_hash(text: str) -> str:
+    """Hash of a chunk's text with whitespace normalized"""
+    return hashlib.sha256(" ".join(text.split()).encode('utf-8')).hexdigest()
+
+
+class _ModelStore:
+    """
+    Vectors of one embedding model: a memory-mapped matrix with one row per
+    slot and a JSON index of chunk hash -> (slot, last use)
+    """
+
+    def __init__(self, directory: str, model: str, dtype, max_bytes: int):
+        self.directory = directory
+        self.model = model
+        self.dtype = dtype
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, "index.json")
+        self.data_path = os.path.join(directory, f"vectors.{np.dtype(dtype).name}")
+
+        self.dim = None
+        self.capacity = 0
+        self.slots = {}  # chunk hash -> [slot, last use]
+        self.free = []
+        self.clock = 0
+        self.vectors = None
+        self.dirty = False  # Last-use times changed since the index was saved
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get("model") == model and index.get("dtype") == np.dtype(dtype).name \
+                    and os.path.exists(self.data_path):
+                self.dim = index["dim"]
+                self.capacity = index["capacity"]
+                self.slots = index["slots"]
+                self.free = index["free"]
+                self.clock = index["clock"]
+                self._map()
+        except (OSError, ValueError, KeyError):
+            pass
+
+    @property
+    def max_entries(self) -> int:
+        return max(1, self.max_bytes // (self.dim * np.dtype(self.dtype).itemsize))
+
+    def _map(self):
+        """(Re)open the vector file at the current capacity"""
+
+        self.vectors = np.memmap(self.data_path, dtype=self.dtype, mode='r+', shape=(self.capacity, self.dim))
+
+    def _reset(self, dim: int):
+        """Start an empty store for vectors of a given dimension"""
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.dim = dim
+        self.capacity = 0
+        self.slots, self.free, self.clock = {}, [], 0
+        self.vectors = None
+        with open(self.data_path, 'wb'):
+            pass
+
+    def _grow(self, needed: int):
+        """Make room for needed more slots beyond the free ones, doubling the file up to the size limit"""
+
+        capacity = min(self.max_entries, max(self.capacity + needed, 2 * self.capacity, 64))
+        if capacity <= self.capacity:
+            return
+        if self.vectors is not None:
+            self.vectors.flush()
+            del self.vectors
+        with open(self.data_path, 'r+b') as f:
+            f.truncate(capacity * self.dim * np.dtype(self.dtype).itemsize)
+        self.free.extend(range(self.capacity, capacity))
+        self.capacity = capacity
+        self._map()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        entry = self.slots.get(key)
+        if entry is None:
+            return None
+        self.clock += 1
+        entry[1] = self.clock
+        self.dirty = True
+        return self.vectors[entry[0]].astype(np.float32).tolist()
+
+    def put(self, items: dict) -> int:
+        """Store vectors by chunk hash; returns the number of evicted entries"""
+
+        dim = len(next(iter(items.values())))
+        if dim != self.dim:
+            self._reset(dim)
+
+        new = [key for key in items if key not in self.slots]
+        if len(new) > len(self.free):
+            self._grow(len(new) - len(self.free))
+
+        evicted = 0
+        shortfall = len(new) - len(self.free)
+        if shortfall > 0:
+            # Reuse the slots of the least recently used entries not being written now
+            candidates = ((entry[1], key) for key, entry in self.slots.items() if key not in items)
+            for _, key in heapq.nsmallest(shortfall, candidates):
+                self.free.append(self.slots.pop(key)[0])
+                evicted += 1
+
+        for key, vector in items.items():
+            if key not in self.slots:
+                if not self.free:
+                    break  # More new chunks in one call than the cache holds
+                self.slots[key] = [self.free.pop(), 0]
+            self.clock += 1
+            self.slots[key][1] = self.clock
+            self.vectors[self.slots[key][0]] = np.asarray(vector, dtype=self.dtype)
+        return evicted
+
+    def save(self):
+        """Flush the vectors, then atomically replace the index"""
+
+        if self.vectors is None:
+            return
+        self.vectors.flush()
+        with atomic_write(self.index_path) as f:
+            json.dump({
+                "model": self.model, "dim": self.dim, "dtype": np.dtype(self.dtype).name,
+                "capacity": self.capacity, "clock": self.clock, "free": self.free, "slots": self.slots
+            }, f)
+        self.dirty = False
+
+    @property
+    def size_bytes(self) -> int:
+        return self.capacity * (self.dim or 0) * np.dtype(self.dtype).itemsize
+
+
+class EmbeddingCache:
+    """
+    On-disk cache of chunk embeddings shared by every collection build, so
+    a chunk is embedded once per model no matter how many documents or
+    rebuilds it appears in. Each model's store is bounded by the size limit
+    and evicts least-recently-used vectors first. Lookups only update the
+    last-use times in memory; they are saved with the next put_many(),
+    flush() or at interpreter exit.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: Optional[float] = None,
+                 dtype: Optional[str] = None, enabled: Optional[bool] = None):
+        """
+        Initialize the embedding cache
+
+        Args:
+            cache_dir: Directory for cached vectors (default: from env or ./data/cache/embeddings)
+            max_size_mb: Size limit of each model's vectors (default: from env or 256)
+            dtype: 'float32' or 'float16' (half the size; default: from env or float32)
+            enabled: Whether the cache is used at all (default: from env or True)
+        """
+
+        self.cache_dir = cache_dir or os.getenv('EMBEDDING_CACHE_DIR', './data/cache/embeddings')
+        self.max_bytes = int((max_size_mb or float(os.getenv('EMBEDDING_CACHE_MAX_MB', '256'))) * 1024 * 1024)
+        dtype = (dtype or os.getenv('EMBEDDING_CACHE_DTYPE', 'float32')).lower()
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported EMBEDDING_CACHE_DTYPE: {dtype} (expected float32 or float16)")
+        self.dtype = DTYPES[dtype]
+        if enabled is None:
+            enabled = env_flag('EMBEDDING_CACHE', 'true')
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._stores = {}
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        atexit.register(self.flush)
+
+    def _store(self, model: str) -> _ModelStore:
+        store = self._stores.get(model)
+        if store is None:
+            directory = os.path.join(self.cache_dir, hashlib.sha256(model.encode('utf-8')).hexdigest()[:16])
+            store = self._stores[model] = _ModelStore(directory, model, self.dtype, self.max_bytes)
+        return store
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the embeddings of several chunks
+
+        Args:
+            model: Embedding model name
+            texts: Chunk texts
+
+        Returns:
+            One vector per text, None where the chunk is not cached
+        """
+
+        if not self.enabled:
+            return [None] * len(texts)
+
+        with self._lock:
+            store = self._store(model)
+            vectors = [store.get(chunk_hash(text)) for text in texts]
+            hits = sum(vector is not None for vector in vectors)
+            self._stats["hits"] += hits
+            self._stats["misses"] += len(texts) - hits
+        return vectors
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        """
+        Store the embeddings of several chunks
+
+        Args:
+            model: Embedding model name
+            texts: Chunk texts
+            vectors: Their embeddings, in the same order
+        """
+
+        if not self.enabled or not texts:
+            return
+
+        items = {chunk_hash(text): vector for text, vector in zip(texts, vectors)}
+        with self._lock:
+            store = self._store(model)
+            self._stats["evictions"] += store.put(items)
+            store.save()
+
+    def flush(self):
+        """Save the last-use times refreshed by lookups since the last save"""
+
+        with self._lock:
+            for store in self._stores.values():
+                if store.dirty:
+                    store.save()
+
+    def get_statistics(self) -> dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with hits, misses, evictions, cached entries and size in bytes
+        """
+
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = sum(len(store.slots) for store in self._stores.values())
+            stats["size_bytes"] = sum(store.size_bytes for store in self._stores.values())
+        stats["enabled"] = self.enabled
+        return stats
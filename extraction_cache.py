@@ -0,0 +1,234 @@
+"""
+Extraction Cache
+Persistent, content-addressed cache for per-page extraction results
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Optional
+
+from file_utils import env_flag, atomic_write
+
+
+def make_cache_key(*parts) -> str:
+    """
+    Build a content-addressed cache key from arbitrary JSON-serializable parts
+
+    Args:
+        *parts: Values that together determine the extraction result
+
+    Returns:
+        Hex SHA-256 digest of the serialized parts
+    """
+
+    serialized = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def page_content_hash(page) -> str:
+    """
+    Hash the content of a PDF page without rendering it
+
+    Covers the page geometry, its content streams, and the raw streams of
+    every image and form XObject it references, so any visual change to
+    the page produces a different hash.
+
+    Args:
+        page: PyMuPDF page object
+
+    Returns:
+        Hex SHA-256 digest of the page content
+    """
+
+    doc = page.parent
+    digest = hashlib.sha256()
+    digest.update(repr(tuple(page.rect)).encode('utf-8'))
+    digest.update(str(page.rotation).encode('utf-8'))
+    digest.update(page.read_contents())
+
+    xrefs = [img[0] for img in page.get_images(full=True)]
+    xrefs += [xobj[0] for xobj in page.get_xobjects()]
+    for xref in sorted(set(xrefs)):
+        try:
+            digest.update(doc.xref_stream_raw(xref) or b"")
+        except Exception:
+            digest.update(str(xref).encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def file_content_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Hash the bytes of a file
+
+    Args:
+        path: Path to the file
+        chunk_size: Read size in bytes
+
+    Returns:
+        Hex SHA-256 digest of the file content
+    """
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    On-disk cache of extraction results keyed by content hash.
+    Entries are evicted least-recently-used first once the cache
+    exceeds its size budget.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: Optional[float] = None,
+                 enabled: Optional[bool] = None):
+        """
+        Initialize the extraction cache
+
+        Args:
+            cache_dir: Directory for cache entries (default: from env or ./data/cache/extraction)
+            max_size_mb: Size budget in megabytes (default: from env or 512)
+            enabled: Whether the cache is used at all (default: from env or True)
+        """
+
+        self.cache_dir = cache_dir or os.getenv('EXTRACTION_CACHE_DIR', './data/cache/extraction')
+        self.max_size_bytes = int(
+            float(max_size_mb or os.getenv('EXTRACTION_CACHE_MAX_MB', '512')) * 1024 * 1024
+        )
+        if enabled is None:
+            enabled = env_flag('EXTRACTION_CACHE_ENABLED', 'true')
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._index = {}  # key -> [size_bytes, last_access]
+        self._total_size = 0
+
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_index()
+
+    def _entry_path(self, key: str) -> str:
+        """Path of the file holding a cache entry"""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        """Scan the cache directory to rebuild the size/recency index"""
+
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                self._index[name[:-5]] = [stat.st_size, stat.st_mtime]
+                self._total_size += stat.st_size
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached extraction result
+
+        Args:
+            key: Cache key from make_cache_key()
+
+        Returns:
+            Cached content, or None on a miss
+        """
+
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = json.load(f)['content']
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        now = time.time()
+        with self._lock:
+            self.hits += 1
+            if key in self._index:
+                self._index[key][1] = now
+        try:
+            os.utime(path, (now, now))  # Persist recency for the next run
+        except OSError:
+            pass
+
+        return content
+
+    def put(self, key: str, content: str):
+        """
+        Store an extraction result, evicting old entries if over budget
+
+        Args:
+            key: Cache key from make_cache_key()
+            content: Extracted content to store
+        """
+
+        if not self.enabled:
+            return
+
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with atomic_write(path) as f:
+            json.dump({'content': content, 'created': time.time()}, f, ensure_ascii=False)
+        size = os.path.getsize(path)
+
+        with self._lock:
+            previous = self._index.get(key)
+            if previous:
+                self._total_size -= previous[0]
+            self._index[key] = [size, time.time()]
+            self._total_size += size
+            self._evict()
+
+    def _evict(self):
+        """Remove least-recently-used entries until within budget (lock held)"""
+
+        if self._total_size <= self.max_size_bytes:
+            return
+
+        for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+            del self._index[key]
+            self._total_size -= size
+            self.evictions += 1
+
+    def get_statistics(self) -> dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with statistics
+        """
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "cache_dir": self.cache_dir,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "size_bytes": self._total_size,
+                "max_size_bytes": self.max_size_bytes
+            }
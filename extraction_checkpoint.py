@@ -0,0 +1,145 @@
+"""
+Extraction Checkpoints
+Append-only per-document journal of completed pages, so an interrupted
+extraction resumes where it stopped
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Optional
+
+from file_utils import env_flag
+
+
+class ExtractionCheckpoint:
+    """
+    Journal of the pages of one document that have been extracted, keyed by
+    the file's content hash. Every completed page is appended as one JSON line
+    and fsynced, so at most the page being written is lost on a crash; a
+    torn last line is ignored on load. The journal is deleted once the
+    document finishes: re-runs of a finished document are served by the
+    extraction cache, under its size limit and eviction.
+    """
+
+    def __init__(self, source: str, namespace: str, source_name: str = "",
+                 checkpoint_dir: Optional[str] = None, enabled: Optional[bool] = None):
+        """
+        Open (or start) the journal for a document
+
+        Args:
+            source: Content hash of the document file
+            namespace: Extraction configuration; a journal written under another one is discarded
+            source_name: Filename of the document (for logging)
+            checkpoint_dir: Directory for journals (default: from env or ./data/cache/checkpoints)
+            enabled: Whether checkpoints are used at all (default: from env or True)
+        """
+
+        self.checkpoint_dir = checkpoint_dir or os.getenv('EXTRACTION_CHECKPOINT_DIR', './data/cache/checkpoints')
+        if enabled is None:
+            enabled = env_flag('EXTRACTION_CHECKPOINTS', 'true')
+        self.enabled = enabled
+        self.source = source
+        self.namespace = namespace
+        self.source_name = source_name
+        self.path = os.path.join(self.checkpoint_dir, f"{source}.jsonl")
+
+        self.completed = {}  # page_num (0-indexed) -> content, for pages resumed from the journal
+        self._journaled = set()  # Page numbers in the journal (content is not kept in memory)
+        self._lock = threading.Lock()
+        self._file = None
+
+        if self.enabled:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            self._load()
+
+    def _load(self):
+        """Read completed pages from an existing journal"""
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+
+        header = None
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Torn write from an interrupted run
+            if header is None:
+                header = entry
+                if entry.get("namespace") != self.namespace or entry.get("complete"):
+                    self.completed = {}
+                    return  # Other configuration, or left over from a finished run; start over
+                continue
+            if "page" in entry:
+                self.completed[entry["page"]] = entry["content"]
+        self._journaled = set(self.completed)
+
+    def _append(self, entry: dict):
+        """Append one entry and force it to disk (lock held)"""
+
+        if self._file is None:
+            fresh = not self._journaled or not os.path.exists(self.path)
+            self._file = open(self.path, 'w' if fresh else 'a', encoding='utf-8')
+            if fresh:
+                self._file.write(json.dumps(self._header()) + "\n")
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _header(self) -> dict:
+        """First line of the journal"""
+        return {
+            "namespace": self.namespace,
+            "source": self.source,
+            "source_name": self.source_name,
+            "created": time.time()
+        }
+
+    def record(self, page_num: int, content: str):
+        """
+        Record a completed page (safe to call from concurrent page workers);
+        callers only record pages the model extracted, never fallbacks
+
+        Args:
+            page_num: Page number (0-indexed)
+            content: Extracted page content
+        """
+
+        if not self.enabled or not content:
+            return
+
+        with self._lock:
+            if page_num in self._journaled:
+                return
+            self._append({"page": page_num, "content": content})
+            self._journaled.add(page_num)
+
+    def finish(self):
+        """Delete the journal once every page of the document has been extracted"""
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.completed = {}
+            self._journaled = set()
+
+    def close(self):
+        """Close the journal and keep it for the next run (e.g. after a failed extraction)"""
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
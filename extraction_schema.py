@@ -0,0 +1,264 @@
+"""
+Extraction Schema
+Typed financial records for structured (JSON) vision extraction, validated with pydantic
+"""
+
+import re
+import json
+from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+STATEMENT_TYPES = (
+    "income_statement", "balance_sheet", "cash_flow", "kpi", "guidance", "narrative", "other"
+)
+
+# One record per line in page content: "- statement | line item | period | value | unit | currency"
+RECORD_LINE_PATTERN = re.compile(
+    r"^- ([a-z_]+) \| (.+?) \| (.*?) \| (-?\d+(?:\.\d+)?(?:e[+-]?\d+)?) \| (.*?) \| (.*?)$", re.MULTILINE
+)
+RECORDS_HEADER = "Records (statement | line item | period | value | unit | currency):"
+
+# Statement type of a table rebuilt from the text layer, from its row labels (first match wins)
+TABLE_STATEMENT_TYPES = (
+    ("balance_sheet", re.compile(r"total (?:current )?assets|total liabilities|shareholders.? equity", re.IGNORECASE)),
+    ("cash_flow", re.compile(r"operating activities|investing activities|financing activities", re.IGNORECASE)),
+    ("income_statement", re.compile(r"revenue|gross profit|net (?:income|loss)|operating expenses", re.IGNORECASE)),
+)
+SCALE_PATTERN = re.compile(r"\bin (thousands|millions|billions)\b", re.IGNORECASE)
+CURRENCY_PATTERNS = (
+    ("USD", re.compile(r"U\.S\. dollars|US\$|\bUSD\b")),
+    ("CAD", re.compile(r"Canadian dollars|C\$|\bCAD\b")),
+    ("EUR", re.compile(r"\beuros?\b|€|\bEUR\b", re.IGNORECASE)),
+    ("GBP", re.compile(r"pounds sterling|£|\bGBP\b", re.IGNORECASE)),
+)
+
+
+def normalize_statement_type(value) -> str:
+    """Map a model-provided statement type onto STATEMENT_TYPES"""
+
+    value = str(value or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return value if value in STATEMENT_TYPES else "other"
+
+
+class FinancialRecord(BaseModel):
+    """One figure from a financial document"""
+
+    statement_type: str = Field(description="One of: " + ", ".join(STATEMENT_TYPES))
+    line_item: str = Field(description="Label of the figure as printed, e.g. 'Total revenue'")
+    period: str = Field(description="Period the figure refers to, e.g. 'Q4 FY2025' or 'FY2024'")
+    value: float = Field(description="Numeric value as printed (negative for amounts in parentheses)")
+    unit: str = Field(default="", description="Scale or unit, e.g. 'thousands', 'millions', '%', 'per share'")
+    currency: Optional[str] = Field(default=None, description="ISO currency code, e.g. 'USD', or null")
+
+    @field_validator("statement_type", mode="before")
+    @classmethod
+    def _normalize_statement_type(cls, value):
+        return normalize_statement_type(value)
+
+    @field_validator("value", mode="before")
+    @classmethod
+    def _parse_value(cls, value):
+        if isinstance(value, str):
+            text = value.strip().replace(",", "").replace("$", "").replace("%", "")
+            negative = text.startswith("(") and text.endswith(")")
+            text = text.strip("()")
+            return -float(text) if negative else float(text)
+        return value
+
+    @field_validator("line_item", "period", "unit", mode="before")
+    @classmethod
+    def _clean_text(cls, value):
+        # Pipes and newlines would break the one-record-per-line content format
+        return " ".join(str(value or "").replace("|", "/").split())
+
+
+class PageExtraction(BaseModel):
+    """Structured extraction of one page (or page region)"""
+
+    statement_type: str = Field(description="Main statement type of the page: " + ", ".join(STATEMENT_TYPES))
+    summary: str = Field(description="One or two sentences on what the page shows")
+    content: str = Field(default="", description="Text of the page in reading order, tables as pipe tables")
+    records: List[FinancialRecord] = Field(default_factory=list)
+
+
+PAGE_EXTRACTION_SCHEMA = PageExtraction.model_json_schema()
+
+
+def parse_page_extraction(response: str) -> Optional[PageExtraction]:
+    """
+    Parse and validate a structured vision response
+
+    Records that fail validation are dropped individually rather than
+    discarding the whole page.
+
+    Args:
+        response: JSON text returned by the model
+
+    Returns:
+        PageExtraction, or None if the response is not usable JSON
+    """
+
+    try:
+        data = json.loads(response)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    records = []
+    for item in data.get("records") or []:
+        try:
+            records.append(FinancialRecord.model_validate(item))
+        except ValidationError:
+            continue
+
+    try:
+        return PageExtraction(
+            statement_type=normalize_statement_type(data.get("statement_type")),
+            summary=str(data.get("summary") or "").strip(),
+            content=str(data.get("content") or "").strip(),
+            records=records
+        )
+    except ValidationError:
+        return None
+
+
+def format_records(records: List[FinancialRecord]) -> str:
+    """
+    Render records as a block of record lines ('' without records)
+
+    Args:
+        records: Records to render
+
+    Returns:
+        RECORDS_HEADER followed by one line per record
+    """
+
+    if not records:
+        return ""
+    lines = [RECORDS_HEADER]
+    for record in records:
+        lines.append(
+            f"- {record.statement_type} | {record.line_item} | {record.period} | "
+            f"{record.value:.15g} | {record.unit} | {record.currency or ''}"
+        )
+    return "\n".join(lines)
+
+
+def format_page_extraction(extraction: PageExtraction) -> str:
+    """
+    Render a structured extraction as page content: the page text (the
+    summary if the model returned none) followed by the record lines
+
+    The record lines can be split off again with split_records(), so records
+    survive every layer that stores page content as text (cache,
+    checkpoints, near-duplicate reuse, revision manifests).
+
+    Args:
+        extraction: Validated page extraction
+
+    Returns:
+        Page content text
+    """
+
+    prose = extraction.content or extraction.summary
+    return "\n\n".join(part for part in (prose, format_records(extraction.records)) if part)
+
+
+def _record_from_match(match) -> Optional[FinancialRecord]:
+    """Record of a RECORD_LINE_PATTERN match, or None if it does not validate"""
+
+    statement_type, line_item, period, value, unit, currency = match.groups()
+    try:
+        return FinancialRecord(
+            statement_type=statement_type, line_item=line_item, period=period,
+            value=float(value), unit=unit, currency=currency or None
+        )
+    except ValidationError:
+        return None
+
+
+def parse_records(content: str) -> List[FinancialRecord]:
+    """
+    Recover the records from page content written by format_page_extraction()
+
+    Args:
+        content: Page content
+
+    Returns:
+        List of records, in order
+    """
+
+    records = [_record_from_match(match) for match in RECORD_LINE_PATTERN.finditer(content)]
+    return [record for record in records if record is not None]
+
+
+def split_records(content: str) -> tuple:
+    """
+    Separate page content into its prose and its records
+
+    Record blocks may appear anywhere (a page stitched from several regions
+    has one per region); all of them are removed from the prose.
+
+    Args:
+        content: Page content written by format_page_extraction() or stitched from it
+
+    Returns:
+        Tuple of (prose without record lines, list of records in order)
+    """
+
+    prose, records = [], []
+    for line in content.split("\n"):
+        if line.strip() == RECORDS_HEADER:
+            continue
+        match = RECORD_LINE_PATTERN.match(line)
+        if match:
+            record = _record_from_match(match)
+            if record is not None:
+                records.append(record)
+            continue
+        prose.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(prose)).strip(), records
+
+
+def table_records(frame, context: str = "") -> List[FinancialRecord]:
+    """
+    Convert a table rebuilt from the text layer into records
+
+    Each numeric cell becomes one record: the row label is the line item
+    and the column label the period. The scale ("In thousands of U.S.
+    dollars") and currency are read from the surrounding page text.
+
+    Args:
+        frame: DataFrame from TableExtractor (row labels as index)
+        context: Page text around the table
+
+    Returns:
+        List of records, row by row; cells that are not numbers are left out
+    """
+
+    labels = " ".join(str(label) for label in frame.index)
+    statement_type = next((name for name, pattern in TABLE_STATEMENT_TYPES if pattern.search(labels)), "other")
+    scale = SCALE_PATTERN.search(context)
+    currency = next((code for code, pattern in CURRENCY_PATTERNS if pattern.search(context)), None)
+
+    records = []
+    for line_item, row in frame.iterrows():
+        for period, cell in row.items():
+            cell = str(cell or "").strip()
+            if not cell or not line_item:
+                continue
+            if "%" in cell:
+                unit = "%"
+            elif "per share" in str(line_item).lower():
+                unit = "per share"
+            else:
+                unit = scale.group(1).lower() if scale else ""
+            try:
+                records.append(FinancialRecord(
+                    statement_type=statement_type, line_item=line_item, period=period,
+                    value=cell, unit=unit, currency=currency if unit != "%" else None
+                ))
+            except ValidationError:
+                continue  # Dashes and other non-numeric cells
+    return records
@@ -0,0 +1,47 @@
+"""
+File Utilities
+Environment flags and atomic file replacement shared by the caches,
+journals and indexes
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
+
+def env_flag(name: str, default: str) -> bool:
+    """Read a boolean flag from the environment"""
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+
+@contextmanager
+def atomic_write(path: str, fsync: bool = False) -> Iterator[TextIO]:
+    """
+    Open a text file whose content replaces path only once the block completes
+
+    The content goes to a temporary file next to path first, so readers
+    never see a partial file and a crash leaves the previous version intact.
+
+    Args:
+        path: File to replace
+        fsync: Force the content to disk before it replaces path
+
+    Yields:
+        Text file to write the new content to
+    """
+
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
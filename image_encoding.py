@@ -0,0 +1,220 @@
+"""
+Image Encoding Policy
+Controls how PDF pages are rasterized and encoded for vision model requests
+"""
+
+import io
+import os
+import time
+import base64
+import statistics
+from typing import Optional
+
+from file_utils import env_flag
+
+# Try to import PyMuPDF at module level
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    fitz = None
+    FITZ_AVAILABLE = False
+
+# Pillow is needed for WebP (and preferred for JPEG)
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    PIL_AVAILABLE = False
+
+IMAGE_FORMATS = ('png', 'jpeg', 'webp')
+
+
+class ImageEncodingPolicy:
+    """
+    Decides resolution, colour depth, crop and output format per page.
+    Planning runs on the main process (cheap, text-layer only); the plan is
+    a plain dict so render workers can apply it and cache keys can include it.
+    """
+
+    def __init__(self, dpi: Optional[float] = None, min_dpi: float = 110, max_dpi: float = 220,
+                 target_text_px: float = 20, grayscale: bool = True, autocrop: bool = True,
+                 crop_margin: float = 12, image_format: str = 'png', quality: int = 85):
+        """
+        Initialize the encoding policy
+
+        Args:
+            dpi: Fixed rendering DPI, or None to choose it from the page's text size
+            min_dpi: Lower bound for adaptive DPI
+            max_dpi: Upper bound for adaptive DPI
+            target_text_px: Rendered pixel height aimed for the page's median font size
+            grayscale: Render without colour
+            autocrop: Crop page margins down to the content bounding box
+            crop_margin: Padding kept around the content box, in points
+            image_format: Output format: png, jpeg or webp
+            quality: JPEG/WebP quality (1-100)
+        """
+
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format} (expected one of {IMAGE_FORMATS})")
+        if image_format == 'webp' and not PIL_AVAILABLE:
+            print("    WARNING: Pillow not available, falling back to PNG page images")
+            image_format = 'png'
+
+        self.dpi = dpi
+        self.min_dpi = min_dpi
+        self.max_dpi = max_dpi
+        self.target_text_px = target_text_px
+        self.grayscale = grayscale
+        self.autocrop = autocrop
+        self.crop_margin = crop_margin
+        self.image_format = image_format
+        self.quality = quality
+
+    @classmethod
+    def from_env(cls) -> "ImageEncodingPolicy":
+        """
+        Build the policy from environment variables
+
+        Returns:
+            ImageEncodingPolicy configured from VISION_IMAGE_* settings
+        """
+
+        dpi = os.getenv('VISION_IMAGE_DPI', 'auto')
+        return cls(
+            dpi=None if dpi == 'auto' else float(dpi),
+            grayscale=env_flag('VISION_IMAGE_GRAYSCALE', 'true'),
+            autocrop=env_flag('VISION_IMAGE_AUTOCROP', 'true'),
+            image_format=os.getenv('VISION_IMAGE_FORMAT', 'png').lower(),
+            quality=int(os.getenv('VISION_IMAGE_QUALITY', '85'))
+        )
+
+    @classmethod
+    def baseline(cls) -> "ImageEncodingPolicy":
+        """Original encoding: 2x zoom (144 DPI), RGB, full page, PNG"""
+        return cls(dpi=144, grayscale=False, autocrop=False, image_format='png')
+
+    def describe(self) -> str:
+        """Short human-readable summary of the policy"""
+
+        dpi = f"{self.dpi:.0f} DPI" if self.dpi else f"adaptive {self.min_dpi:.0f}-{self.max_dpi:.0f} DPI"
+        parts = [dpi, "grayscale" if self.grayscale else "RGB"]
+        if self.autocrop:
+            parts.append("auto-crop")
+        parts.append(self.image_format.upper() + (
+            f" q{self.quality}" if self.image_format != 'png' else ""
+        ))
+        return ", ".join(parts)
+
+    def plan(self, page, clip=None, dpi_scale: float = 1.0) -> dict:
+        """
+        Decide how to render a page
+
+        Args:
+            page: PyMuPDF page object
+            clip: Optional region (fitz.Rect or 4-tuple) to restrict rendering to
+            dpi_scale: Multiplier on the chosen DPI (e.g. to render small crops sharper)
+
+        Returns:
+            Render plan dictionary (JSON-serializable)
+        """
+
+        region = fitz.Rect(clip) if clip is not None else page.rect
+        text_dict = page.get_text("dict", clip=region)
+
+        if self.dpi:
+            dpi = self.dpi
+        else:
+            # Size the median font to target_text_px pixels tall
+            sizes = [
+                span["size"]
+                for block in text_dict.get("blocks", [])
+                for line in block.get("lines", [])
+                for span in line.get("spans", [])
+                if span.get("text", "").strip() and span.get("size", 0) > 0
+            ]
+            median_size = statistics.median(sizes) if sizes else 10.0
+            dpi = self.target_text_px / median_size * 72
+            dpi = max(self.min_dpi, min(self.max_dpi, dpi))
+        dpi *= dpi_scale
+
+        if self.autocrop and clip is None:
+            region = self._content_box(page, text_dict) or region
+
+        return {
+            "dpi": round(dpi, 1),
+            "clip": [round(value, 2) for value in region],
+            "grayscale": self.grayscale,
+            "format": self.image_format,
+            "quality": self.quality
+        }
+
+    def _content_box(self, page, text_dict: dict):
+        """Bounding box of everything drawn on the page, padded by crop_margin"""
+
+        box = fitz.Rect()
+        for block in text_dict.get("blocks", []):
+            box |= block["bbox"]
+        for info in page.get_image_info():
+            box |= info["bbox"]
+        for drawing in page.get_drawings():
+            box |= drawing["rect"]
+
+        if box.is_empty:
+            return None
+
+        margin = self.crop_margin
+        box = fitz.Rect(box.x0 - margin, box.y0 - margin, box.x1 + margin, box.y1 + margin)
+        return box & page.rect
+
+
+def encode_page(page, plan: dict) -> dict:
+    """
+    Rasterize and encode a page according to a render plan
+
+    Args:
+        page: PyMuPDF page object
+        plan: Render plan from ImageEncodingPolicy.plan()
+
+    Returns:
+        Dictionary with the base64 image, its size and stage timings
+    """
+
+    zoom = plan["dpi"] / 72
+    colorspace = fitz.csGRAY if plan["grayscale"] else fitz.csRGB
+
+    start = time.perf_counter()
+    pix = page.get_pixmap(
+        matrix=fitz.Matrix(zoom, zoom),
+        clip=fitz.Rect(plan["clip"]) if plan.get("clip") else None,
+        colorspace=colorspace,
+        alpha=False
+    )
+    rendered = time.perf_counter()
+
+    image_format = plan["format"]
+    if image_format == 'png':
+        img_data = pix.tobytes("png")
+    elif PIL_AVAILABLE:
+        mode = "L" if pix.n == 1 else "RGB"
+        image = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format.upper(), quality=plan["quality"])
+        img_data = buffer.getvalue()
+    elif image_format == 'jpeg':
+        img_data = pix.tobytes("jpeg", jpg_quality=plan["quality"])
+    else:
+        img_data = pix.tobytes("png")
+
+    img_base64 = base64.b64encode(img_data).decode('utf-8')
+    encoded = time.perf_counter()
+
+    return {
+        "image_base64": img_base64,
+        "image_bytes": len(img_data),
+        "width": pix.width,
+        "height": pix.height,
+        "render_seconds": rendered - start,
+        "encode_seconds": encoded - rendered
+    }
@@ -4,6 +4,7 @@ Orchestrates the financial analysis workflow using LangChain
 """
 import os
 import sys
+import json
 from datetime import datetime
 from dotenv import load_dotenv
 from typing import List, Dict, Any
@@ -12,9 +13,14 @@ from typing import List, Dict, Any
 load_dotenv()
 
 from agents import FinancialAgents
-from tasks import FinancialTasks
+from tasks import FinancialTasks, DOCUMENTS_PLACEHOLDER
 from vision_extractor import VisionDocumentExtractor
 from valuation_rag import ValuationRAG
+from document_scheduler import DocumentScheduler
+from document_manifest import format_page_ranges
+from document_store import StoredDocument
+from ollama_client import get_client
+from model_lifecycle import ModelLifecycle, STAGE_VISION, STAGE_EMBEDDING, STAGE_ANALYSIS
 
 
 class FinancialAnalysisOrchestrator:
@@ -24,9 +30,13 @@ class FinancialAnalysisOrchestrator:
         self.file_share_path = file_share_path
         self.valuation_pdf_path = valuation_pdf_path
 
-        # Initialize components
+        # Models load on the server while the components are set up
         print("Initializing components...")
+        self.model_lifecycle = ModelLifecycle()
+        self.model_lifecycle.warm_up()
+
         self.vision_extractor = VisionDocumentExtractor()
+        self.model_lifecycle.begin(STAGE_EMBEDDING)
         self.valuation_rag = ValuationRAG(valuation_pdf_path)
         self.agents_factory = FinancialAgents()
         self.tasks_factory = FinancialTasks()
@@ -45,17 +55,16 @@ class FinancialAnalysisOrchestrator:
 
         print(f"\nFound {len(pdf_files)} PDF files to process")
 
-        for pdf_path in pdf_files:
-            filename = os.path.basename(pdf_path)
-            print(f"Extracting {filename}...")
+        # Documents are extracted concurrently under one shared page request budget
+        contents, errors = DocumentScheduler().run(
+            pdf_files, self.vision_extractor.extract_from_pdf, self.vision_extractor.get_progress
+        )
 
-            try:
-                content = self.vision_extractor.extract_from_pdf(pdf_path)
-                documents[filename] = content
-                print(f"  ✓ Extracted {len(content)} characters from {filename}")
-            except Exception as e:
-                print(f"  ✗ Error extracting {filename}: {e}")
-                continue
+        for filename, content in contents.items():
+            documents[filename] = content
+            print(f"  ✓ Extracted {len(content)} characters from {filename}")
+        for filename, error in errors.items():
+            print(f"  ✗ Error extracting {filename}: {error}")
 
         return documents
 
@@ -69,7 +78,9 @@ class FinancialAnalysisOrchestrator:
         # Step 1: Extract documents
         print("STEP 1: Extracting Financial Documents")
         print("-" * 80)
+        self.model_lifecycle.begin(STAGE_VISION)
         extracted_docs = self.extract_financial_documents()
+        self.model_lifecycle.finish(STAGE_VISION)
 
         if not extracted_docs:
             raise ValueError("No documents were successfully extracted")
@@ -83,6 +94,7 @@ class FinancialAnalysisOrchestrator:
             "What are all the valuation parameters, methodologies, and formulas?",
             k=10
         )
+        self.model_lifecycle.finish(STAGE_EMBEDDING)
         print(f"✓ Loaded valuation parameters ({len(valuation_params)} characters)\n")
 
         # Step 3: Initialize agents
@@ -109,6 +121,7 @@ class FinancialAnalysisOrchestrator:
         print("STEP 5: Executing Analysis Workflow")
         print("-" * 80)
         print("This may take 10-15 minutes depending on document complexity...\n")
+        self.model_lifecycle.begin(STAGE_ANALYSIS)
 
         # Execute the workflow sequentially
         results = []
@@ -120,6 +133,17 @@ class FinancialAnalysisOrchestrator:
             task_input = task["input"]
             if "{context_placeholder}" in task_input:
                 task_input = task_input.replace("{context_placeholder}", context)
+            # Documents are materialized for one task at a time, from the lazy store views
+            if DOCUMENTS_PLACEHOLDER in task_input:
+                task_input = task_input.replace(
+                    DOCUMENTS_PLACEHOLDER, self.tasks_factory.format_documents(task["documents"])
+                )
+            # Ollama silently drops the start of a prompt that overflows the context window
+            budget = self.agents_factory.model_info.prompt_budget_chars()
+            if len(task_input) > budget:
+                print(f"  Warning: Task input ({len(task_input):,} characters) exceeds the analysis "
+                      f"model's context window ({self.agents_factory.model_info.context_window} tokens, "
+                      f"~{budget:,} characters); the start of the input will be truncated")
             
             try:
                 # Invoke the agent (simple LLMChain now, not AgentExecutor)
@@ -144,6 +168,12 @@ class FinancialAnalysisOrchestrator:
                 print()
 
         final_result = "\n\n".join(results)
+        self.model_lifecycle.finish(STAGE_ANALYSIS)
+
+        # The report only needs the filenames; release the stored documents' memory maps
+        for document in extracted_docs.values():
+            if isinstance(document, StoredDocument):
+                document.close()
         print("\n✓ Analysis workflow completed\n")
 
         # Step 6: Generate final report
@@ -158,7 +188,20 @@ class FinancialAnalysisOrchestrator:
         """Generate the final formatted investment report"""
 
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        doc_list = "\n".join([f"  - {filename}" for filename in extracted_docs.keys()])
+        doc_lines = []
+        stats_by_filename = {stats["document"]: stats for stats in self.vision_extractor.document_stats.values()}
+        for filename in extracted_docs.keys():
+            stats = stats_by_filename.get(filename)
+            if stats:
+                revision = ""
+                if stats.get("revision"):
+                    revision = (f", revision of {stats['revision']['previous']}: reprocessed pages "
+                                f"{format_page_ranges(stats['revision']['reprocessed']) or 'none'}")
+                doc_lines.append(f"  - {filename} ({stats['total_pages']} pages, "
+                                 f"{stats.get('deduplicated', 0)} deduplicated{revision})")
+            else:
+                doc_lines.append(f"  - {filename}")
+        doc_list = "\n".join(doc_lines)
 
         report = f"""
 {'='*80}
@@ -286,9 +329,20 @@ def main():
         print("ANALYSIS COMPLETE!")
         print(f"{'='*80}")
         print(f"\n✓ Report saved to: {output_file}")
+
+        # Structured records (VISION_OUTPUT_FORMAT=json) are saved next to the report
+        document_records = orchestrator.vision_extractor.document_records
+        if document_records:
+            records_file = output_file.replace("investment_report_", "extracted_records_")[:-4] + ".json"
+            with open(records_file, 'w', encoding='utf-8') as f:
+                json.dump(document_records, f, indent=2, ensure_ascii=False)
+            print(f"✓ Structured records saved to: {records_file}")
         print(f"\nTo view the report:")
         print(f"  cat {output_file}")
         print()
+        
+        get_client().print_statistics()
+        orchestrator.model_lifecycle.print_statistics()
 
         # Also print to console
         print("\n" + "="*80)
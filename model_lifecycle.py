@@ -0,0 +1,225 @@
+"""
+Model Lifecycle
+Pre-loads the vision, embedding and analysis models concurrently at
+startup, sets keep_alive per stage, unloads models once their stage is
+finished and reports model loading time separately from inference
+"""
+
+import os
+import time
+import threading
+from typing import Optional
+
+import requests
+
+from ollama_client import get_client
+from model_registry import get_registry
+from file_utils import env_flag
+
+STAGE_VISION = "vision"
+STAGE_EMBEDDING = "embedding"
+STAGE_ANALYSIS = "analysis"
+
+# Stage -> (model env var, default model, default keep_alive)
+STAGE_MODELS = {
+    STAGE_VISION: ('VISION_MODEL', 'llama3.2-vision:11b', '30m'),
+    STAGE_EMBEDDING: ('EMBEDDING_MODEL', 'nomic-embed-text', '10m'),
+    STAGE_ANALYSIS: ('ANALYSIS_MODEL', 'llama3.1:8b', '30m'),
+}
+
+
+class ModelLifecycle:
+    """
+    Loads each stage's model ahead of its first request, keeps it loaded
+    for the stage's keep_alive and unloads it when the stage is finished,
+    unless a stage still to run uses the same model.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, enabled: Optional[bool] = None,
+                 unload: Optional[bool] = None):
+        """
+        Initialize the model lifecycle manager
+
+        Args:
+            base_url: Ollama base URL (default: from env)
+            enabled: Whether models are pre-loaded at startup (default: from env or True)
+            unload: Whether a model is unloaded when its stage is finished (default: from env or True)
+        """
+
+        if enabled is None:
+            enabled = env_flag('MODEL_WARMUP', 'true')
+        if unload is None:
+            unload = env_flag('MODEL_UNLOAD_AFTER_STAGE', 'true')
+        self.enabled = enabled
+        self.unload = unload
+        self.base_url = base_url
+        self.client = get_client(base_url)
+
+        self.models = {stage: os.getenv(env, default) for stage, (env, default, _) in STAGE_MODELS.items()}
+        self.keep_alive = {
+            stage: os.getenv(f'MODEL_KEEP_ALIVE_{stage.upper()}', keep_alive)
+            for stage, (_, _, keep_alive) in STAGE_MODELS.items()
+        }
+        # Stages to pre-load at startup (drop one when all three do not fit in VRAM together)
+        self.warmup_stages = [
+            stage.strip() for stage in os.getenv('MODEL_WARMUP_STAGES', ','.join(STAGE_MODELS)).split(',')
+            if stage.strip() in STAGE_MODELS
+        ]
+
+        self._lock = threading.Lock()
+        self._loads = {}      # model -> {"thread", "seconds", "load_seconds", "error"}
+        self._finished = set()
+        self._unloaded = {}   # model -> stage after which it was unloaded
+
+    def _is_embedding(self, model: str) -> bool:
+        """Whether a model is loaded through /api/embed (registry capabilities, else its stage)"""
+
+        try:
+            if get_registry(self.base_url).get(model).embedding:
+                return True
+        except requests.exceptions.RequestException:
+            pass
+        return model == self.models[STAGE_EMBEDDING]
+
+    def _load(self, model: str, keep_alive):
+        """Load one model and record how long it took (runs in a warm-up thread)"""
+
+        entry = self._loads[model]
+        start = time.perf_counter()
+        try:
+            result = self.client.load_model(model, keep_alive, embedding=self._is_embedding(model))
+            entry["load_seconds"] = (result.get("load_duration", 0) or 0) / 1e9
+        except requests.exceptions.RequestException as e:
+            entry["error"] = str(e)
+        entry["seconds"] = time.perf_counter() - start
+
+    def warm_up(self):
+        """Start loading the models of all warm-up stages concurrently, without waiting"""
+
+        if not self.enabled:
+            return
+
+        print(f"  Pre-loading models: " + ", ".join(
+            f"{self.models[stage]} ({stage})" for stage in self.warmup_stages
+        ))
+        with self._lock:
+            for stage in self.warmup_stages:
+                model = self.models[stage]
+                if model in self._loads:
+                    continue
+                self.client.set_keep_alive(model, self.keep_alive[stage])
+                self._loads[model] = {"seconds": None, "load_seconds": 0.0, "error": None}
+                thread = threading.Thread(target=self._load, args=(model, self.keep_alive[stage]), daemon=True)
+                self._loads[model]["thread"] = thread
+                thread.start()
+
+    def begin(self, stage: str):
+        """
+        Start a stage: apply its keep_alive and wait for its model's warm-up,
+        so loading is not counted as the first request's inference time
+
+        Args:
+            stage: Stage name (vision, embedding or analysis)
+        """
+
+        model = self.models[stage]
+        self.client.set_keep_alive(model, self.keep_alive[stage])
+        with self._lock:
+            entry = self._loads.get(model)
+        if entry is None:
+            return
+
+        entry["thread"].join()
+        if entry["error"]:
+            print(f"  Warning: Pre-loading {model} failed: {entry['error']}")
+        else:
+            print(f"  Model {model} ready for {stage} (loaded in {entry['seconds']:.1f}s)")
+
+    def finish(self, stage: str):
+        """
+        Finish a stage and unload its model unless a later stage still needs it
+
+        Args:
+            stage: Stage name (vision, embedding or analysis)
+        """
+
+        model = self.models[stage]
+        with self._lock:
+            self._finished.add(stage)
+            needed = any(other not in self._finished and self.models[other] == model for other in STAGE_MODELS)
+        if not self.unload or needed:
+            return
+
+        entry = self._loads.get(model)
+        if entry is not None:
+            entry["thread"].join()
+        try:
+            self.client.unload_model(model, embedding=self._is_embedding(model))
+            self._unloaded[model] = stage
+            print(f"  Unloaded {model} after the {stage} stage")
+        except requests.exceptions.RequestException as e:
+            print(f"  Warning: Could not unload {model}: {e}")
+
+    def _call_statistics(self) -> dict:
+        """Per-model call seconds and server-side load seconds, summed over endpoints and backends"""
+
+        stats = self.client.get_statistics()
+        if hasattr(self.client, "backends"):
+            per_client = [state["calls"] for state in stats.values()]
+        else:
+            per_client = [stats]
+
+        totals = {}
+        for client_stats in per_client:
+            for name, entry in client_stats.items():
+                endpoint, _, model = name.partition(" ")
+                if endpoint not in ("generate", "embed"):
+                    continue
+                total = totals.setdefault(model, {"seconds": 0.0, "load_seconds": 0.0})
+                total["seconds"] += entry["seconds"]
+                total["load_seconds"] += entry["load_seconds"]
+        return totals
+
+    def get_statistics(self) -> dict:
+        """
+        Get loading and inference time per model
+
+        Returns:
+            Dictionary keyed by model with its stages, warm-up seconds, seconds
+            spent loading during requests, inference seconds and the stage
+            after which it was unloaded
+        """
+
+        calls = self._call_statistics()
+        stats = {}
+        for stage, model in self.models.items():
+            if model in stats:
+                stats[model]["stages"].append(stage)
+                continue
+            entry = self._loads.get(model, {})
+            call = calls.get(model, {"seconds": 0.0, "load_seconds": 0.0})
+            stats[model] = {
+                "stages": [stage],
+                "warmup_seconds": entry.get("seconds"),
+                "warmup_error": entry.get("error"),
+                "request_load_seconds": call["load_seconds"],
+                "inference_seconds": max(0.0, call["seconds"] - call["load_seconds"]),
+                "unloaded_after": self._unloaded.get(model)
+            }
+        return stats
+
+    def print_statistics(self):
+        """Print model loading versus inference time"""
+
+        print("  Model lifecycle:")
+        for model, entry in self.get_statistics().items():
+            if entry["warmup_error"]:
+                warmup = "pre-load failed"
+            elif entry["warmup_seconds"] is not None:
+                warmup = f"pre-loaded in {entry['warmup_seconds']:.1f}s"
+            else:
+                warmup = "not pre-loaded"
+            print(f"    {model} ({', '.join(entry['stages'])}): {warmup}, "
+                  f"{entry['request_load_seconds']:.1f}s loading during requests, "
+                  f"{entry['inference_seconds']:.1f}s inference"
+                  + (f", unloaded after {entry['unloaded_after']}" if entry['unloaded_after'] else ""))
@@ -0,0 +1,208 @@
+"""
+Model Registry
+Capabilities of the installed Ollama models (vision support, context
+length, parameter size, quantization), read once from /api/tags and
+/api/show and shared by every component
+"""
+
+import os
+import re
+import threading
+from typing import Optional
+
+import requests
+
+from ollama_client import get_client
+from backend_pool import model_matches
+
+# Rough characters per token for prompt budgeting; figures and table text
+# tokenize densely, so this errs on the short side
+CHARS_PER_TOKEN = 3
+
+# Ollama's context window when neither the model nor the server sets num_ctx
+DEFAULT_NUM_CTX = 4096
+
+# Last resort when /api/show is unavailable (servers without 'capabilities')
+VISION_NAME_HINTS = ('vision', 'llava', 'vl', 'minicpm-v', 'moondream', 'bakllava')
+
+
+def _parse_parameter_size(value: str) -> Optional[float]:
+    """Parameter count in billions from Ollama's parameter_size ('7.6B', '494.03M')"""
+
+    match = re.match(r"\s*([\d.]+)\s*([KMBT])", value or "", re.IGNORECASE)
+    if not match:
+        return None
+    scale = {"K": 1e-6, "M": 1e-3, "B": 1.0, "T": 1e3}[match.group(2).upper()]
+    return float(match.group(1)) * scale
+
+
+class ModelInfo:
+    """What one installed model can do"""
+
+    def __init__(self, name: str, tags_entry: Optional[dict] = None, show: Optional[dict] = None):
+        """
+        Build model info from Ollama's responses
+
+        Args:
+            name: Model name as requested
+            tags_entry: The model's entry from /api/tags (None: not installed)
+            show: The /api/show response (None: not available)
+        """
+
+        self.name = name
+        self.installed = tags_entry is not None
+        show = show or {}
+        details = dict((tags_entry or {}).get("details") or {}, **(show.get("details") or {}))
+        model_info = show.get("model_info") or {}
+
+        self.family = details.get("family", "")
+        self.parameter_size = details.get("parameter_size", "")
+        self.parameter_count = _parse_parameter_size(self.parameter_size)
+        self.quantization = details.get("quantization_level", "")
+
+        self.capabilities = list(show.get("capabilities") or [])
+        if self.capabilities:
+            self.vision = "vision" in self.capabilities
+            self.embedding = "embedding" in self.capabilities
+        else:
+            # Older servers: a vision tower shows up in the metadata (or a CLIP projector)
+            families = [family.lower() for family in details.get("families") or []]
+            self.vision = (
+                any(".vision." in key for key in model_info)
+                or bool(show.get("projector_info"))
+                or "clip" in families or "mllama" in families
+                or (not show and any(hint in name.lower() for hint in VISION_NAME_HINTS))
+            )
+            self.embedding = any(key.endswith(".pooling_type") for key in model_info)
+
+        architecture = model_info.get("general.architecture", "")
+        self.context_length = model_info.get(f"{architecture}.context_length")
+
+        # The window Ollama actually allocates: the model's num_ctx parameter,
+        # else the server default, never more than the model was trained for
+        num_ctx = re.search(r"^num_ctx\s+(\d+)", show.get("parameters") or "", re.MULTILINE)
+        context_window = int(num_ctx.group(1)) if num_ctx else int(
+            os.getenv('OLLAMA_CONTEXT_LENGTH', str(DEFAULT_NUM_CTX))
+        )
+        self.context_window = min(context_window, self.context_length) if self.context_length else context_window
+
+    def prompt_budget_chars(self, reserve_tokens: int = 1024) -> int:
+        """
+        Characters of prompt that fit the context window
+
+        Args:
+            reserve_tokens: Tokens kept free for the response
+
+        Returns:
+            Approximate prompt size in characters
+        """
+
+        return max(0, self.context_window - reserve_tokens) * CHARS_PER_TOKEN
+
+    def default_parallel(self) -> int:
+        """Parallel requests a server can usually hold for this model (when OLLAMA_NUM_PARALLEL is unset)"""
+
+        if self.parameter_count is not None and self.parameter_count < 10:
+            return 2
+        return 1
+
+    def describe(self) -> str:
+        """One-line summary for startup output"""
+
+        parts = [part for part in (self.parameter_size, self.quantization) if part]
+        parts.append(f"context {self.context_window}"
+                     + (f" of {self.context_length}" if self.context_length and self.context_length != self.context_window else ""))
+        kinds = [kind for kind, present in (("vision", self.vision), ("embedding", self.embedding)) if present]
+        if kinds:
+            parts.append("+".join(kinds))
+        return ", ".join(parts)
+
+
+class ModelRegistry:
+    """
+    Cached model information for one Ollama server (or backend pool): the
+    model list is fetched once, and /api/show once per model asked about.
+    """
+
+    def __init__(self, base_url: Optional[str] = None):
+        """
+        Initialize the model registry
+
+        Args:
+            base_url: Ollama base URL (default: from env)
+        """
+
+        self.client = get_client(base_url)
+        self._lock = threading.Lock()
+        self._models = {}  # requested name -> ModelInfo
+
+    def _tags_entry(self, model_name: str) -> Optional[dict]:
+        for entry in self.client.list_models():
+            if model_matches(model_name, entry.get("name", "")):
+                return entry
+        return None
+
+    def get(self, model_name: str) -> ModelInfo:
+        """
+        Information about a model
+
+        Args:
+            model_name: Model name
+
+        Returns:
+            ModelInfo (installed is False if the server does not have it)
+
+        Raises:
+            requests.exceptions.RequestException: If the model list cannot be fetched
+        """
+
+        with self._lock:
+            info = self._models.get(model_name)
+        if info is not None:
+            return info
+
+        tags_entry = self._tags_entry(model_name)
+        show = None
+        if tags_entry is not None:
+            try:
+                show = self.client.show(tags_entry.get("name", model_name))
+            except requests.exceptions.RequestException as e:
+                print(f"  Warning: /api/show failed for {model_name}, guessing capabilities from the name: {e}")
+        info = ModelInfo(model_name, tags_entry, show)
+
+        with self._lock:
+            return self._models.setdefault(model_name, info)
+
+    def has_model(self, model_name: str) -> bool:
+        """Whether a model is installed"""
+        return self.get(model_name).installed
+
+    def refresh(self):
+        """Forget cached information (e.g. after pulling a model)"""
+
+        self.client.list_models(refresh=True)
+        with self._lock:
+            self._models.clear()
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(base_url: Optional[str] = None) -> ModelRegistry:
+    """
+    Get the shared model registry for a base URL
+
+    Args:
+        base_url: Ollama base URL (default: from env or http://localhost:11434)
+
+    Returns:
+        The process-wide ModelRegistry for that URL
+    """
+
+    client = get_client(base_url)
+    with _registries_lock:
+        registry = _registries.get(client.base_url)
+        if registry is None:
+            registry = _registries[client.base_url] = ModelRegistry(base_url)
+        return registry
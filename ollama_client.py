@@ -0,0 +1,688 @@
+"""
+Ollama Client
+Shared client for the Ollama HTTP API: pooled connections, a global
+concurrency limit, retries with backoff, streaming with stall detection,
+and per-call timing/token statistics
+"""
+
+import os
+import json
+import time
+import socket
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Any, Callable, List, Optional
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+
+# HTTP statuses worth retrying: overloaded or restarting server
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class OllamaStallError(RuntimeError):
+    """Raised when a streaming generation stops producing tokens"""
+
+    def __init__(self, message: str, partial_response: str = ""):
+        super().__init__(message)
+        self.partial_response = partial_response
+
+
+class OllamaCancelledError(RuntimeError):
+    """Raised when a streaming generation is cancelled by its caller"""
+
+
+def _abort_response(response: requests.Response):
+    """Interrupt a response that another thread may be blocked reading from"""
+
+    try:
+        # urllib3 keeps the socket on its connection; shutting it down
+        # wakes up a recv() that close() alone would leave blocked
+        sock = response.raw._connection.sock
+        sock.shutdown(socket.SHUT_RDWR)
+    except (AttributeError, OSError):
+        pass
+    response.close()
+
+
+class OllamaClient:
+    """
+    Single entry point for all Ollama traffic. One instance is shared per
+    base URL (see get_client) so every component reuses the same keep-alive
+    connections and counts against the same concurrency limit.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, max_concurrency: Optional[int] = None,
+                 max_retries: Optional[int] = None, retry_backoff: Optional[float] = None):
+        """
+        Initialize the Ollama client
+
+        Args:
+            base_url: Ollama base URL (default: from env or http://localhost:11434)
+            max_concurrency: Maximum requests in flight across the process (default: from env or 8)
+            max_retries: Retries for connection errors and 429/5xx responses (default: from env or 3)
+            retry_backoff: Initial backoff in seconds, doubled per retry (default: from env or 1.0)
+        """
+
+        self.base_url = (base_url or os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')).rstrip('/')
+        self.max_concurrency = max(1, max_concurrency or int(os.getenv('OLLAMA_MAX_CONCURRENCY', '8')))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('OLLAMA_MAX_RETRIES', '3'))
+        self.retry_backoff = retry_backoff or float(os.getenv('OLLAMA_RETRY_BACKOFF', '1.0'))
+
+        # Pool sized so every permitted concurrent request keeps its connection alive
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_concurrency + 4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+        self._models = None
+        self._keep_alive = {}  # model -> keep_alive sent with every request for it
+
+    # Statistics
+
+    def _record(self, endpoint: str, model: str, seconds: float, result: Optional[dict] = None,
+                retries: int = 0, error: bool = False):
+        """Accumulate timing and token counts for one call"""
+
+        result = result or {}
+        with self._stats_lock:
+            entry = self._stats.setdefault((endpoint, model), {
+                "calls": 0, "errors": 0, "retries": 0, "seconds": 0.0,
+                "prompt_eval_count": 0, "eval_count": 0,
+                "load_seconds": 0.0, "prompt_eval_seconds": 0.0, "eval_seconds": 0.0
+            })
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["retries"] += retries
+            entry["seconds"] += seconds
+            entry["prompt_eval_count"] += result.get("prompt_eval_count", 0) or 0
+            entry["eval_count"] += result.get("eval_count", 0) or 0
+            entry["load_seconds"] += (result.get("load_duration", 0) or 0) / 1e9
+            entry["prompt_eval_seconds"] += (result.get("prompt_eval_duration", 0) or 0) / 1e9
+            entry["eval_seconds"] += (result.get("eval_duration", 0) or 0) / 1e9
+
+    def get_statistics(self) -> dict:
+        """
+        Get per-endpoint, per-model call statistics
+
+        Returns:
+            Dictionary keyed by 'endpoint model' with call counts, timings and token counts
+        """
+
+        with self._stats_lock:
+            stats = {}
+            for (endpoint, model), entry in sorted(self._stats.items()):
+                entry = dict(entry)
+                entry["tokens_per_second"] = (
+                    entry["eval_count"] / entry["eval_seconds"] if entry["eval_seconds"] else 0.0
+                )
+                stats[f"{endpoint} {model}".strip()] = entry
+            return stats
+
+    def print_statistics(self):
+        """Print a short usage summary"""
+
+        stats = self.get_statistics()
+        if not stats:
+            return
+        print(f"  Ollama usage ({self.base_url}):")
+        for name, entry in stats.items():
+            print(f"    {name}: {entry['calls']} calls, {entry['seconds']:.1f}s, "
+                  f"{entry['prompt_eval_count']} prompt / {entry['eval_count']} output tokens"
+                  + (f", {entry['tokens_per_second']:.1f} tok/s" if entry['tokens_per_second'] else "")
+                  + (f", {entry['load_seconds']:.1f}s loading" if entry['load_seconds'] else "")
+                  + (f", {entry['retries']} retries" if entry['retries'] else "")
+                  + (f", {entry['errors']} errors" if entry['errors'] else ""))
+
+    # Transport
+
+    def _request(self, method: str, path: str, timeout=None, **kwargs) -> tuple:
+        """
+        Issue a request with retries on connection errors and retryable statuses
+
+        Returns:
+            Tuple of (response, retries used)
+        """
+
+        url = f"{self.base_url}{path}"
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+                if response.status_code not in RETRYABLE_STATUSES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response, attempt
+                response.close()
+            except (requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout):
+                if attempt == self.max_retries:
+                    raise
+            time.sleep(delay)
+            delay *= 2
+
+    def set_keep_alive(self, model: str, keep_alive):
+        """
+        Set how long Ollama keeps a model loaded after each request for it
+
+        Args:
+            model: Model name
+            keep_alive: Duration such as '30m' or seconds (None: server default)
+        """
+
+        with self._stats_lock:
+            if keep_alive is None:
+                self._keep_alive.pop(model, None)
+            else:
+                self._keep_alive[model] = keep_alive
+
+    def _with_keep_alive(self, payload: dict) -> dict:
+        """Add the model's keep_alive to a request body that does not set one"""
+
+        keep_alive = self._keep_alive.get(payload.get("model"))
+        if keep_alive is None or "keep_alive" in payload:
+            return payload
+        return dict(payload, keep_alive=keep_alive)
+
+    # API
+
+    def list_models(self, refresh: bool = False) -> list:
+        """
+        List models installed on the server (cached after the first call)
+
+        Args:
+            refresh: Fetch the list again instead of using the cache
+
+        Returns:
+            List of model entries from /api/tags
+        """
+
+        if self._models is None or refresh:
+            start = time.perf_counter()
+            response, retries = self._request("GET", "/api/tags", timeout=30)
+            self._models = response.json().get("models", [])
+            self._record("tags", "", time.perf_counter() - start, retries=retries)
+        return self._models
+
+    def has_model(self, model_name: str) -> bool:
+        """Check whether a model is installed on the server"""
+        return any(model.get("name") == model_name for model in self.list_models())
+
+    def show(self, model_name: str) -> dict:
+        """
+        Get model details from /api/show
+
+        Args:
+            model_name: Name of the model
+
+        Returns:
+            Model details dictionary
+        """
+
+        start = time.perf_counter()
+        response, retries = self._request("POST", "/api/show", json={"model": model_name}, timeout=30)
+        self._record("show", model_name, time.perf_counter() - start, retries=retries)
+        return response.json()
+
+    def generate(self, payload: dict, timeout: float = 300) -> dict:
+        """
+        Run a non-streaming /api/generate call
+
+        Args:
+            payload: Request body for /api/generate ('stream' is forced off)
+            timeout: Read timeout in seconds
+
+        Returns:
+            Ollama's response dictionary (including 'response' and token statistics)
+        """
+
+        payload = self._with_keep_alive(dict(payload, stream=False))
+        start = time.perf_counter()
+        with self._semaphore:
+            try:
+                response, retries = self._request("POST", "/api/generate", json=payload,
+                                                  timeout=(10, timeout))
+                result = response.json()
+            except requests.exceptions.RequestException:
+                self._record("generate", payload.get("model", ""), time.perf_counter() - start, error=True)
+                raise
+        self._record("generate", payload.get("model", ""), time.perf_counter() - start, result, retries)
+        return result
+
+    def stream_generate(self, payload: dict,
+                        stall_timeout: Optional[float] = None,
+                        first_token_timeout: Optional[float] = None,
+                        max_output_chars: Optional[int] = None,
+                        stop_markers: Optional[List[str]] = None,
+                        on_token: Optional[Callable[[str], None]] = None,
+                        cancel: Optional[threading.Event] = None) -> dict:
+        """
+        Run /api/generate in streaming mode, consuming the NDJSON stream incrementally
+
+        Stalls are detected from the gap between tokens rather than total time:
+        the first token may take up to first_token_timeout (model load and prompt
+        evaluation), every later token must arrive within stall_timeout.
+
+        Args:
+            payload: Request body for /api/generate ('stream' is forced on)
+            stall_timeout: Maximum seconds between tokens (default: from env or 60)
+            first_token_timeout: Maximum seconds until the first token (default: from env or 300)
+            max_output_chars: Stop once this many characters were generated (default: no limit)
+            stop_markers: Stop once any of these strings appears in the output
+            on_token: Called with each token as it arrives
+            cancel: Setting this event abandons the generation (e.g. a hedged
+                request whose duplicate answered first)
+
+        Returns:
+            Dictionary with 'response', 'done', 'stop_reason' and Ollama's final statistics
+
+        Raises:
+            OllamaStallError: If the stream stalls (the partial output is attached)
+            OllamaCancelledError: If the cancel event was set before the generation finished
+            requests.exceptions.RequestException: On connection or HTTP errors
+        """
+
+        stall_timeout = stall_timeout or float(os.getenv('OLLAMA_STALL_TIMEOUT', '60'))
+        first_token_timeout = first_token_timeout or float(os.getenv('OLLAMA_FIRST_TOKEN_TIMEOUT', '300'))
+        stop_markers = [marker for marker in (stop_markers or []) if marker]
+        model = payload.get("model", "")
+
+        cancel = cancel or threading.Event()
+
+        start = time.perf_counter()
+        with self._semaphore:
+            if cancel.is_set():
+                raise OllamaCancelledError("Generation cancelled before it started")
+            try:
+                result = self._consume_stream(
+                    self._with_keep_alive(dict(payload, stream=True)), stall_timeout, first_token_timeout,
+                    max_output_chars, stop_markers, on_token, cancel
+                )
+            except (requests.exceptions.RequestException, OllamaStallError):
+                self._record("generate", model, time.perf_counter() - start, error=True)
+                raise
+            except OllamaCancelledError:
+                self._record("generate", model, time.perf_counter() - start)
+                raise
+        self._record("generate", model, time.perf_counter() - start, result, result.pop("retries", 0))
+        return result
+
+    def _consume_stream(self, payload: dict, stall_timeout: float, first_token_timeout: float,
+                        max_output_chars: Optional[int], stop_markers: List[str],
+                        on_token: Optional[Callable[[str], None]], cancel: threading.Event) -> dict:
+        """Read one streaming generation to completion, stall, cancellation or early stop"""
+
+        try:
+            response, retries = self._request("POST", "/api/generate", json=payload, stream=True,
+                                              timeout=(10, first_token_timeout))
+        except requests.exceptions.ReadTimeout as e:
+            raise OllamaStallError(f"No response within {first_token_timeout:.0f}s") from e
+
+        # Watchdog aborts the connection when no token arrives in time or the
+        # caller cancels; aborting makes the blocked read below fail immediately
+        state = {"last_token": time.monotonic(), "tokens": 0, "stalled": False, "cancelled": False,
+                 "finished": False}
+
+        def watchdog():
+            while not state["finished"]:
+                limit = stall_timeout if state["tokens"] else first_token_timeout
+                if time.monotonic() - state["last_token"] > limit:
+                    state["stalled"] = True
+                    _abort_response(response)
+                    return
+                if cancel.wait(min(1.0, limit / 4)) and not state["finished"]:
+                    state["cancelled"] = True
+                    _abort_response(response)
+                    return
+
+        threading.Thread(target=watchdog, daemon=True).start()
+
+        parts = []
+        output_chars = 0
+        result = {"response": "", "done": False, "stop_reason": None, "retries": retries}
+
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise requests.exceptions.RequestException(chunk["error"])
+
+                token = chunk.get("response", "")
+                state["last_token"] = time.monotonic()
+                state["tokens"] += 1
+
+                if token:
+                    parts.append(token)
+                    output_chars += len(token)
+                    if on_token:
+                        on_token(token)
+
+                if chunk.get("done"):
+                    result.update({key: value for key, value in chunk.items() if key != "response"})
+                    result["stop_reason"] = chunk.get("done_reason", "stop")
+                    break
+
+                # Early stop: closing the stream makes Ollama cancel the generation
+                if max_output_chars and output_chars >= max_output_chars:
+                    result["stop_reason"] = "max_output_chars"
+                    break
+                if stop_markers:
+                    tail = "".join(parts[-8:])
+                    if any(marker in tail for marker in stop_markers):
+                        result["stop_reason"] = "stop_marker"
+                        break
+        except (requests.exceptions.RequestException, ValueError, AttributeError) as e:
+            if state["cancelled"]:
+                raise OllamaCancelledError(f"Generation cancelled after {state['tokens']} tokens") from e
+            # A read timeout mid-stream is a stall too (the watchdog may not have fired yet)
+            if not (state["stalled"] or "timed out" in str(e).lower()):
+                raise
+            raise OllamaStallError(
+                f"Generation stalled after {state['tokens']} tokens "
+                f"(no token for {stall_timeout if state['tokens'] else first_token_timeout:.0f}s)",
+                partial_response="".join(parts)
+            ) from e
+        finally:
+            state["finished"] = True
+            response.close()
+
+        if state["cancelled"] and result["stop_reason"] is None:
+            # An aborted stream can also just end without a read error
+            raise OllamaCancelledError(f"Generation cancelled after {state['tokens']} tokens")
+
+        result["response"] = "".join(parts)
+        return result
+
+    def embed(self, model: str, texts: List[str], timeout: float = 120) -> List[List[float]]:
+        """
+        Embed texts with /api/embed
+
+        Args:
+            model: Embedding model name
+            texts: Texts to embed
+            timeout: Read timeout in seconds
+
+        Returns:
+            One embedding vector per input text
+        """
+
+        start = time.perf_counter()
+        with self._semaphore:
+            try:
+                response, retries = self._request("POST", "/api/embed",
+                                                  json=self._with_keep_alive({"model": model, "input": texts}),
+                                                  timeout=(10, timeout))
+                result = response.json()
+            except requests.exceptions.RequestException:
+                self._record("embed", model, time.perf_counter() - start, error=True)
+                raise
+        self._record("embed", model, time.perf_counter() - start, result, retries)
+        return result.get("embeddings", [])
+
+    def load_model(self, model: str, keep_alive=None, embedding: bool = False,
+                   timeout: float = 600) -> dict:
+        """
+        Load a model into memory without running inference
+
+        Args:
+            model: Model name
+            keep_alive: How long to keep it loaded (default: the model's keep_alive, if set)
+            embedding: Whether it is an embedding model (loaded through /api/embed)
+            timeout: Read timeout in seconds
+
+        Returns:
+            Ollama's response; 'load_duration' is the time the server spent loading
+        """
+
+        payload = {"model": model}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        # An empty generate request only loads the model; embedding models
+        # need one (tiny) embedding instead
+        path = "/api/embed" if embedding else "/api/generate"
+        if embedding:
+            payload["input"] = ["warm-up"]
+        else:
+            payload["stream"] = False
+
+        start = time.perf_counter()
+        try:
+            response, retries = self._request("POST", path, json=self._with_keep_alive(payload),
+                                              timeout=(10, timeout))
+            result = response.json()
+        except requests.exceptions.RequestException:
+            self._record("load", model, time.perf_counter() - start, error=True)
+            raise
+        self._record("load", model, time.perf_counter() - start, result, retries)
+        return result
+
+    def unload_model(self, model: str, embedding: bool = False):
+        """
+        Unload a model from memory (keep_alive 0)
+
+        Args:
+            model: Model name
+            embedding: Whether it is an embedding model
+        """
+
+        payload = {"model": model, "keep_alive": 0}
+        if embedding:
+            payload["input"] = []
+            path = "/api/embed"
+        else:
+            payload["stream"] = False
+            path = "/api/generate"
+
+        start = time.perf_counter()
+        try:
+            response, retries = self._request("POST", path, json=payload, timeout=(10, 60))
+            response.close()
+        except requests.exceptions.RequestException:
+            self._record("unload", model, time.perf_counter() - start, error=True)
+            raise
+        self._record("unload", model, time.perf_counter() - start, retries=retries)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url: Optional[str] = None) -> OllamaClient:
+    """
+    Get the shared client for a base URL
+
+    With several servers configured (OLLAMA_BASE_URLS, or a comma-separated
+    base_url) this is a BackendPool, which has the same interface.
+
+    Args:
+        base_url: Ollama base URL (default: from env or http://localhost:11434)
+
+    Returns:
+        The process-wide OllamaClient (or BackendPool) for that URL
+    """
+
+    from backend_pool import BackendPool, backend_urls
+
+    urls = backend_urls(base_url)
+    key = ",".join(urls)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = OllamaClient(urls[0]) if len(urls) == 1 else BackendPool(urls)
+        return _clients[key]
+
+
+def stream_generate(base_url: str, payload: dict, **kwargs) -> dict:
+    """
+    Streaming /api/generate through the shared client for base_url
+
+    Args:
+        base_url: Ollama base URL
+        payload: Request body for /api/generate
+        **kwargs: Passed to OllamaClient.stream_generate
+
+    Returns:
+        Dictionary with 'response', 'done', 'stop_reason' and Ollama's final statistics
+    """
+
+    return get_client(base_url).stream_generate(payload, **kwargs)
+
+
+class OllamaClientLLM(LLM):
+    """
+    LangChain LLM that goes through the shared OllamaClient. Streaming mode
+    adds stall detection and can show output while it is being generated.
+    """
+
+    model: str
+    base_url: str = "http://localhost:11434"
+    temperature: float = 0.1
+    streaming: bool = True
+    stall_timeout: Optional[float] = None
+    first_token_timeout: Optional[float] = None
+    max_output_chars: Optional[int] = None
+    stream_to_stdout: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "ollama-client"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": self.model, "base_url": self.base_url, "temperature": self.temperature}
+
+    def _payload(self, prompt: str, stop: Optional[List[str]]) -> dict:
+        options = {"temperature": self.temperature}
+        if stop:
+            options["stop"] = stop
+        return {"model": self.model, "prompt": prompt, "options": options}
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None,
+              **kwargs: Any) -> str:
+        client = get_client(self.base_url)
+
+        if not self.streaming:
+            return client.generate(self._payload(prompt, stop)).get("response", "")
+
+        def on_token(token: str):
+            if self.stream_to_stdout:
+                print(token, end="", flush=True)
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+
+        try:
+            result = client.stream_generate(
+                self._payload(prompt, stop),
+                stall_timeout=self.stall_timeout,
+                first_token_timeout=self.first_token_timeout,
+                max_output_chars=self.max_output_chars,
+                stop_markers=stop,
+                on_token=on_token
+            )
+        finally:
+            if self.stream_to_stdout:
+                print()
+
+        return result["response"]
+
+
+class OllamaClientEmbeddings(Embeddings):
+    """
+    LangChain embeddings that go through the shared OllamaClient. Texts are
+    sent to /api/embed in batches, with several batches in flight at once;
+    with an embedding cache only chunks it does not hold are sent.
+    """
+
+    def __init__(self, model: str, base_url: Optional[str] = None,
+                 batch_size: Optional[int] = None, max_concurrency: Optional[int] = None,
+                 cache=None):
+        """
+        Initialize the embeddings
+
+        Args:
+            model: Embedding model name
+            base_url: Ollama base URL (default: from env or http://localhost:11434)
+            batch_size: Texts per /api/embed request (default: from env or 32)
+            max_concurrency: Batches in flight at once (default: from env or 4)
+            cache: EmbeddingCache consulted before calling Ollama (default: none)
+        """
+
+        self.model = model
+        self.base_url = base_url
+        self.batch_size = max(1, batch_size or int(os.getenv('EMBED_BATCH_SIZE', '32')))
+        self.max_concurrency = max(1, max_concurrency or int(os.getenv('EMBED_MAX_CONCURRENCY', '4')))
+        self.cache = cache
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"texts": 0, "cached": 0, "requests": 0, "seconds": 0.0}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        start = time.perf_counter()
+        vectors = self.cache.get_many(self.model, texts) if self.cache else [None] * len(texts)
+        # Each distinct uncached text is embedded once
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+
+        embedded, requests_sent = self._embed(missing) if missing else ([], 0)
+        if self.cache and missing:
+            self.cache.put_many(self.model, missing, embedded)
+        by_text = dict(zip(missing, embedded))
+
+        with self._stats_lock:
+            self._stats["texts"] += len(texts)
+            self._stats["cached"] += len(texts) - sum(vector is None for vector in vectors)
+            self._stats["requests"] += requests_sent
+            self._stats["seconds"] += time.perf_counter() - start
+        return [vector if vector is not None else by_text[text] for text, vector in zip(texts, vectors)]
+
+    def _embed(self, texts: List[str]) -> tuple:
+        """Embed texts through /api/embed in concurrent batches; returns (vectors, requests sent)"""
+
+        client = get_client(self.base_url)
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+        def embed_batch(batch: List[str]) -> List[List[float]]:
+            vectors = client.embed(self.model, batch)
+            if len(vectors) != len(batch):
+                raise ValueError(f"/api/embed returned {len(vectors)} embeddings for {len(batch)} texts")
+            return vectors
+
+        if len(batches) == 1 or self.max_concurrency == 1:
+            results = [embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                results = list(executor.map(embed_batch, batches))
+        return [vector for batch in results for vector in batch], len(batches)
+
+    def embed_query(self, text: str) -> List[float]:
+        return get_client(self.base_url).embed(self.model, [text])[0]
+
+    def get_statistics(self) -> dict:
+        """
+        Get document embedding throughput
+
+        Returns:
+            Dictionary with texts embedded, texts served from the cache, requests
+            sent, seconds spent and texts per second
+        """
+
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["texts_per_second"] = stats["texts"] / stats["seconds"] if stats["seconds"] else 0.0
+        return stats
+
+    def describe_statistics(self) -> str:
+        """One-line throughput summary"""
+
+        stats = self.get_statistics()
+        return (f"{stats['texts']} chunks ({stats['cached']} cached) in {stats['requests']} requests, "
+                f"{stats['seconds']:.1f}s "
+                f"({stats['texts_per_second']:.1f} chunks/s; batches of {self.batch_size}, "
+                f"{self.max_concurrency} in flight)")
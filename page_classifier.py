@@ -0,0 +1,173 @@
+"""
+Page Classifier
+Labels pages by type from text-layer keywords and layout features, and maps
+page types to an extraction policy (extract, skip, downsample or defer)
+"""
+
+import os
+import re
+from typing import Optional
+
+from page_router import NUMERIC_TOKEN
+
+# Page types, and the boilerplate kinds that can be targeted individually by the policy
+CLASS_STATEMENT = "statement"
+CLASS_MDNA = "mdna"
+CLASS_NOTES = "notes"
+CLASS_BOILERPLATE = "boilerplate"
+CLASS_UNKNOWN = "unknown"
+PAGE_CLASSES = (CLASS_STATEMENT, CLASS_MDNA, CLASS_NOTES, CLASS_BOILERPLATE, CLASS_UNKNOWN)
+BOILERPLATE_KINDS = ("cover", "contents", "disclaimer", "glossary")
+
+ACTION_EXTRACT = "extract"
+ACTION_SKIP = "skip"
+ACTION_DOWNSAMPLE = "downsample"
+ACTION_DEFER = "defer"
+ACTIONS = (ACTION_EXTRACT, ACTION_SKIP, ACTION_DOWNSAMPLE, ACTION_DEFER)
+
+STATEMENT_TITLES = re.compile(
+    r"statements? of (?:consolidated )?(?:financial position|operations|income|earnings|cash flows?|"
+    r"comprehensive (?:income|loss)|changes in (?:shareholders|stockholders)|loss)|balance sheets?|"
+    r"income statements?|cash flow statements?",
+    re.IGNORECASE
+)
+STATEMENT_TOTALS = re.compile(
+    r"\btotal (?:assets|liabilities|revenue|equity|current assets|operating expenses)\b|"
+    r"\bnet (?:income|loss|earnings|cash)\b|\bgross profit\b|\bearnings per share\b",
+    re.IGNORECASE
+)
+NOTES_TITLES = re.compile(r"notes to (?:the )?(?:condensed )?(?:interim )?(?:consolidated )?financial statements",
+                          re.IGNORECASE)
+NOTE_HEADING = re.compile(r"^\s*(?:note\s+)?\d{1,2}\.\s+[A-Z][A-Za-z ,’'-]{3,60}$", re.MULTILINE)
+MDNA_TERMS = re.compile(
+    r"results of operations|liquidity|capital resources|compared to|increase[ds]?|decrease[ds]?|"
+    r"primarily (?:due|driven|attributable)|year-over-year|outlook|guidance|revenue",
+    re.IGNORECASE
+)
+CONTENTS_TITLE = re.compile(r"\b(?:table of contents|contents)\b", re.IGNORECASE)
+CONTENTS_LINE = re.compile(r"(?:\.{3,}|\s)\s*\d{1,3}\s*$")
+DISCLAIMER_TERMS = re.compile(
+    r"forward[- ]looking (?:statements|information)|safe harbou?r|cautionary (?:note|statement)|"
+    r"risk factors|undue reliance|no obligation to update|could cause actual results|"
+    r"assumptions|uncertainties|may differ materially",
+    re.IGNORECASE
+)
+GLOSSARY_TITLE = re.compile(r"\b(?:glossary|defined terms|definitions|abbreviations)\b", re.IGNORECASE)
+DEFINITION_LINE = re.compile(r"^[\"“]?[A-Z][\w&’'/ -]{1,40}[\"”]?\s*(?:means|refers to|[:–—-])\s", re.MULTILINE)
+
+
+def parse_policy(policy: str) -> dict:
+    """
+    Parse an extraction policy such as "boilerplate=skip,notes=defer,cover=skip"
+
+    Args:
+        policy: Comma-separated class=action pairs; keys are page classes or boilerplate kinds
+
+    Returns:
+        Dictionary of class (or kind) -> action
+    """
+
+    parsed = {}
+    for item in policy.split(","):
+        if not item.strip():
+            continue
+        key, _, action = item.partition("=")
+        key, action = key.strip().lower(), action.strip().lower()
+        if key not in PAGE_CLASSES + BOILERPLATE_KINDS:
+            raise ValueError(f"Unknown page class in PAGE_CLASS_POLICY: {key!r}")
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action in PAGE_CLASS_POLICY: {action!r} (expected one of {', '.join(ACTIONS)})")
+        parsed[key] = action
+    return parsed
+
+
+class PageClassifier:
+    """
+    Cheap, text-layer-only page classifier. Boilerplate (cover, table of
+    contents, forward-looking statement disclaimers, glossaries) is
+    recognised first, then financial statements by their titles and numeric
+    density, notes by their headings, and everything else with prose is
+    MD&A narrative. Pages without a text layer (scans, full-page charts)
+    stay unknown; the default policy extracts them.
+    """
+
+    def __init__(self, policy: Optional[str] = None, downsample_scale: Optional[float] = None,
+                 statement_numeric_ratio: float = 0.25, cover_max_words: int = 120,
+                 disclaimer_min_hits: int = 4):
+        """
+        Initialize the page classifier
+
+        Args:
+            policy: Extraction policy per class (default: from env or "boilerplate=defer")
+            downsample_scale: DPI multiplier for downsampled pages (default: from env or 0.6)
+            statement_numeric_ratio: Share of numeric words above which a titled page is a statement
+            cover_max_words: Opening pages with fewer words than this are cover pages
+            disclaimer_min_hits: Disclaimer phrases needed to call a page a disclaimer
+        """
+
+        if policy is None:
+            policy = os.getenv('PAGE_CLASS_POLICY', 'boilerplate=defer')
+        self.policy = parse_policy(policy)
+        self.downsample_scale = downsample_scale or float(os.getenv('PAGE_CLASS_DOWNSAMPLE_SCALE', '0.6'))
+        self.statement_numeric_ratio = statement_numeric_ratio
+        self.cover_max_words = cover_max_words
+        self.disclaimer_min_hits = disclaimer_min_hits
+
+    def classify(self, page, page_num: int, text_content: Optional[str] = None) -> dict:
+        """
+        Classify a page
+
+        Args:
+            page: PyMuPDF page object
+            page_num: Page number (0-indexed)
+            text_content: Text layer of the page, if already extracted
+
+        Returns:
+            Dictionary with 'label' (one of PAGE_CLASSES), 'kind' (boilerplate
+            kind or None), 'action' (from the policy) and 'reason'
+        """
+
+        if text_content is None:
+            text_content = page.get_text()
+        words = text_content.split()
+        numeric_ratio = sum(1 for word in words if NUMERIC_TOKEN.match(word)) / len(words) if words else 0.0
+        lines = [line.strip() for line in text_content.splitlines() if line.strip()]
+
+        label, kind, reason = self._classify_text(text_content, words, lines, numeric_ratio, page_num)
+        action = self.policy.get(kind) or self.policy.get(label) or ACTION_EXTRACT
+        return {"label": label, "kind": kind, "action": action, "reason": reason}
+
+    def _classify_text(self, text: str, words: list, lines: list, numeric_ratio: float,
+                       page_num: int) -> tuple:
+        """Rule cascade over the text features: (label, kind, reason)"""
+
+        if len(words) < 5:
+            return CLASS_UNKNOWN, None, "no text layer"
+
+        if page_num <= 1 and len(words) < self.cover_max_words:
+            return CLASS_BOILERPLATE, "cover", f"opening page with {len(words)} words"
+
+        contents_lines = sum(1 for line in lines if CONTENTS_LINE.search(line) and not NUMERIC_TOKEN.match(line))
+        if CONTENTS_TITLE.search(" ".join(lines[:6])) and contents_lines >= max(5, 0.4 * len(lines)):
+            return CLASS_BOILERPLATE, "contents", f"{contents_lines} entries ending in page numbers"
+
+        if GLOSSARY_TITLE.search(" ".join(lines[:6])) and len(DEFINITION_LINE.findall(text)) >= 5:
+            return CLASS_BOILERPLATE, "glossary", "definition list"
+
+        disclaimer_hits = len(DISCLAIMER_TERMS.findall(text))
+        if disclaimer_hits >= self.disclaimer_min_hits and numeric_ratio < 0.1:
+            return CLASS_BOILERPLATE, "disclaimer", f"{disclaimer_hits} forward-looking/disclaimer phrases"
+
+        statement_titles = len(STATEMENT_TITLES.findall(text))
+        statement_totals = len(STATEMENT_TOTALS.findall(text))
+        if numeric_ratio >= self.statement_numeric_ratio and (statement_titles or statement_totals):
+            return CLASS_STATEMENT, None, (f"numeric {numeric_ratio:.0%}, {statement_titles} statement titles, "
+                                           f"{statement_totals} totals")
+
+        if NOTES_TITLES.search(text) or len(NOTE_HEADING.findall(text)) >= 2:
+            return CLASS_NOTES, None, "notes to the financial statements"
+
+        if numeric_ratio >= self.statement_numeric_ratio:
+            return CLASS_STATEMENT, None, f"numeric {numeric_ratio:.0%}"
+
+        return CLASS_MDNA, None, f"narrative ({len(MDNA_TERMS.findall(text))} MD&A terms)"
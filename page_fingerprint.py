@@ -0,0 +1,349 @@
+"""
+Page Fingerprint Index
+Finds near-duplicate pages across filings (perceptual hash of the render,
+MinHash of the text layer and the exact sequence of figures) so earlier
+extractions can be reused
+"""
+
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import Optional
+
+from file_utils import env_flag, atomic_write
+from page_router import NUMERIC_TOKEN
+from extraction_cache import ExtractionCache, make_cache_key
+
+# Try to import PyMuPDF at module level
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    fitz = None
+    FITZ_AVAILABLE = False
+
+WORD_PATTERN = re.compile(r"\w+")
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def dhash(page, hash_size: int = 8) -> int:
+    """
+    Difference hash of a page render
+
+    Args:
+        page: PyMuPDF page object
+        hash_size: Hash is hash_size x hash_size bits
+
+    Returns:
+        Perceptual hash as an integer
+    """
+
+    # A thumbnail a few pixels per hash cell wide is enough and very cheap
+    zoom = hash_size * 10 / max(page.rect.width, 1.0)
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    samples, stride = pix.samples, pix.stride
+    columns, rows = hash_size + 1, hash_size
+
+    # Average-pool the thumbnail down to (hash_size + 1) x hash_size cells
+    cells = []
+    for row in range(rows):
+        y0, y1 = row * pix.height // rows, max((row + 1) * pix.height // rows, row * pix.height // rows + 1)
+        for column in range(columns):
+            x0, x1 = column * pix.width // columns, max((column + 1) * pix.width // columns, column * pix.width // columns + 1)
+            total = sum(samples[y * stride + x] for y in range(y0, y1) for x in range(x0, x1))
+            cells.append(total / ((y1 - y0) * (x1 - x0)))
+
+    value = 0
+    for row in range(rows):
+        for column in range(hash_size):
+            left = cells[row * columns + column]
+            right = cells[row * columns + column + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+class PageFingerprintIndex:
+    """
+    Persistent index of page fingerprints. MinHash signatures are bucketed
+    with LSH bands so lookups only compare against plausible candidates; a
+    match also needs a close perceptual hash, so pages with the same words
+    but a different layout are not reused, and exactly the same figures in
+    the same order, so a page with updated numbers never receives the old
+    ones. The extracted content lives in the extraction cache (under its
+    size limit and eviction); the index file only holds fingerprints and
+    cache keys, one JSON line per page, and saving appends the new pages.
+    """
+
+    def __init__(self, index_path: Optional[str] = None, threshold: Optional[float] = None,
+                 max_hamming: int = 6, num_perm: int = 64, bands: int = 16, shingle_size: int = 3,
+                 min_shingles: int = 8, max_entries: int = 50000, enabled: Optional[bool] = None,
+                 cache: Optional[ExtractionCache] = None):
+        """
+        Initialize the fingerprint index
+
+        Args:
+            index_path: JSON lines file holding the index (default: from env or ./data/cache/page_fingerprints.jsonl)
+            threshold: Minimum estimated text similarity for a near-duplicate (default: from env or 0.9)
+            max_hamming: Maximum perceptual hash distance for a near-duplicate
+            num_perm: Number of MinHash permutations
+            bands: Number of LSH bands (must divide num_perm)
+            shingle_size: Words per text shingle
+            min_shingles: Pages with fewer shingles are not fingerprinted
+            max_entries: Oldest entries are dropped beyond this many
+            enabled: Whether deduplication is used at all (default: from env or True;
+                always off when the extraction cache is disabled)
+            cache: Extraction cache holding the page contents (default: a new ExtractionCache)
+        """
+
+        if num_perm % bands:
+            raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+
+        self.index_path = index_path or os.getenv('PAGE_DEDUP_INDEX', './data/cache/page_fingerprints.jsonl')
+        self.threshold = threshold or float(os.getenv('PAGE_DEDUP_THRESHOLD', '0.9'))
+        if enabled is None:
+            enabled = env_flag('PAGE_DEDUP_ENABLED', 'true')
+        self.cache = cache or ExtractionCache()
+        self.enabled = enabled and self.cache.enabled
+        self.max_hamming = max_hamming
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_shingles = min_shingles
+        self.max_entries = max_entries
+
+        # Fixed seed: signatures must be comparable across runs
+        rng = random.Random(1)
+        self._permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+
+        self.matches = 0
+        self._lock = threading.Lock()
+        self._entries = []
+        self._buckets = {}  # (band, rows) -> [entry index]
+        self._positions = {}  # (namespace, source, page) -> entry index
+        self._pending = []  # Entries added since the last save
+        self._rewrite = False  # The file must be rewritten rather than appended to
+
+        if self.enabled:
+            self._load()
+
+    def _load(self):
+        """Load the persisted index and rebuild the LSH buckets"""
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+
+        header = None
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Torn write from an interrupted save
+            if header is None:
+                header = entry
+                # Signatures from a different configuration are not comparable
+                if entry.get("num_perm") != self.num_perm or "entries" in entry:
+                    self._rewrite = True
+                    return
+                continue
+            self._insert(entry)
+        self._rewrite = header is None
+
+    def _insert(self, entry: dict):
+        """Add an entry to the in-memory index (lock held or single-threaded)"""
+
+        position = len(self._entries)
+        self._entries.append(entry)
+        self._positions[(entry["namespace"], entry["source"], entry["page"])] = position
+        for band_key in self._band_keys(entry["minhash"]):
+            self._buckets.setdefault(band_key, []).append(position)
+
+    def _band_keys(self, signature: list) -> list:
+        """LSH bucket keys of a MinHash signature"""
+        return [(band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+                for band in range(self.bands)]
+
+    def minhash(self, text: str) -> Optional[list]:
+        """
+        MinHash signature of a text
+
+        Args:
+            text: Text layer of a page
+
+        Returns:
+            Signature (num_perm integers), or None if the text is too short
+        """
+
+        words = WORD_PATTERN.findall(text.lower())
+        shingles = {" ".join(words[i:i + self.shingle_size])
+                    for i in range(max(len(words) - self.shingle_size + 1, 0))}
+        if len(shingles) < self.min_shingles:
+            return None
+
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+                  for shingle in shingles]
+        return [min((a * value + b) % MERSENNE_PRIME for value in hashes) for a, b in self._permutations]
+
+    def fingerprint(self, page, text_content: Optional[str] = None) -> Optional[dict]:
+        """
+        Fingerprint a page
+
+        Args:
+            page: PyMuPDF page object
+            text_content: Text layer of the page, if already extracted
+
+        Returns:
+            Dictionary with 'minhash', 'dhash' and 'numbers' (hash of the page's
+            numeric tokens in reading order), or None if the page has too little text
+        """
+
+        if text_content is None:
+            text_content = page.get_text()
+        signature = self.minhash(text_content)
+        if signature is None:
+            return None
+        numbers = " ".join(word for word in text_content.split() if NUMERIC_TOKEN.match(word))
+        return {
+            "minhash": signature,
+            "dhash": dhash(page),
+            "numbers": hashlib.sha256(numbers.encode('utf-8')).hexdigest()[:16]
+        }
+
+    def find(self, fingerprint: dict, namespace: str, exclude_source: Optional[str] = None) -> Optional[dict]:
+        """
+        Look up the closest near-duplicate of a page
+
+        Args:
+            fingerprint: Fingerprint from fingerprint()
+            namespace: Extraction configuration the stored content must match
+            exclude_source: Ignore entries from this source (e.g. the document being extracted)
+
+        Returns:
+            Matching entry with 'content', 'source_name', 'page' and 'similarity', or None
+        """
+
+        if not self.enabled:
+            return None
+
+        signature = fingerprint["minhash"]
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(signature):
+                candidates.update(self._buckets.get(band_key, ()))
+
+            matches = []
+            for position in candidates:
+                entry = self._entries[position]
+                if entry["namespace"] != namespace or entry["source"] == exclude_source:
+                    continue
+                # Entries indexed before figures were fingerprinted have no 'numbers' and never match
+                if entry.get("numbers") != fingerprint["numbers"]:
+                    continue
+                if bin(entry["dhash"] ^ fingerprint["dhash"]).count("1") > self.max_hamming:
+                    continue
+                similarity = sum(a == b for a, b in zip(entry["minhash"], signature)) / self.num_perm
+                if similarity >= self.threshold:
+                    matches.append(dict(entry, similarity=similarity))
+
+        # Closest first; content the cache has evicted since is skipped
+        for match in sorted(matches, key=lambda match: -match["similarity"]):
+            content = self.cache.get(match["content_key"])
+            if content is not None:
+                with self._lock:
+                    self.matches += 1
+                return dict(match, content=content)
+        return None
+
+    def add(self, fingerprint: dict, namespace: str, source: str, source_name: str,
+            page_num: int, content: str):
+        """
+        Record an extracted page
+
+        Args:
+            fingerprint: Fingerprint from fingerprint()
+            namespace: Extraction configuration the content was produced with
+            source: Content hash of the source document
+            source_name: Filename of the source document (for reporting)
+            page_num: Page number (1-indexed)
+            content: Extracted page content
+        """
+
+        if not self.enabled or not content:
+            return
+
+        # A re-extraction of a page already indexed only refreshes its cached content
+        content_key = make_cache_key("page-dedup", namespace, source, page_num)
+        self.cache.put(content_key, content)
+        with self._lock:
+            if (namespace, source, page_num) in self._positions:
+                return
+            entry = {
+                "namespace": namespace,
+                "source": source,
+                "source_name": source_name,
+                "page": page_num,
+                "minhash": fingerprint["minhash"],
+                "dhash": fingerprint["dhash"],
+                "numbers": fingerprint["numbers"],
+                "content_key": content_key,
+                "created": time.time()
+            }
+            self._insert(entry)
+            self._pending.append(entry)
+
+    def save(self):
+        """
+        Persist the pages added since the last save (appended to the index
+        file); the file is rewritten only to drop entries beyond max_entries
+        """
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if len(self._entries) > self.max_entries:
+                entries = self._entries[-self.max_entries:]
+                self._entries, self._buckets, self._positions = [], {}, {}
+                for entry in entries:
+                    self._insert(entry)
+                self._rewrite = True
+            if not (self._pending or self._rewrite):
+                return
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+            if self._rewrite or not os.path.exists(self.index_path):
+                with atomic_write(self.index_path) as f:
+                    f.write(json.dumps({"num_perm": self.num_perm}) + "\n")
+                    for entry in self._entries:
+                        f.write(json.dumps(entry) + "\n")
+            else:
+                with open(self.index_path, 'a', encoding='utf-8') as f:
+                    f.write("".join(json.dumps(entry) + "\n" for entry in self._pending))
+            self._pending = []
+            self._rewrite = False
+
+    def get_statistics(self) -> dict:
+        """
+        Get index statistics
+
+        Returns:
+            Dictionary with statistics
+        """
+
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "index_path": self.index_path,
+                "entries": len(self._entries),
+                "matches": self.matches,
+                "threshold": self.threshold
+            }
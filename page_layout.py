@@ -0,0 +1,180 @@
+"""
+Page Layout Analysis
+Finds table and chart regions on a page from PyMuPDF geometry so only those
+regions need to go to the vision model
+"""
+
+
+# Try to import PyMuPDF at module level
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    fitz = None
+    FITZ_AVAILABLE = False
+
+
+def _overlap_ratio(inner, outer) -> float:
+    """Fraction of inner's area that lies inside outer"""
+
+    area = inner.width * inner.height
+    if area <= 0:
+        return 0.0
+    intersection = inner & outer
+    if intersection.is_empty:
+        return 0.0
+    return intersection.width * intersection.height / area
+
+
+class PageLayoutAnalyzer:
+    """
+    Detects table regions (find_tables, ruling-line clusters) and chart/figure
+    regions (vector drawing clusters, large images) and separates them from the
+    plain text blocks that can be taken straight from the text layer.
+    """
+
+    def __init__(self, min_region_ratio: float = 0.02, max_region_coverage: float = 0.7,
+                 max_regions: int = 4, drawing_gap: float = 8, min_drawing_items: int = 6,
+                 region_margin: float = 6):
+        """
+        Initialize the layout analyzer
+
+        Args:
+            min_region_ratio: Ignore regions smaller than this fraction of the page
+            max_region_coverage: Above this fraction of the page, send the whole page instead
+            max_regions: Above this many regions, send the whole page instead
+            drawing_gap: Distance in points within which drawings join the same cluster
+            min_drawing_items: Minimum drawings for a cluster to count as a chart/table
+            region_margin: Padding added around each region, in points
+        """
+
+        self.min_region_ratio = min_region_ratio
+        self.max_region_coverage = max_region_coverage
+        self.max_regions = max_regions
+        self.drawing_gap = drawing_gap
+        self.min_drawing_items = min_drawing_items
+        self.region_margin = region_margin
+
+    def analyze(self, page) -> dict:
+        """
+        Analyze the layout of a page
+
+        Args:
+            page: PyMuPDF page object
+
+        Returns:
+            Dictionary with 'regions' (kind, rect), 'text_blocks' (rect, text) outside
+            the regions, 'coverage' of the page by regions, and 'croppable'
+        """
+
+        page_area = max(page.rect.width * page.rect.height, 1.0)
+        regions = []
+
+        # 1. Tables PyMuPDF can detect directly
+        try:
+            for table in page.find_tables().tables:
+                regions.append({"kind": "table", "rect": fitz.Rect(table.bbox)})
+        except Exception:
+            pass  # find_tables unavailable in older PyMuPDF, or failed on this page
+
+        # 2. Clusters of vector drawings: ruled tables and charts
+        for cluster, count in self._drawing_clusters(page):
+            if count < self.min_drawing_items:
+                continue
+            if any(_overlap_ratio(cluster, region["rect"]) > 0.5 for region in regions):
+                continue
+            regions.append({"kind": "chart", "rect": cluster})
+
+        # 3. Large raster images: charts, figures, scanned tables
+        for info in page.get_image_info():
+            bbox = page.rect & info["bbox"]
+            if not bbox.is_empty and bbox.width * bbox.height / page_area >= 0.05:
+                regions.append({"kind": "figure", "rect": bbox})
+
+        regions = self._merge_regions(
+            [region for region in regions
+             if region["rect"].width * region["rect"].height / page_area >= self.min_region_ratio],
+            page.rect
+        )
+        regions.sort(key=lambda region: (region["rect"].y0, region["rect"].x0))
+
+        coverage = min(sum(r["rect"].width * r["rect"].height for r in regions) / page_area, 1.0)
+
+        text_blocks = []
+        for block in page.get_text("blocks"):
+            if block[6] != 0 or not block[4].strip():
+                continue  # image block or empty
+            rect = fitz.Rect(block[:4])
+            if any(_overlap_ratio(rect, region["rect"]) > 0.5 for region in regions):
+                continue
+            text_blocks.append({"rect": rect, "text": block[4].strip()})
+
+        return {
+            "regions": regions,
+            "text_blocks": text_blocks,
+            "coverage": coverage,
+            "croppable": bool(regions) and coverage <= self.max_region_coverage
+                         and len(regions) <= self.max_regions
+        }
+
+    def _drawing_clusters(self, page) -> list:
+        """Group nearby vector drawings into clusters, returning (rect, item count)"""
+
+        rects = []
+        for drawing in page.get_drawings():
+            rect = fitz.Rect(drawing["rect"])
+            # Skip full-page backgrounds/borders
+            if rect.width >= page.rect.width * 0.95 and rect.height >= page.rect.height * 0.95:
+                continue
+            rects.append(rect)
+
+        clusters = []  # [rect, count]
+        gap = self.drawing_gap
+        for rect in rects:
+            expanded = fitz.Rect(rect.x0 - gap, rect.y0 - gap, rect.x1 + gap, rect.y1 + gap)
+            touching = [cluster for cluster in clusters if expanded.intersects(cluster[0])]
+            merged = [fitz.Rect(rect), 1]
+            for cluster in touching:
+                merged[0] |= cluster[0]
+                merged[1] += cluster[1]
+                clusters.remove(cluster)
+            clusters.append(merged)
+
+        return [(cluster[0], cluster[1]) for cluster in clusters]
+
+    def _merge_regions(self, regions: list, page_rect) -> list:
+        """Pad regions and merge overlapping ones (tables win over charts)"""
+
+        margin = self.region_margin
+        merged = []
+        for region in sorted(regions, key=lambda r: r["kind"] != "table"):
+            rect = fitz.Rect(region["rect"].x0 - margin, region["rect"].y0 - margin,
+                             region["rect"].x1 + margin, region["rect"].y1 + margin) & page_rect
+            for existing in merged:
+                if existing["rect"].intersects(rect):
+                    existing["rect"] |= rect
+                    break
+            else:
+                merged.append({"kind": region["kind"], "rect": rect})
+        return merged
+
+
+def stitch_layout(text_blocks: list, region_outputs: list) -> str:
+    """
+    Reassemble page content in reading order
+
+    Args:
+        text_blocks: Text blocks from the text layer ('rect', 'text')
+        region_outputs: Extracted region content ('kind', 'rect', 'content')
+
+    Returns:
+        Page content with text blocks and region extractions in top-to-bottom order
+    """
+
+    elements = [(block["rect"].y0, block["rect"].x0, block["text"]) for block in text_blocks]
+    for region in region_outputs:
+        label = region["kind"].upper()
+        elements.append((region["rect"].y0, region["rect"].x0,
+                         f"[{label}]\n{region['content'].strip()}\n[END {label}]"))
+    elements.sort(key=lambda element: (element[0], element[1]))
+    return "\n\n".join(element[2] for element in elements)
@@ -0,0 +1,116 @@
+"""
+Page Router
+Decides per page whether the text layer is sufficient or a vision call is needed
+"""
+
+import re
+from typing import Optional
+
+NUMERIC_TOKEN = re.compile(r"^[(\-$€£]*\d[\d,.]*%?\)?$")
+
+
+class PageRouter:
+    """
+    Scores each page on text density, table likelihood and image coverage.
+    Born-digital narrative pages are routed to the text layer; scanned,
+    image-heavy or table/chart-heavy pages are routed to the vision model.
+    """
+
+    ROUTE_TEXT = "text"
+    ROUTE_VISION = "vision"
+
+    def __init__(self, min_text_chars: int = 200, max_image_coverage: float = 0.3,
+                 max_table_score: float = 0.5, drawings_for_table: int = 150):
+        """
+        Initialize the page router
+
+        Args:
+            min_text_chars: Pages with less text than this are treated as scanned
+            max_image_coverage: Fraction of the page covered by images above which vision is used
+            max_table_score: Table likelihood above which vision is used
+            drawings_for_table: Number of vector drawings that saturates the ruling-line signal
+        """
+
+        self.min_text_chars = min_text_chars
+        self.max_image_coverage = max_image_coverage
+        self.max_table_score = max_table_score
+        self.drawings_for_table = drawings_for_table
+
+    def analyze(self, page, text_content: Optional[str] = None) -> dict:
+        """
+        Compute routing features for a page
+
+        Args:
+            page: PyMuPDF page object
+            text_content: Text layer of the page, if already extracted
+
+        Returns:
+            Dictionary of page features
+        """
+
+        if text_content is None:
+            text_content = page.get_text()
+
+        page_area = max(page.rect.width * page.rect.height, 1.0)
+        words = text_content.split()
+        numeric_words = [word for word in words if NUMERIC_TOKEN.match(word)]
+        numeric_ratio = len(numeric_words) / len(words) if words else 0.0
+
+        # Image coverage, clipped to the page and capped at full coverage
+        image_area = 0.0
+        for info in page.get_image_info():
+            bbox = page.rect & info["bbox"]
+            if not bbox.is_empty:
+                image_area += bbox.width * bbox.height
+        image_coverage = min(image_area / page_area, 1.0)
+
+        # Tables show up as dense numeric text and as ruling lines/cell fills
+        drawing_count = len(page.get_drawings())
+        table_score = (
+            0.5 * min(numeric_ratio * 2.5, 1.0)
+            + 0.5 * min(drawing_count / self.drawings_for_table, 1.0)
+        )
+
+        return {
+            "text_chars": len(text_content.strip()),
+            "text_density": len(text_content) / page_area * 1000,  # chars per 1000 pt²
+            "numeric_ratio": numeric_ratio,
+            "drawing_count": drawing_count,
+            "table_score": table_score,
+            "image_coverage": image_coverage
+        }
+
+    def route(self, features: dict) -> tuple:
+        """
+        Decide how a page should be extracted
+
+        Args:
+            features: Page features from analyze()
+
+        Returns:
+            Tuple of (route, reason)
+        """
+
+        if features["text_chars"] < self.min_text_chars:
+            return self.ROUTE_VISION, "little or no text layer"
+        if features["image_coverage"] >= self.max_image_coverage:
+            return self.ROUTE_VISION, "image-heavy"
+        if features["table_score"] >= self.max_table_score:
+            return self.ROUTE_VISION, "table/chart-heavy"
+        return self.ROUTE_TEXT, "text-rich narrative"
+
+    def decide(self, page, text_content: Optional[str] = None) -> dict:
+        """
+        Analyze and route a page in one step
+
+        Args:
+            page: PyMuPDF page object
+            text_content: Text layer of the page, if already extracted
+
+        Returns:
+            Dictionary of page features plus 'route' and 'reason'
+        """
+
+        features = self.analyze(page, text_content)
+        features["route"], features["reason"] = self.route(features)
+        return features
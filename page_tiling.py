@@ -0,0 +1,156 @@
+"""
+Page Tiling
+Packs several sparse pages into one composite image so they share a single
+vision request, and splits the response back into per-page sections
+"""
+
+import re
+from typing import Optional
+from page_router import PageRouter
+
+# Try to import PyMuPDF at module level
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    fitz = None
+    FITZ_AVAILABLE = False
+
+PAGE_MARKER = "=== PAGE {page} ==="
+PAGE_MARKER_PATTERN = re.compile(r"^[\s#*>]*=+\s*PAGE\s+(\d+)\s*=+[\s*]*$", re.IGNORECASE | re.MULTILINE)
+
+
+class PageTiler:
+    """
+    Decides which pages are sparse enough to share a vision request and
+    composes them, top to bottom with a marker above each, into one page.
+    Dense pages (tables, charts, images, lots of text) are never tiled.
+    """
+
+    def __init__(self, max_pages: int = 4, max_text_chars: int = 800, max_table_score: float = 0.3,
+                 max_image_coverage: float = 0.1, max_height: float = 1600, gap: float = 18,
+                 marker_size: float = 14):
+        """
+        Initialize the page tiler
+
+        Args:
+            max_pages: Maximum pages per composite image
+            max_text_chars: Pages with more text than this are not sparse
+            max_table_score: Pages with a higher table likelihood are not sparse
+            max_image_coverage: Pages with more image coverage than this are not sparse
+            max_height: Maximum composite height in points
+            gap: Spacing between tiles, in points
+            marker_size: Font size of the page markers
+        """
+
+        self.max_pages = max(2, max_pages)
+        self.max_text_chars = max_text_chars
+        self.max_table_score = max_table_score
+        self.max_image_coverage = max_image_coverage
+        self.max_height = max_height
+        self.gap = gap
+        self.marker_size = marker_size
+        self._router = PageRouter()
+
+    def is_sparse(self, page, text_content: Optional[str] = None) -> bool:
+        """
+        Content-density check for a page
+
+        Args:
+            page: PyMuPDF page object
+            text_content: Text layer of the page, if already extracted
+
+        Returns:
+            True if the page carries little content and can be tiled
+        """
+
+        features = self._router.analyze(page, text_content)
+        return (
+            features["text_chars"] <= self.max_text_chars
+            and features["table_score"] < self.max_table_score
+            and features["image_coverage"] <= self.max_image_coverage
+        )
+
+    def tile_height(self, clip) -> float:
+        """Height a page region takes up in the composite, including its marker"""
+        return fitz.Rect(clip).height + self.marker_size + 1.5 * self.gap
+
+    def group(self, candidates: list) -> list:
+        """
+        Group sparse pages into tiles
+
+        Args:
+            candidates: (page_num, clip) tuples of sparse pages, in page order
+
+        Returns:
+            List of groups, each a list of (page_num, clip); only groups of two or more pages
+        """
+
+        groups = []
+        current, height = [], self.gap
+        for page_num, clip in candidates:
+            tile_height = self.tile_height(clip)
+            if current and (len(current) >= self.max_pages or height + tile_height > self.max_height):
+                groups.append(current)
+                current, height = [], self.gap
+            current.append((page_num, clip))
+            height += tile_height
+        groups.append(current)
+        return [group for group in groups if len(group) > 1]
+
+    def compose(self, doc, group: list):
+        """
+        Build a single-page composite document from a group of pages
+
+        Args:
+            doc: Source PyMuPDF document
+            group: (page_num, clip) tuples from group()
+
+        Returns:
+            New PyMuPDF document with one page; the caller closes it
+        """
+
+        clips = [fitz.Rect(clip) for _, clip in group]
+        width = max(clip.width for clip in clips) + 2 * self.gap
+        height = self.gap + sum(self.tile_height(clip) for clip in clips)
+
+        composite = fitz.open()
+        page = composite.new_page(width=width, height=height)
+
+        y = self.gap
+        for (page_num, _), clip in zip(group, clips):
+            page.insert_text((self.gap, y + self.marker_size), PAGE_MARKER.format(page=page_num + 1),
+                             fontsize=self.marker_size, fontname="helv")
+            y += self.marker_size + 0.5 * self.gap
+            page.show_pdf_page(fitz.Rect(self.gap, y, self.gap + clip.width, y + clip.height),
+                               doc, page_num, clip=clip)
+            y += clip.height + self.gap
+            page.draw_line((0, y - 0.5 * self.gap), (width, y - 0.5 * self.gap), width=0.5)
+
+        return composite
+
+
+def split_tile_response(response: str, page_numbers: list) -> dict:
+    """
+    Split a tiled vision response into per-page sections
+
+    Args:
+        response: Model output for a composite image
+        page_numbers: Page numbers (1-indexed) that were in the composite
+
+    Returns:
+        Dictionary mapping page number (1-indexed) to its section; pages the
+        model did not mark are missing
+    """
+
+    expected = set(page_numbers)
+    sections = {}
+    markers = [match for match in PAGE_MARKER_PATTERN.finditer(response)
+               if int(match.group(1)) in expected]
+    for index, match in enumerate(markers):
+        end = markers[index + 1].start() if index + 1 < len(markers) else len(response)
+        section = response[match.end():end].strip()
+        page = int(match.group(1))
+        if section:
+            sections[page] = (sections[page] + "\n\n" + section) if page in sections else section
+    return sections
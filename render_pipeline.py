@@ -0,0 +1,254 @@
+"""
+Render Pipeline
+Overlaps page rendering/encoding (CPU, worker processes) with model inference (GPU)
+"""
+
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+# Documents opened by this worker process, keyed by (path, mtime, size), oldest first
+_WORKER_DOCS = {}
+# Workers outlive a document, so only the most recently used documents stay open
+_WORKER_MAX_DOCS = 4
+
+
+def render_page_image(pdf_path: str, page_num: int, plan,
+                      reuse_document: bool = True) -> dict:
+    """
+    Render and encode a page image (runs inside a worker process)
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_num: Page number (0-indexed)
+        plan: Render plan from ImageEncodingPolicy.plan(), or a list of plans
+            (e.g. one per cropped region) rendered from the same page
+        reuse_document: Keep the document open for later pages in this process
+
+    Returns:
+        Dictionary with the encoded image (or 'images' for a list of plans)
+        and stage timings
+    """
+
+    import fitz  # PyMuPDF
+    from image_encoding import encode_page
+
+    doc = None
+    if reuse_document:
+        # A file replaced at the same path gets a new key, so a stale copy is never rendered
+        stat = os.stat(pdf_path)
+        key = (pdf_path, stat.st_mtime_ns, stat.st_size)
+        doc = _WORKER_DOCS.pop(key, None)
+    if doc is None:
+        doc = fitz.open(pdf_path)
+    if reuse_document:
+        _WORKER_DOCS[key] = doc
+        while len(_WORKER_DOCS) > _WORKER_MAX_DOCS:
+            _WORKER_DOCS.pop(next(iter(_WORKER_DOCS))).close()
+
+    try:
+        if isinstance(plan, list):
+            images = [encode_page(doc[page_num], region_plan) for region_plan in plan]
+            result = {
+                "images": images,
+                "image_bytes": sum(image["image_bytes"] for image in images),
+                "render_seconds": sum(image["render_seconds"] for image in images),
+                "encode_seconds": sum(image["encode_seconds"] for image in images)
+            }
+        else:
+            result = encode_page(doc[page_num], plan)
+    finally:
+        if not reuse_document:
+            doc.close()
+
+    result["page_num"] = page_num
+    return result
+
+
+class RenderPipeline:
+    """
+    Producer/consumer pipeline: worker processes render and encode pages
+    ahead of the inference threads through a bounded queue, so page N+1..N+k
+    are being prepared while page N is with the model. The worker pool is
+    started on the first run and shared by every later (and concurrent) run
+    until close().
+    """
+
+    def __init__(self, render_workers: int = 2, prefetch: int = 4):
+        """
+        Initialize the render pipeline
+
+        Args:
+            render_workers: Number of rendering/encoding worker processes
+            prefetch: Maximum number of pages rendered ahead of inference
+        """
+
+        self.render_workers = max(1, render_workers)
+        self.prefetch = max(1, prefetch)
+        self.last_statistics = {}
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Worker pool, started on first use (spawned workers take a while to start)"""
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.render_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Drop a broken worker pool; the next run starts a new one"""
+
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        """Shut down the worker pool"""
+
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def run(self, pdf_path: str, jobs: list, infer: Callable[[dict, dict], str],
+            infer_workers: int = 1, render_job: Optional[Callable] = None,
+            statistics: Optional[dict] = None) -> dict:
+        """
+        Render and infer a list of page jobs
+
+        Args:
+            pdf_path: Path to the PDF file
+            jobs: Page jobs; each is a dict with at least 'page_num' and 'render'
+                (a plan or list of plans)
+            infer: Called as infer(job, rendered) in an inference thread, returns page content
+            infer_workers: Number of concurrent inference threads
+            render_job: Worker-side render function (default: render_page_image)
+            statistics: Dictionary to fill with this run's statistics (runs may be
+                concurrent, so last_statistics can belong to another run)
+
+        Returns:
+            Dictionary mapping page_num to extracted content
+        """
+
+        render_job = render_job or render_page_image
+        results = {}
+        work_queue = queue.Queue(maxsize=self.prefetch)
+        stats = {
+            "pages": len(jobs),
+            "render_seconds": 0.0,
+            "encode_seconds": 0.0,
+            "image_bytes": 0,
+            "infer_seconds": 0.0,
+            "starved_seconds": 0.0,
+            "startup_seconds": 0.0,
+            "queue_depth_samples": [],
+            "render_fallbacks": 0
+        }
+        stats_lock = threading.Lock()
+        infer_workers = max(1, min(infer_workers, len(jobs) or 1))
+
+        executor = self._get_executor()
+
+        def produce():
+            # Blocks on the bounded queue, which caps how far rendering runs ahead
+            for job in jobs:
+                try:
+                    future = executor.submit(render_job, pdf_path, job["page_num"], job["render"])
+                except Exception:
+                    future = None
+                    self._discard_executor(executor)  # Broken (e.g. a worker died); render inline
+                work_queue.put((job, future))
+            for _ in range(infer_workers):
+                work_queue.put(None)
+
+        def consume():
+            first_item = True
+            while True:
+                wait_start = time.perf_counter()
+                depth = work_queue.qsize()
+                item = work_queue.get()
+                if item is None:
+                    return
+                job, future = item
+
+                try:
+                    rendered = future.result() if future else None
+                except Exception:
+                    rendered = None
+                if rendered is None:
+                    # Worker pool unavailable; render in this thread instead
+                    with stats_lock:
+                        stats["render_fallbacks"] += 1
+                    try:
+                        rendered = render_job(pdf_path, job["page_num"], job["render"], False)
+                    except Exception as e:
+                        print(f"      Warning: Could not render page {job['page_num'] + 1}: {e}")
+                        results[job["page_num"]] = job.get("fallback_text", "")
+                        continue
+                waited = time.perf_counter() - wait_start
+
+                infer_start = time.perf_counter()
+                try:
+                    content = infer(job, rendered)
+                except Exception as e:
+                    print(f"      Warning: Inference failed for page {job['page_num'] + 1}: {e}")
+                    content = job.get("fallback_text", "")
+                infer_seconds = time.perf_counter() - infer_start
+
+                with stats_lock:
+                    results[job["page_num"]] = content
+                    stats["queue_depth_samples"].append(depth)
+                    stats["render_seconds"] += rendered["render_seconds"]
+                    stats["encode_seconds"] += rendered["encode_seconds"]
+                    stats["image_bytes"] += rendered["image_bytes"]
+                    stats["infer_seconds"] += infer_seconds
+                    # The first wait includes worker start-up; count it separately
+                    if first_item:
+                        stats["startup_seconds"] = max(stats["startup_seconds"], waited)
+                    else:
+                        stats["starved_seconds"] += waited
+                first_item = False
+
+        producer = threading.Thread(target=produce, daemon=True)
+        consumers = [threading.Thread(target=consume, daemon=True) for _ in range(infer_workers)]
+        producer.start()
+        for consumer in consumers:
+            consumer.start()
+        for consumer in consumers:
+            consumer.join()
+        producer.join()
+
+        self.last_statistics = self._summarize(stats)
+        if statistics is not None:
+            statistics.update(self.last_statistics)
+        return results
+
+    def _summarize(self, stats: dict) -> dict:
+        """Turn raw pipeline counters into reportable statistics"""
+
+        pages = stats["pages"] or 1
+        depths = stats.pop("queue_depth_samples")
+        return {
+            "pages": stats["pages"],
+            "render_workers": self.render_workers,
+            "prefetch": self.prefetch,
+            "avg_render_ms": stats["render_seconds"] / pages * 1000,
+            "avg_encode_ms": stats["encode_seconds"] / pages * 1000,
+            "avg_infer_ms": stats["infer_seconds"] / pages * 1000,
+            "avg_image_kb": stats["image_bytes"] / pages / 1024,
+            "starved_seconds": stats["starved_seconds"],
+            "startup_seconds": stats["startup_seconds"],
+            "avg_queue_depth": sum(depths) / len(depths) if depths else 0.0,
+            "max_queue_depth": max(depths) if depths else 0,
+            "render_fallbacks": stats["render_fallbacks"]
+        }
@@ -0,0 +1,218 @@
+"""
+Request Hedging
+Duplicates model requests that run past the running p95 latency of their
+stage; the first response wins and the other request is cancelled
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Optional
+
+from file_utils import env_flag
+
+
+class LatencyTracker:
+    """Rolling window of request latencies per stage"""
+
+    def __init__(self, window: int = 200):
+        """
+        Initialize the latency tracker
+
+        Args:
+            window: Most recent latencies kept per stage
+        """
+
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}  # stage -> deque of seconds
+
+    def record(self, stage: str, seconds: float):
+        """Add one latency sample"""
+
+        with self._lock:
+            self._samples.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, stage: str, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Latency percentile of a stage
+
+        Args:
+            stage: Request stage
+            percentile: Percentile between 0 and 100
+            min_samples: Return None with fewer samples than this
+
+        Returns:
+            Latency in seconds, or None if there are too few samples
+        """
+
+        with self._lock:
+            samples = sorted(self._samples.get(stage, ()))
+        if len(samples) < max(min_samples, 1):
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class RequestHedger:
+    """
+    Runs a request and, once it has taken longer than the stage's running
+    p95, sends a duplicate. With a backend pool the duplicate goes to the
+    least loaded backend, which is rarely the one still busy with the
+    original. The first successful response wins and the other request is
+    cancelled through its cancel event. Hedges are capped at a fraction of
+    all requests so a slow period cannot double the load, and with a
+    request budget a duplicate needs a free slot of its own, so hedging
+    never exceeds the concurrency limit or takes a slot another document
+    is waiting for.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, percentile: Optional[float] = None,
+                 max_hedge_ratio: Optional[float] = None, min_samples: int = 20,
+                 min_delay: float = 1.0, max_workers: int = 64):
+        """
+        Initialize the request hedger
+
+        Args:
+            enabled: Whether requests are hedged at all (default: from env or False)
+            percentile: Latency percentile after which a duplicate is sent (default: from env or 95)
+            max_hedge_ratio: Maximum share of requests that get a duplicate (default: from env or 0.1)
+            min_samples: Latencies needed per stage before hedging starts
+            min_delay: Never hedge before this many seconds
+            max_workers: Threads available for requests in flight
+        """
+
+        if enabled is None:
+            enabled = env_flag('REQUEST_HEDGING', 'false')
+        self.enabled = enabled
+        self.percentile = percentile or float(os.getenv('REQUEST_HEDGE_PERCENTILE', '95'))
+        self.max_hedge_ratio = max_hedge_ratio if max_hedge_ratio is not None else float(
+            os.getenv('REQUEST_HEDGE_MAX_RATIO', '0.1')
+        )
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.latencies = LatencyTracker()
+
+        self._lock = threading.Lock()
+        self._stats = {}  # stage -> counters
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge") if enabled else None
+
+    def _counters(self, stage: str) -> dict:
+        """Counters of a stage (lock held)"""
+        return self._stats.setdefault(stage, {
+            "requests": 0, "hedged": 0, "hedge_wins": 0, "cancelled": 0, "capped": 0, "no_slot": 0
+        })
+
+    def hedge_delay(self, stage: str) -> Optional[float]:
+        """Seconds after which a request of this stage gets a duplicate (None: not yet known)"""
+
+        delay = self.latencies.percentile(stage, self.percentile, self.min_samples)
+        return max(delay, self.min_delay) if delay is not None else None
+
+    def run(self, stage: str, call: Callable[[threading.Event], object], budget=None):
+        """
+        Run a request, hedging it if it is slow
+
+        Args:
+            stage: Request stage; latencies and statistics are kept per stage
+            call: Performs the request; called with a threading.Event that is
+                set when the request lost and should be abandoned
+            budget: FairRequestBudget the caller holds a slot of; the
+                duplicate is only sent if it can take a free slot too
+
+        Returns:
+            Result of the first request to succeed
+
+        Raises:
+            Exception: The primary request's error if no request succeeded
+        """
+
+        if not self.enabled:
+            return call(threading.Event())
+
+        with self._lock:
+            self._counters(stage)["requests"] += 1
+
+        attempts = []  # (future, cancel event, start time)
+
+        def launch(release: Optional[Callable[[], None]] = None):
+            cancel = threading.Event()
+            start = time.perf_counter()
+
+            def timed():
+                try:
+                    result = call(cancel)
+                finally:
+                    if release:
+                        release()
+                return result, time.perf_counter() - start
+
+            attempts.append((self._executor.submit(timed), cancel, start))
+
+        launch()
+        delay = self.hedge_delay(stage)
+        done, _ = wait([attempts[0][0]], timeout=delay)
+
+        if not done:
+            # The duplicate counts against the budget under the caller's document
+            owner = (budget.current_owner() or "hedge") if budget else None
+            with self._lock:
+                counters = self._counters(stage)
+                allowed = counters["hedged"] < self.max_hedge_ratio * counters["requests"]
+                if not allowed:
+                    counters["capped"] += 1
+                elif budget and not budget.try_acquire(owner):
+                    allowed = False
+                    counters["no_slot"] += 1
+                else:
+                    counters["hedged"] += 1
+            if allowed:
+                launch(lambda: budget.release(owner) if budget else None)
+
+        # First successful attempt wins; an error only counts once every attempt failed
+        pending = {future for future, _, _ in attempts}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result, seconds = future.result()
+                except Exception as e:
+                    if future is attempts[0][0] or error is None:
+                        error = e
+                    continue
+
+                for other, cancel, _ in attempts:
+                    if other is not future:
+                        cancel.set()
+                # Latency of the request that answered, not of the caller's wait
+                self.latencies.record(stage, seconds)
+                if future is not attempts[0][0]:
+                    with self._lock:
+                        counters = self._counters(stage)
+                        counters["hedge_wins"] += 1
+                        counters["cancelled"] += 1
+                elif len(attempts) > 1:
+                    with self._lock:
+                        self._counters(stage)["cancelled"] += 1
+                return result
+        raise error
+
+    def get_statistics(self) -> dict:
+        """
+        Get hedging statistics per stage
+
+        Returns:
+            Dictionary keyed by stage with request, hedge and win counts, the
+            hedge rate, the duplicate's win ratio and the current hedge delay
+        """
+
+        with self._lock:
+            stats = {stage: dict(counters) for stage, counters in self._stats.items()}
+        for stage, counters in stats.items():
+            counters["hedge_rate"] = counters["hedged"] / counters["requests"] if counters["requests"] else 0.0
+            counters["win_ratio"] = counters["hedge_wins"] / counters["hedged"] if counters["hedged"] else 0.0
+            counters["hedge_delay"] = self.hedge_delay(stage)
+        return stats
@@ -0,0 +1,404 @@
+"""
+Table Extractor
+Deterministic (non-LLM) reconstruction of statement tables from the PDF text
+layer, with a confidence score that decides whether a model is still needed
+"""
+
+import re
+import statistics
+from typing import Optional
+
+# Try to import PyMuPDF at module level
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    fitz = None
+    FITZ_AVAILABLE = False
+
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    pd = None
+    PANDAS_AVAILABLE = False
+
+from page_layout import stitch_layout
+
+VALUE_TOKEN = re.compile(r"^\(?-?[$€£]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?%?\)?%?$|^[—–-]$")
+YEAR_TOKEN = re.compile(r"^(19|20)\d{2}$")
+CURRENCY_TOKEN = re.compile(r"^[$€£%]$")
+DASH_TOKEN = re.compile(r"^[—–-]$")
+# Second line of a wrapped row label ("equipment", "(recovery)")
+CONTINUATION_LABEL = re.compile(r"^[a-z(]")
+
+
+class TableExtractor:
+    """
+    Rebuilds tables from word coordinates: find_tables() locates the table
+    boxes, words are grouped into rows by baseline and values into columns
+    by their (right-aligned) x positions, and header rows above the data
+    label the columns. Each page gets a confidence score; only pages below
+    min_confidence need a model call. Column labels weigh heavily in the
+    score: a label that is too long, ambiguous or built from fewer header
+    rows than the others means the table's periods cannot be trusted, and
+    a column without any label leaves the table to the model.
+    """
+
+    def __init__(self, min_confidence: float = 0.7, row_tolerance: float = 0.5,
+                 column_tolerance: float = 14, max_image_coverage: float = 0.05,
+                 max_label_words: int = 8):
+        """
+        Initialize the table extractor
+
+        Args:
+            min_confidence: Pages scoring below this are left to the model
+            row_tolerance: Words whose vertical centres differ by less than this
+                fraction of the line height share a row
+            column_tolerance: Values whose right edges are within this many points share a column
+            max_image_coverage: Pages with more image coverage (charts, scans) score zero
+            max_label_words: Column labels longer than this picked up surrounding text
+        """
+
+        self.min_confidence = min_confidence
+        self.row_tolerance = row_tolerance
+        self.column_tolerance = column_tolerance
+        self.max_image_coverage = max_image_coverage
+        self.max_label_words = max_label_words
+
+    def extract(self, page) -> dict:
+        """
+        Extract the tables of a page
+
+        Args:
+            page: PyMuPDF page object
+
+        Returns:
+            Dictionary with 'tables' (DataFrames), 'confidence' (0.0-1.0),
+            'content' (page text with tables rendered in place) and 'reason'
+        """
+
+        result = {"tables": [], "confidence": 0.0, "content": "", "reason": ""}
+        if not PANDAS_AVAILABLE:
+            result["reason"] = "pandas not available"
+            return result
+
+        page_area = max(page.rect.width * page.rect.height, 1.0)
+        image_area = 0.0
+        for info in page.get_image_info():
+            bbox = page.rect & info["bbox"]
+            if not bbox.is_empty:
+                image_area += bbox.width * bbox.height
+        if image_area / page_area > self.max_image_coverage:
+            result["reason"] = "images/charts on page"
+            return result
+
+        try:
+            boxes = [fitz.Rect(table.bbox) for table in page.find_tables().tables]
+        except Exception:
+            boxes = []
+        if not boxes:
+            result["reason"] = "no tables found"
+            return result
+
+        words = page.get_text("words")
+        block_tops = {block[5]: block[1] for block in page.get_text("blocks")}
+        line_height = statistics.median(word[3] - word[1] for word in words) if words else 10.0
+        tables, scores, regions = [], [], []
+        for box in boxes:
+            table_words = [word for word in words if _center_inside(word, box)]
+            # Column headers often sit just above the detected box; lines of a
+            # text block that starts higher up continue a paragraph instead
+            header_band = fitz.Rect(box.x0, box.y0 - 3 * line_height, box.x1, box.y0)
+            above_words = [word for word in words if _center_inside(word, header_band)
+                           and block_tops.get(word[5], header_band.y0) >= header_band.y0 - 1]
+            frame, score = self._rebuild(table_words, above_words)
+            if frame is None:
+                result["reason"] = "table could not be rebuilt"
+                return result
+            tables.append(frame)
+            scores.append(score)
+            regions.append({"kind": "table", "rect": box, "content": format_table(frame)})
+
+        # Numbers outside the tables (e.g. unlabeled chart values) still need a model
+        page_values = [word for word in words if VALUE_TOKEN.match(word[4]) and not YEAR_TOKEN.match(word[4])]
+        inside = [word for word in page_values if any(_center_inside(word, box) for box in boxes)]
+        coverage = len(inside) / len(page_values) if page_values else 1.0
+
+        # Text around the tables, without the lines the tables already hold
+        # (a block can start inside a table and run on past it)
+        lines = {}
+        for word in words:
+            lines.setdefault((word[5], word[6]), []).append(word)
+        blocks = {}
+        for (block_no, _), line_words in sorted(lines.items()):
+            rect = fitz.Rect(line_words[0][:4])
+            for word in line_words[1:]:
+                rect |= fitz.Rect(word[:4])
+            if any(rect.intersects(box) for box in boxes):
+                continue
+            block = blocks.setdefault(block_no, {"rect": fitz.Rect(rect), "lines": []})
+            block["rect"] |= rect
+            block["lines"].append(" ".join(word[4] for word in line_words))
+        text_blocks = [{"rect": block["rect"], "text": "\n".join(block["lines"])}
+                       for block in blocks.values()]
+
+        result.update(
+            tables=tables,
+            confidence=min(scores) * min(1.0, coverage / 0.8),
+            content=stitch_layout(text_blocks, regions),
+            reason=f"{len(tables)} table(s), value coverage {coverage:.0%}, "
+                   f"table scores {', '.join(f'{score:.2f}' for score in scores)}"
+        )
+        return result
+
+    def _rebuild(self, words: list, above_words: Optional[list] = None) -> tuple:
+        """
+        Rebuild one table from its words
+
+        Args:
+            words: PyMuPDF word tuples inside the table box
+            above_words: Words just above the box that may hold column headers
+
+        Returns:
+            Tuple of (DataFrame or None, confidence score)
+        """
+
+        rows = self._group_rows(words)
+        if not rows:
+            return None, 0.0
+
+        # Split each row into a label (leading text) and value tokens
+        parsed = []
+        for row in rows:
+            label_words, values = [], []
+            for word in row:
+                text = word[4]
+                if CURRENCY_TOKEN.match(text):
+                    continue  # Currency/percent signs in their own column
+                if VALUE_TOKEN.match(text):
+                    values.append(word)
+                elif values:
+                    label_words.append(word)  # Text after values (e.g. footnote): keep with label
+                else:
+                    label_words.append(word)
+            if not label_words and not values:
+                continue  # Row of currency signs only
+            parsed.append({"label": " ".join(word[4] for word in label_words), "values": values,
+                           "words": row})
+
+        # Header rows: above the first data row, or rows of years (plus footnote digits)
+        header_rows, data_rows = [], []
+        for item in parsed:
+            tokens = [word[4] for word in item["values"]]
+            is_years = any(YEAR_TOKEN.match(token) for token in tokens) and all(
+                YEAR_TOKEN.match(token) or (token.isdigit() and len(token) == 1) for token in tokens
+            )
+            if not data_rows and (not item["values"] or is_years):
+                header_rows.append(item)
+            elif item["values"]:
+                data_rows.append(item)
+            elif data_rows:
+                data_rows.append(item)  # Section label inside the table
+
+        # A row label wrapped onto a second line is one row, whichever line holds the values
+        merged = []
+        for item in data_rows:
+            previous = merged[-1] if merged else None
+            if previous and CONTINUATION_LABEL.match(item["label"]) and not (previous["values"] and item["values"]):
+                merged[-1] = {"label": f"{previous['label']} {item['label']}".strip(),
+                              "values": previous["values"] + item["values"],
+                              "words": previous["words"] + item["words"]}
+            else:
+                merged.append(item)
+        data_rows = merged
+        value_rows = [item for item in data_rows if item["values"]]
+        if not value_rows:
+            return None, 0.0
+
+        # A bare dash is a nil cell of an existing column, never a column of its own
+        anchors = self._column_anchors([word for item in value_rows for word in item["values"]
+                                        if not DASH_TOKEN.match(word[4])])
+        if not anchors:
+            return None, 0.0
+
+        collisions, placed, total = 0, 0, 0
+        table_rows = []
+        for item in data_rows:
+            cells = [""] * len(anchors)
+            for word in item["values"]:
+                column = min(range(len(anchors)), key=lambda index: abs(anchors[index][0] - word[2]))
+                aligned = abs(anchors[column][0] - word[2]) <= self.column_tolerance
+                if DASH_TOKEN.match(word[4]) and not aligned:
+                    continue  # A dash between the label and the values
+                total += 1
+                if not aligned:
+                    continue
+                if cells[column]:
+                    collisions += 1
+                    cells[column] += " " + word[4]
+                else:
+                    cells[column] = word[4]
+                placed += 1
+            table_rows.append((item["label"], cells))
+
+        # Lines above the box only count as headers if they lie entirely over
+        # the value columns; a line reaching into the label area is paragraph text
+        value_left = min(left for _, left in anchors) - 10
+        extra_headers = [
+            {"words": row} for row in self._group_rows(above_words or [])
+            if all(word[0] >= value_left for word in row)
+        ]
+        columns, labelled_columns, unlabelled = self._column_labels(extra_headers + header_rows, anchors)
+
+        labels = [label for label, _ in table_rows]
+        frame = pd.DataFrame([cells for _, cells in table_rows], index=labels, columns=columns)
+
+        # Confidence: every value placed in its own cell and labelled rows, scaled
+        # by the share of cleanly labelled columns (squared, so one wrong period
+        # in a four-column table is enough to leave the page to the model)
+        placement = placed / total if total else 0.0
+        collision_free = 1.0 - collisions / max(placed, 1)
+        labelled_rows = sum(1 for item in value_rows if item["label"]) / len(value_rows)
+        fill = sum(sum(1 for cell in cells if cell) for label, cells in table_rows if any(cells)) / (
+            len(anchors) * max(sum(1 for _, cells in table_rows if any(cells)), 1)
+        )
+        score = (0.35 * placement * collision_free + 0.25 * labelled_rows
+                 + 0.2 * fill + 0.2 * min(1.0, len(value_rows) / 3)) * labelled_columns ** 2
+        if unlabelled:
+            score = 0.0  # Values of a column without a header cannot be attributed to a period
+        return frame, score
+
+    def _group_rows(self, words: list) -> list:
+        """Group words into rows by vertical centre, each row sorted left to right"""
+
+        if not words:
+            return []
+        height = statistics.median(word[3] - word[1] for word in words) or 1.0
+        rows = []
+        for word in sorted(words, key=lambda word: ((word[1] + word[3]) / 2, word[0])):
+            center = (word[1] + word[3]) / 2
+            if rows and abs(center - rows[-1][0]) <= self.row_tolerance * height:
+                rows[-1][1].append(word)
+            else:
+                rows.append([center, [word]])
+        return [sorted(row, key=lambda word: word[0]) for _, row in rows]
+
+    def _column_anchors(self, values: list) -> list:
+        """Cluster value right edges into columns: [(right edge, left extent)], left to right"""
+
+        clusters = []  # [sum of x1, count, min x0, max x1]
+        for word in sorted(values, key=lambda word: word[2]):
+            if clusters and word[2] - clusters[-1][3] <= self.column_tolerance:
+                cluster = clusters[-1]
+                cluster[0] += word[2]
+                cluster[1] += 1
+                cluster[2] = min(cluster[2], word[0])
+                cluster[3] = max(cluster[3], word[2])
+            else:
+                clusters.append([word[2], 1, word[0], word[2]])
+        return [(cluster[0] / cluster[1], cluster[2]) for cluster in clusters]
+
+    def _column_labels(self, header_rows: list, anchors: list) -> tuple:
+        """
+        Name columns from the header rows above the data
+
+        Each header row contributes at most one phrase per column: the phrase
+        that overlaps it, extended to neighbouring columns a spanning header
+        is centred over ("Year ended March 31," above a 2025 and a 2024 column).
+
+        Args:
+            header_rows: Header rows (dicts with 'words'), top to bottom
+            anchors: Column anchors from _column_anchors()
+
+        Returns:
+            Tuple of (column labels, share of columns labelled cleanly,
+            number of columns without any label)
+        """
+
+        # Column extents: the values, widened by their own label in the lowest header row
+        extents = [[min(left, right - 20), right] for right, left in anchors]
+        # Phrases starting left of the values head the row labels ("In thousands of ...")
+        value_left = min(left for left, _ in extents) - 20
+        rows = [[phrase for phrase in self._phrases(item["words"]) if phrase[1] >= value_left]
+                for item in header_rows]
+        for text, x0, x1 in rows[-1] if rows else []:
+            covered = [index for index, (left, right) in enumerate(extents) if x0 <= right + 2 and x1 >= left - 2]
+            if len(covered) == 1:
+                extents[covered[0]] = [min(extents[covered[0]][0], x0), max(extents[covered[0]][1], x1)]
+
+        def center(first: int, last: int) -> float:
+            return (extents[first][0] + extents[last][1]) / 2
+
+        names = [[] for _ in anchors]
+        for phrases in rows:
+            chosen = {}  # column -> (distance from the phrase centre, text)
+            for text, x0, x1 in phrases:
+                covered = [index for index, (left, right) in enumerate(extents) if x0 <= right + 2 and x1 >= left - 2]
+                if not covered:
+                    continue
+                middle = (x0 + x1) / 2
+                first, last = covered[0], covered[-1]
+                # Take in a neighbouring column while that centres the span better on the phrase
+                while True:
+                    options = [(first - 1, last)] if first > 0 else []
+                    options += [(first, last + 1)] if last < len(extents) - 1 else []
+                    best = min(options, key=lambda span: abs(center(*span) - middle), default=None)
+                    if best is None or abs(center(*best) - middle) >= abs(center(first, last) - middle):
+                        break
+                    first, last = best
+                for index in range(first, last + 1):
+                    distance = abs((extents[index][0] + extents[index][1]) / 2 - middle)
+                    if index not in chosen or distance < chosen[index][0]:
+                        chosen[index] = (distance, text)
+            for index, (_, text) in chosen.items():
+                names[index].append(text)
+
+        labels, seen = [], {}
+        for index, parts in enumerate(names):
+            label = " ".join(parts) or f"column {index + 1}"
+            seen[label] = seen.get(label, 0) + 1
+            labels.append(label if seen[label] == 1 else f"{label} ({seen[label]})")
+
+        # Clean: as many header rows as the deepest column, not overlong, not a repeat
+        depth = max(len(parts) for parts in names)
+        clean = sum(
+            1 for parts in names
+            if parts and len(parts) == depth and len(" ".join(parts).split()) <= self.max_label_words
+            and seen[" ".join(parts)] == 1
+        )
+        return labels, clean / len(names), sum(1 for parts in names if not parts)
+
+    def _phrases(self, words: list) -> list:
+        """Merge the words of a header row into phrases: [text, x0, x1], left to right"""
+
+        phrases = []
+        for word in words:
+            if phrases and word[0] - phrases[-1][2] <= 6:
+                phrases[-1][0] += " " + word[4]
+                phrases[-1][2] = word[2]
+            else:
+                phrases.append([word[4], word[0], word[2]])
+        return phrases
+
+
+def _center_inside(word, box) -> bool:
+    """Whether the centre of a word lies inside a box"""
+    return box.contains(fitz.Point((word[0] + word[2]) / 2, (word[1] + word[3]) / 2))
+
+
+def format_table(frame) -> str:
+    """
+    Render a DataFrame as a pipe table for page content
+
+    Args:
+        frame: Table from TableExtractor
+
+    Returns:
+        Text table with the row labels in the first column
+    """
+
+    lines = ["| | " + " | ".join(str(column) for column in frame.columns) + " |"]
+    for label, row in frame.iterrows():
+        lines.append(f"| {label} | " + " | ".join(str(value) for value in row) + " |")
+    return "\n".join(lines)
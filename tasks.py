@@ -2,7 +2,10 @@
 Financial Analysis Tasks
 Defines all tasks for the financial analysis workflow, adapted for LangChain
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+
+# Stands in for the document text in task inputs until the task runs
+DOCUMENTS_PLACEHOLDER = "{documents_placeholder}"
 
 class FinancialTasks:
     """Factory class for creating financial analysis tasks"""
@@ -14,7 +17,8 @@ class FinancialTasks:
     def create_document_extraction_task(self, extracted_docs: Dict[str, str], company_name: str) -> Dict[str, Any]:
         """Create task for extracting and organizing financial data"""
 
-        docs_context = self._format_documents(extracted_docs)
+        # Documents are formatted only when the task runs (see format_documents)
+        docs_context = DOCUMENTS_PLACEHOLDER
 
         return {
             "input": f"""Analyze the following financial documents for {company_name} and extract
@@ -70,13 +74,14 @@ class FinancialTasks:
             - Balance sheet snapshot with key ratios
             - Cash flow analysis
             - Calculated growth rates and financial health indicators
-            All data clearly labeled with periods and units."""
+            All data clearly labeled with periods and units.""",
+            "documents": extracted_docs
         }
 
     def create_business_analysis_task(self, extracted_docs: Dict[str, str], company_name: str, context: str) -> Dict[str, Any]:
         """Create task for analyzing business model"""
 
-        docs_context = self._format_documents(extracted_docs)
+        docs_context = DOCUMENTS_PLACEHOLDER
 
         return {
             "input": f"""Based on the financial documents and any business information
@@ -129,13 +134,14 @@ class FinancialTasks:
             - Detailed revenue model breakdown
             - Customer base and market positioning
             - Competitive advantages and moats
-            - Business quality assessment with specific supporting evidence from documents"""
+            - Business quality assessment with specific supporting evidence from documents""",
+            "documents": extracted_docs
         }
 
     def create_growth_analysis_task(self, extracted_docs: Dict[str, str], company_name: str, context: str) -> Dict[str, Any]:
         """Create task for analyzing growth metrics"""
 
-        docs_context = self._format_documents(extracted_docs)
+        docs_context = DOCUMENTS_PLACEHOLDER
 
         return {
             "input": f"""Conduct a thorough analysis of {company_name}'s growth
@@ -189,14 +195,15 @@ class FinancialTasks:
             - Margin trend analysis with data points
             - Complete KPI assessment with trajectories
             - Clear pricing power evaluation with evidence
-            - Growth quality assessment with supporting metrics"""
+            - Growth quality assessment with supporting metrics""",
+            "documents": extracted_docs
         }
 
     def create_valuation_task(self, extracted_docs: Dict[str, str],
                             valuation_params: str, company_name: str, context: str) -> Dict[str, Any]:
         """Create task for company valuation"""
 
-        docs_context = self._format_documents(extracted_docs)
+        docs_context = DOCUMENTS_PLACEHOLDER
 
         return {
             "input": f"""Perform a comprehensive valuation analysis of {company_name}
@@ -249,7 +256,8 @@ class FinancialTasks:
             - Comparison to current price (if available)
             - Bear/base/bull scenarios
             - Key assumptions and sensitivities clearly stated
-            - Final valuation opinion (overvalued/fairly valued/undervalued)"""
+            - Final valuation opinion (overvalued/fairly valued/undervalued)""",
+            "documents": extracted_docs
         }
 
     def create_investment_recommendation_task(self, company_name: str, context: str) -> Dict[str, Any]:
@@ -359,14 +367,20 @@ class FinancialTasks:
         return [task_extract, task_business, task_growth, task_valuation, task_recommendation]
 
     @staticmethod
-    def _format_documents(extracted_docs: Dict[str, str]) -> str:
-        """Format extracted documents for inclusion in task descriptions"""
+    def iter_documents(extracted_docs: Dict[str, Any]) -> Iterator[str]:
+        """Yield the formatted documents piece by piece (lazy document views are read one page at a time)"""
+
+        for index, filename in enumerate(extracted_docs):
+            content = extracted_docs[filename]
+            separator = "\n" if index else ""
+            yield f"{separator}\n{'='*70}\nDOCUMENT: {filename}\n{'='*70}\n"
+            if hasattr(content, "iter_text"):
+                yield from content.iter_text()
+            else:
+                yield content
 
-        formatted = []
-        for filename, content in extracted_docs.items():
-            formatted.append(f"\n{'='*70}")
-            formatted.append(f"DOCUMENT: {filename}")
-            formatted.append(f"{'='*70}")
-            formatted.append(content)
+    @staticmethod
+    def format_documents(extracted_docs: Dict[str, Any]) -> str:
+        """Format extracted documents for inclusion in a task input, right before the task runs"""
 
-        return "\n".join(formatted)
\ No newline at end of file
+        return "".join(FinancialTasks.iter_documents(extracted_docs))
\ No newline at end of file
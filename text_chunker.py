@@ -0,0 +1,128 @@
+"""
+Text Chunker
+Splits page text into chunks that fit a model's context window, at
+paragraph and line boundaries, and merges the per-chunk model outputs
+without repeating figures seen in an earlier chunk
+"""
+
+import math
+import re
+from typing import List
+
+from model_registry import CHARS_PER_TOKEN
+
+# Leading list markers ignored when comparing output lines
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]+|\d+[.)])\s*")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text (errs on the high side)"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class TextChunker:
+    """
+    Packs paragraphs into chunks of at most max_tokens. Paragraphs that are
+    too long are split into lines, and lines that are too long at word
+    boundaries. The last lines of a chunk are repeated at the start of the
+    next one, so a table row cut at the boundary is seen whole at least once.
+    """
+
+    def __init__(self, max_tokens: int, overlap_lines: int = 2):
+        """
+        Initialize the chunker
+
+        Args:
+            max_tokens: Token budget of one chunk
+            overlap_lines: Lines repeated from the end of the previous chunk
+        """
+
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_lines = overlap_lines
+
+    def _pieces(self, text: str) -> List[str]:
+        """Paragraphs, or their lines (or word runs) where a paragraph exceeds the budget"""
+
+        max_chars = self.max_tokens * CHARS_PER_TOKEN
+        pieces = []
+        for paragraph in re.split(r"\n\s*\n", text):
+            if not paragraph.strip():
+                continue
+            if len(paragraph) <= max_chars:
+                pieces.append(paragraph)
+                continue
+            for line in paragraph.splitlines():
+                while len(line) > max_chars:
+                    cut = line.rfind(" ", 0, max_chars)
+                    cut = cut if cut > 0 else max_chars
+                    pieces.append(line[:cut])
+                    line = line[cut:].lstrip()
+                if line.strip():
+                    pieces.append(line)
+        return pieces
+
+    def split(self, text: str) -> List[str]:
+        """
+        Split text into chunks
+
+        Args:
+            text: Page text
+
+        Returns:
+            Chunks in reading order (a single chunk when the text fits)
+        """
+
+        if estimate_tokens(text) <= self.max_tokens:
+            return [text] if text.strip() else []
+
+        chunks = []
+        current = []
+        for piece in self._pieces(text):
+            candidate = "\n\n".join(current + [piece])
+            if current and estimate_tokens(candidate) > self.max_tokens:
+                chunks.append("\n\n".join(current))
+                # Carry the tail of the finished chunk over, if it leaves room for the piece
+                tail = "\n".join(chunks[-1].splitlines()[-self.overlap_lines:]) if self.overlap_lines else ""
+                current = [tail] if tail and estimate_tokens(f"{tail}\n\n{piece}") <= self.max_tokens else []
+            current.append(piece)
+        if current:
+            chunks.append("\n\n".join(current))
+        return chunks
+
+
+def _line_key(line: str) -> str:
+    """Comparison key of an output line: without list markers, case and spacing"""
+    return " ".join(_LIST_MARKER.sub("", line).lower().split())
+
+
+def merge_chunk_outputs(outputs: List[str]) -> str:
+    """
+    Merge the model outputs of a page's chunks
+
+    Lines with figures that already appeared in an earlier chunk's output
+    (from the overlap, or the model restating context) are dropped; headings
+    and prose are kept so each part stays readable.
+
+    Args:
+        outputs: Model outputs in chunk order
+
+    Returns:
+        Combined output
+    """
+
+    seen = set()  # Figure lines of earlier chunks; repeats within one output are kept
+    merged = []
+    for output in outputs:
+        lines, keys = [], set()
+        for line in output.strip().splitlines():
+            key = _line_key(line)
+            if key and any(char.isdigit() for char in key):
+                if key in seen:
+                    continue
+                keys.add(key)
+            lines.append(line)
+        seen |= keys
+        text = "\n".join(lines).strip()
+        if text:
+            merged.append(text)
+    return "\n\n".join(merged)
@@ -5,11 +5,17 @@ Uses text extraction (no vision model required)
 """
 
 import os
+import json
+import time
+import shutil
 from typing import List, Optional
-from langchain_community.embeddings import OllamaEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from ollama_client import OllamaClientEmbeddings
+from embedding_cache import EmbeddingCache
+from extraction_cache import make_cache_key, file_content_hash
+from file_utils import env_flag
 
 # Try to import PyMuPDF for text extraction
 try:
@@ -19,6 +25,30 @@ except ImportError:
     fitz = None
     FITZ_AVAILABLE = False
 
+CHUNK_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+# Written into a persisted index once it is complete
+INDEX_MANIFEST = "index.json"
+# An index directory without a manifest is only treated as an interrupted build
+# once nothing in it has changed for this long (it may be another process's build)
+INDEX_BUILD_GRACE_SECONDS = 3600
+
+
+def _last_modified(path: str) -> float:
+    """Latest modification time of a directory and everything in it"""
+
+    try:
+        latest = os.path.getmtime(path)
+    except OSError:
+        return time.time()  # Removed meanwhile: nothing to clean up
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+            except OSError:
+                pass  # Removed while walking
+    return latest
+
 
 class ValuationRAG:
     """
@@ -41,6 +71,12 @@ class ValuationRAG:
         self.valuation_pdf_path = valuation_pdf_path
         self.embedding_model_name = embedding_model or os.getenv('EMBEDDING_MODEL', 'nomic-embed-text')
         self.base_url = ollama_base_url or os.getenv('OLLAMA_BASE_URL', 'http://host.docker.internal:11434')
+        self.chunk_size = int(os.getenv('VALUATION_CHUNK_SIZE', '1000'))
+        self.chunk_overlap = int(os.getenv('VALUATION_CHUNK_OVERLAP', '200'))
+        
+        # The index is kept on disk under a key of everything it is built from
+        self.index_dir = os.getenv('VALUATION_INDEX_DIR', './data/cache/valuation_index')
+        self.persist_index = env_flag('VALUATION_INDEX_PERSIST', 'true')
         
         print(f"  Initializing Valuation RAG System")
         print(f"    PDF: {valuation_pdf_path}")
@@ -57,9 +93,10 @@ class ValuationRAG:
             )
         
         # Initialize embeddings
-        self.embeddings = OllamaEmbeddings(
+        self.embeddings = OllamaClientEmbeddings(
             model=self.embedding_model_name,
-            base_url=self.base_url
+            base_url=self.base_url,
+            cache=EmbeddingCache()  # Chunks embedded before, in any document or build, are reused
         )
         
         self.vectorstore = None
@@ -107,8 +144,89 @@ class ValuationRAG:
             print(f"  ✗ Error extracting text from PDF: {e}")
             raise
     
+    def _index_key(self) -> str:
+        """Key of the index: PDF content, embedding model and chunking settings"""
+        
+        return make_cache_key(
+            "valuation-index", file_content_hash(self.valuation_pdf_path), self.embedding_model_name,
+            self.chunk_size, self.chunk_overlap, CHUNK_SEPARATORS
+        )
+    
+    def _open_index(self, index_path: str, key: str) -> bool:
+        """
+        Open a persisted index if it is complete and built from the same inputs
+        
+        Args:
+            index_path: Directory of the persisted index
+            key: Expected index key
+            
+        Returns:
+            True if the index was opened
+        """
+        
+        try:
+            with open(os.path.join(index_path, INDEX_MANIFEST), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if manifest.get("key") != key:
+            return False
+        
+        start = time.perf_counter()
+        try:
+            self.vectorstore = Chroma(
+                collection_name="valuation_parameters",
+                embedding_function=self.embeddings,
+                persist_directory=index_path
+            )
+            stored = self.vectorstore.get(include=["documents", "metadatas"])
+        except Exception as e:
+            print(f"  Warning: Could not open persisted vector store: {e}")
+            self.vectorstore = None
+            return False
+        self.documents = sorted(
+            (Document(page_content=text, metadata=metadata)
+             for text, metadata in zip(stored["documents"], stored["metadatas"])),
+            key=lambda doc: doc.metadata.get("chunk_id", 0)
+        )
+        if len(self.documents) != manifest.get("chunks"):
+            self.vectorstore = None
+            self.documents = []
+            return False
+        print(f"  ✓ Opened persisted vector store ({len(self.documents)} chunks) "
+              f"in {time.perf_counter() - start:.2f}s")
+        return True
+    
+    def _remove_stale_indexes(self, current: str):
+        """Delete indexes built earlier for this PDF from inputs that have changed"""
+        
+        source = os.path.abspath(self.valuation_pdf_path)
+        for name in os.listdir(self.index_dir):
+            index_path = os.path.join(self.index_dir, name)
+            if name == current or not os.path.isdir(index_path):
+                continue
+            try:
+                with open(os.path.join(index_path, INDEX_MANIFEST), 'r', encoding='utf-8') as f:
+                    stale = json.load(f).get("source") == source
+            except (OSError, ValueError):
+                # An interrupted build, unless it is still being written
+                stale = time.time() - _last_modified(index_path) > INDEX_BUILD_GRACE_SECONDS
+            if stale:
+                shutil.rmtree(index_path, ignore_errors=True)
+    
     def _load_and_index(self):
-        """Load valuation PDF and create vector store index"""
+        """Load valuation PDF and create vector store index (or open the persisted one)"""
+        
+        index_path = None
+        if self.persist_index:
+            key = self._index_key()
+            index_path = os.path.join(self.index_dir, key[:16])
+            if self._open_index(index_path, key):
+                return
+            print("  Persisted vector store missing or out of date, rebuilding...")
+            # A directory without a manifest is a build that did not finish
+            shutil.rmtree(index_path, ignore_errors=True)
+            os.makedirs(self.index_dir, exist_ok=True)
         
         # Extract content from PDF using text extraction (no vision)
         content = self._extract_text_from_pdf(self.valuation_pdf_path)
@@ -119,10 +237,10 @@ class ValuationRAG:
         # Split content into chunks for better retrieval
         print("  Creating document chunks...")
         text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
             length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
+            separators=CHUNK_SEPARATORS
         )
         
         chunks = text_splitter.split_text(content)
@@ -147,9 +265,20 @@ class ValuationRAG:
                 documents=self.documents,
                 embedding=self.embeddings,
                 collection_name="valuation_parameters",
-                persist_directory=None  # In-memory only
+                persist_directory=index_path  # None: in-memory only
             )
             print("  ✓ Vector store created successfully")
+            print(f"  ✓ Embedded {self.embeddings.describe_statistics()}")
+            self.embeddings.cache.flush()
+            if index_path:
+                # Written last: only a finished index has a manifest
+                with open(os.path.join(index_path, INDEX_MANIFEST), 'w', encoding='utf-8') as f:
+                    json.dump({"key": key, "source": os.path.abspath(self.valuation_pdf_path),
+                               "embedding_model": self.embedding_model_name,
+                               "chunk_size": self.chunk_size, "chunk_overlap": self.chunk_overlap,
+                               "chunks": len(self.documents)}, f, indent=2)
+                self._remove_stale_indexes(os.path.basename(index_path))
+                print(f"  ✓ Persisted to {index_path}")
         except Exception as e:
             print(f"  ✗ Error creating vector store: {e}")
             raise
@@ -4,12 +4,36 @@ Extracts text and data from financial PDF documents using vision models
 """
 
 import os
-import base64
+import atexit
 import requests
 import json
-from typing import Optional
-from langchain_community.llms import Ollama
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
 from utils import check_model_availability
+from extraction_cache import ExtractionCache, make_cache_key, page_content_hash, file_content_hash
+from page_router import PageRouter
+from page_layout import PageLayoutAnalyzer, stitch_layout
+from page_tiling import PageTiler, PAGE_MARKER, split_tile_response
+from page_fingerprint import PageFingerprintIndex
+from table_extractor import TableExtractor
+from extraction_checkpoint import ExtractionCheckpoint
+from document_manifest import DocumentManifest, format_page_ranges
+from document_store import DocumentStore, StoredDocument
+from page_classifier import PageClassifier, ACTION_SKIP, ACTION_DOWNSAMPLE, ACTION_DEFER
+from document_scheduler import DocumentScheduler, FairRequestBudget
+from extraction_schema import (
+    PAGE_EXTRACTION_SCHEMA, parse_page_extraction, format_page_extraction, format_records, split_records,
+    table_records
+)
+from render_pipeline import RenderPipeline
+from image_encoding import ImageEncodingPolicy, encode_page
+from ollama_client import OllamaClientLLM, OllamaStallError, get_client
+from backend_pool import backend_urls
+from model_registry import get_registry
+from request_hedging import RequestHedger
+from text_chunker import TextChunker, estimate_tokens, merge_chunk_outputs
+from file_utils import env_flag
 
 # Try to import PyMuPDF at module level
 try:
@@ -20,85 +44,330 @@ except ImportError:
     FITZ_AVAILABLE = False
 
 
+VISION_EXTRACTION_PROMPT = """You are analyzing a financial document page image. Extract ALL relevant information you can see including:
+
+1. FINANCIAL FIGURES
+   - All revenue, sales, income numbers
+   - All expenses, costs
+   - Profits, margins, percentages
+   - Cash flow data
+   - Balance sheet items
+   - Year/quarter labels for all numbers
+
+2. KEY METRICS
+   - Growth rates
+   - Financial ratios (P/E, ROE, margins, debt ratios, etc.)
+   - Per-share data (EPS, dividends, book value, etc.)
+   - KPIs and performance indicators
+
+3. TEXTUAL INFORMATION
+   - Company name and ticker
+   - Time periods (Q1 2024, FY2023, etc.)
+   - Section headers and titles
+   - Business descriptions
+   - Risk factors or important notes
+
+4. TABLES AND CHARTS
+   - Extract all data from tables with row and column labels
+   - Describe trends visible in charts
+   - Note any footnotes or references
+
+5. STRUCTURE
+   - Identify if this is: income statement, balance sheet, cash flow, or narrative section
+   - Note any comparative periods (current vs prior year)
+
+Be EXTREMELY thorough and precise. Extract every number with its label and context. Format as organized, structured text."""
+
+VISION_REGION_PROMPT = """You are analyzing a cropped region of a financial document page: a table, chart or figure. The surrounding text of the page is extracted separately.
+
+- For a table: reproduce every row and column with its labels, keeping all numbers exactly as shown (units, signs, parentheses, footnote markers).
+- For a chart: state the chart type, axis labels, series names and every labelled data point, then describe the trend.
+- For a figure: describe what it shows and extract any numbers or labels in it.
+
+Be precise. Do not add information that is not in the image. Format as organized, structured text."""
+
+VISION_JSON_PROMPT = """You are analyzing a financial document page image (or a cropped table/chart from one). Return JSON only.
+
+- statement_type: the main kind of content (income_statement, balance_sheet, cash_flow, kpi, guidance, narrative or other)
+- summary: one or two sentences on what the image shows
+- content: all text of the image in reading order, as clean prose: headings, paragraphs and every table as a pipe table, with every figure exactly as printed
+- records: one record for EVERY figure shown, with its statement_type, line_item (label as printed), period (e.g. "Q4 FY2025"), value (a number; amounts in parentheses are negative), unit (e.g. "thousands", "millions", "%", "per share") and currency (ISO code or null)
+
+Do not skip any figure and do not invent figures that are not in the image."""
+
+ENHANCE_PROMPT = """Analyze this financial document page content and extract structured information.
+
+Raw text from page{part}:
+{text}
+
+Extract and organize:
+1. All numerical financial data (revenue, profit, expenses, etc.)
+2. Key financial metrics and ratios
+3. Important dates and periods
+4. Company information
+5. Any tables or structured data
+
+Format your response as clear, organized text with all numbers and their labels."""
+
+# Smallest page chunk worth a text-path request; a smaller budget is a configuration error
+MIN_ENHANCE_CHUNK_TOKENS = 256
+
+VISION_TILE_PROMPT = """This image contains {count} financial document pages stacked top to bottom. Each page starts below a marker line: {markers}.
+
+For EACH page, in order, output its marker line exactly as shown on its own line, followed by everything extracted from that page. Never merge content from different pages under one marker.
+
+For each page, extract ALL figures with their labels and periods, section headers and titles, company information and any important notes. Format as organized, structured text."""
+
+
+def _settings(component) -> Optional[dict]:
+    """Public settings of an optional pipeline component, for cache namespaces (None when disabled)"""
+    
+    if component is None:
+        return None
+    return {key: value for key, value in vars(component).items() if not key.startswith('_')}
+
+
 class VisionDocumentExtractor:
     """
     Extracts information from PDF documents using vision-language models.
     Supports both Qwen2-VL and Llama 3.2 Vision models.
     """
     
-    def __init__(self, model_name: Optional[str] = None, base_url: Optional[str] = None):
+    def __init__(self, model_name: Optional[str] = None, base_url: Optional[str] = None,
+                 max_concurrency: Optional[int] = None):
         """
         Initialize the vision extractor
         
         Args:
             model_name: Name of the vision model (default: from env or llama3.2-vision:11b)
             base_url: Ollama base URL (default: from env or http://localhost:11434)
+            max_concurrency: Maximum page requests in flight (default: from env
+                VISION_MAX_CONCURRENCY, then OLLAMA_NUM_PARALLEL per backend, then a
+                default from the model's size)
         """
         
         self.model_name = model_name or os.getenv('VISION_MODEL', 'llama3.2-vision:11b')
         self.base_url = base_url or os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
         
+        # Check if the model is available
+        check_model_availability(self.model_name, self.base_url)
+        
+        # Capabilities, context window and size come from the server, not the model name
+        self.model_info = get_registry(self.base_url).get(self.model_name)
+        
+        # OLLAMA_NUM_PARALLEL is per server; a backend pool multiplies it
+        self.max_concurrency = max(1, max_concurrency or int(
+            os.getenv('VISION_MAX_CONCURRENCY')
+            or int(os.getenv('OLLAMA_NUM_PARALLEL') or self.model_info.default_parallel())
+            * len(backend_urls(self.base_url))
+        ))
+        
+        # PyMuPDF is not thread-safe, even across documents (they share one MuPDF
+        # context); all page access goes through this lock. Passes over a whole
+        # document take it per page, so other documents' pages interleave.
+        self._fitz_lock = threading.Lock()
+        
+        # Page requests in flight across all documents being extracted at once
+        self.request_budget = FairRequestBudget(self.max_concurrency)
+        self._progress_lock = threading.Lock()
+        
+        # Generation options are part of every cache key
+        self.generation_options = {"temperature": 0.0}
+        self.image_policy = ImageEncodingPolicy.from_env()
+        
+        # Stream vision responses so stalls are caught between tokens; output
+        # limits stop a generation early and are part of the cache key
+        self.streaming = env_flag('VISION_STREAMING', 'true')
+        self.output_limits = {
+            "max_output_chars": int(os.getenv('VISION_MAX_OUTPUT_CHARS', '0')) or None,
+            "stop_markers": [
+                marker for marker in os.getenv('VISION_STOP_MARKERS', '').split(',') if marker
+            ]
+        }
+        self.cache = ExtractionCache()
+        
+        # Tokens of the context window kept free for each text-path answer;
+        # each page chunk gets what is left after the answer and the instructions
+        self.enhance_reserve_tokens = int(os.getenv('ENHANCE_RESERVE_TOKENS', '1024'))
+        self.enhance_chunk_tokens = (
+            self.model_info.context_window - self.enhance_reserve_tokens
+            - estimate_tokens(ENHANCE_PROMPT.format(part=" (part 99 of 99)", text=""))
+        )
+        if self.enhance_chunk_tokens < MIN_ENHANCE_CHUNK_TOKENS:
+            raise ValueError(
+                f"ENHANCE_RESERVE_TOKENS={self.enhance_reserve_tokens} leaves {self.enhance_chunk_tokens} tokens "
+                f"of {self.model_name}'s {self.model_info.context_window}-token context window for page text "
+                f"(at least {MIN_ENHANCE_CHUNK_TOKENS} needed); lower it or raise num_ctx"
+            )
+        
+        # Duplicate vision requests that run past their stage's p95 latency (optional)
+        self.hedger = RequestHedger()
+        
+        # 'json' also asks the model for typed records (Ollama structured outputs) next to the prose
+        self.output_format = os.getenv('VISION_OUTPUT_FORMAT', 'text').lower()
+        if self.output_format not in ('text', 'json'):
+            raise ValueError(f"Unsupported VISION_OUTPUT_FORMAT: {self.output_format} (expected text or json)")
+        
+        # Render/encode pages in worker processes ahead of inference (0 renders inline);
+        # the workers start with the first document and serve every later one
+        render_workers = int(os.getenv('VISION_RENDER_WORKERS', '2'))
+        self.render_pipeline = RenderPipeline(
+            render_workers=render_workers,
+            prefetch=int(os.getenv('VISION_RENDER_PREFETCH', str(2 * self.max_concurrency)))
+        ) if render_workers > 0 else None
+        if self.render_pipeline:
+            atexit.register(self.render_pipeline.close)
+        
         print(f"  Initializing Vision Extractor")
-        print(f"    Model: {self.model_name}")
-        print(f"    Base URL: {self.base_url}")
+        print(f"    Model: {self.model_name} ({self.model_info.describe()})")
+        print(f"    Base URL: {', '.join(backend_urls(self.base_url))}")
+        print(f"    Max concurrent pages: {self.max_concurrency}")
+        print(f"    Page images: {self.image_policy.describe()}")
+        print(f"    Output format: {self.output_format}")
+        if self.render_pipeline:
+            print(f"    Render pipeline: {self.render_pipeline.render_workers} workers, "
+                  f"prefetch {self.render_pipeline.prefetch}")
+        if self.hedger.enabled:
+            print(f"    Request hedging: after p{self.hedger.percentile:g} latency, "
+                  f"at most {self.hedger.max_hedge_ratio:.0%} of requests")
         
         # Check if PyMuPDF is available
         if not FITZ_AVAILABLE:
             print(f"    WARNING: PyMuPDF (fitz) not available. PDF extraction may fail.")
         
-        # Check if the model is available
-        check_model_availability(self.model_name)
+        # All model calls go through the shared, pooled Ollama client
+        self.client = get_client(self.base_url)
         
         # Initialize Ollama LLM for text-only processing
-        self.llm = Ollama(
+        self.llm = OllamaClientLLM(
             model=self.model_name,
             base_url=self.base_url,
-            temperature=0.0  # Deterministic for document extraction
+            temperature=0.0,  # Deterministic for document extraction
+            streaming=self.streaming
         )
         
         # Detect if this is a vision-capable model
         self.is_vision_model = self._is_vision_capable()
         print(f"    Vision capabilities: {'Yes' if self.is_vision_model else 'No'}")
+        
+        # Route text-rich pages to the text layer instead of the vision model
+        routing_enabled = env_flag('VISION_ROUTING', 'true')
+        self.router = PageRouter() if routing_enabled else None
+        if self.is_vision_model:
+            print(f"    Text-layer routing: {'Enabled' if self.router else 'Disabled'}")
+        
+        # Send only table/chart regions to the vision model when a page allows it;
+        # the rest of the page comes from the text layer
+        crops_enabled = env_flag('VISION_REGION_CROPS', 'true')
+        self.layout_analyzer = PageLayoutAnalyzer() if crops_enabled else None
+        self.region_dpi_scale = float(os.getenv('VISION_REGION_DPI_SCALE', '1.5'))
+        if self.is_vision_model:
+            print(f"    Region crops: {'Enabled' if self.layout_analyzer else 'Disabled'}")
+        
+        # Optionally pack sparse pages into one composite image per vision request
+        # (tiled responses are split on page markers, which structured output cannot carry)
+        tiling_enabled = env_flag('VISION_TILING', 'false')
+        tiling_enabled = tiling_enabled and self.output_format == 'text'
+        self.tiler = PageTiler(
+            max_pages=int(os.getenv('VISION_TILE_MAX_PAGES', '4'))
+        ) if tiling_enabled else None
+        if self.is_vision_model:
+            print(f"    Sparse page tiling: "
+                  f"{f'Up to {self.tiler.max_pages} pages per image' if self.tiler else 'Disabled'}")
+        
+        # Reuse extractions of near-duplicate pages seen in earlier filings (content is kept in the cache)
+        self.fingerprints = PageFingerprintIndex(cache=self.cache)
+        if self.fingerprints.enabled:
+            print(f"    Near-duplicate reuse: Enabled "
+                  f"({self.fingerprints.get_statistics()['entries']} pages indexed)")
+        else:
+            print(f"    Near-duplicate reuse: Disabled")
+        
+        # Rebuild statement tables from the text layer first; the model only
+        # sees pages where the reconstruction confidence is low
+        table_fast_path = env_flag('TABLE_FAST_PATH', 'true')
+        self.table_extractor = TableExtractor(
+            min_confidence=float(os.getenv('TABLE_MIN_CONFIDENCE', '0.7'))
+        ) if table_fast_path else None
+        print(f"    Table fast path: "
+              f"{f'Enabled (min confidence {self.table_extractor.min_confidence:.2f})' if self.table_extractor else 'Disabled'}")
+        
+        # Label pages by type so low-value classes can be skipped, downsampled or deferred
+        self.page_classifier = PageClassifier()
+        print(f"    Page class policy: "
+              f"{', '.join(f'{key}={action}' for key, action in self.page_classifier.policy.items()) or 'extract all'}")
+        
+        # Extracted documents are streamed to disk and returned as memory-mapped views
+        self.document_store = DocumentStore()
+        self._document_writers = {}  # Absolute PDF path -> DocumentWriter
+        print(f"    Document store: {self.document_store.store_dir if self.document_store.enabled else 'Disabled'}")
+        
+        # Per-document extraction statistics, structured records and rebuilt
+        # tables (DataFrames by page number), keyed by absolute PDF path (filings
+        # in different directories may share a filename)
+        self.document_stats = {}
+        self.document_records = {}
+        self.document_tables = {}
     
     def _is_vision_capable(self) -> bool:
-        """Check if the model supports vision/image input"""
-        vision_keywords = ['vision', 'llava', 'qwen2-vl', 'llama3.2-vision']
-        return any(keyword in self.model_name.lower() for keyword in vision_keywords)
+        """Check if the model supports vision/image input (capabilities reported by /api/show)"""
+        return self.model_info.vision
     
-    def _call_ollama_api_with_image(self, prompt: str, image_base64: str) -> str:
+    def _call_ollama_api_with_image(self, prompt: str, image_base64: str,
+                                    schema: Optional[dict] = None, stage: str = "page") -> str:
         """
         Call Ollama API directly with image support
         
         Args:
             prompt: Text prompt for the model
             image_base64: Base64-encoded image
+            schema: JSON schema to constrain the output to (Ollama 'format')
+            stage: Request stage ('page', 'region' or 'tile'); hedging keeps
+                latencies per stage
             
         Returns:
             Model response text
         """
         
-        url = f"{self.base_url}/api/generate"
-        
         payload = {
             "model": self.model_name,
             "prompt": prompt,
             "images": [image_base64],
-            "stream": False,
-            "options": {
-                "temperature": 0.0
-            }
+            "options": self.generation_options
         }
+        if schema:
+            payload["format"] = schema
+        
+        if schema:
+            stage = f"{stage}-json"
+        
+        if self.streaming:
+            try:
+                # Cutting structured output short would only produce invalid JSON
+                result = self.hedger.run(stage, lambda cancel: self.client.stream_generate(
+                    payload,
+                    max_output_chars=None if schema else self.output_limits["max_output_chars"],
+                    stop_markers=None if schema else self.output_limits["stop_markers"],
+                    cancel=cancel
+                ), budget=self.request_budget)
+                return result.get('response', '')
+            except OllamaStallError as e:
+                print(f"      Warning: {e}; discarding partial output")
+                return ""
+            except requests.exceptions.RequestException as e:
+                print(f"      Error calling Ollama API: {e}")
+                return ""
         
         try:
-            response = requests.post(url, json=payload, timeout=300)
-            response.raise_for_status()
-            result = response.json()
+            # Without streaming a losing duplicate cannot be cancelled; it runs to the end unused
+            result = self.hedger.run(stage, lambda cancel: self.client.generate(payload, timeout=300),
+                                     budget=self.request_budget)
             return result.get('response', '')
         except requests.exceptions.RequestException as e:
             print(f"      Error calling Ollama API: {e}")
             return ""
     
-    def extract_from_pdf(self, pdf_path: str) -> str:
+    def extract_from_pdf(self, pdf_path: str) -> Union[str, StoredDocument]:
         """
         Extract all relevant information from a PDF document
         
@@ -106,7 +375,8 @@ class VisionDocumentExtractor:
             pdf_path: Path to the PDF file
             
         Returns:
-            Extracted text content with financial data and analysis
+            Extracted text content with financial data and analysis; a lazy
+            StoredDocument view when the document store is enabled
         """
         
         if not os.path.exists(pdf_path):
@@ -118,105 +388,1008 @@ class VisionDocumentExtractor:
                 "Install with: pip install PyMuPDF"
             )
         
+        writer = None
+        final_content = None
         try:
             # Open PDF document
-            doc = fitz.open(pdf_path)
-            total_pages = len(doc)
+            with self._fitz_lock:
+                doc = fitz.open(pdf_path)
+                total_pages = len(doc)
+            
+            print(f"    Processing {os.path.basename(pdf_path)}: {total_pages} pages...")
+            cache_before = self.cache.get_statistics()
+            hedging_before = self.hedger.get_statistics()
+            source = file_content_hash(pdf_path)
+            document_key = os.path.abspath(pdf_path)
+            stats = {"document": os.path.basename(pdf_path), "path": document_key, "source": source,
+                     "total_pages": total_pages, "routes": {}}
+            self.document_stats[document_key] = stats
             
-            print(f"    Processing {total_pages} pages...")
+            # Page types go into the document so the agents can see what was skipped
+            classes = self._classify_pages(doc, stats)
             
             extracted_content = []
             extracted_content.append(f"DOCUMENT: {os.path.basename(pdf_path)}")
             extracted_content.append(f"Total Pages: {total_pages}")
+            extracted_content.append(f"Page Types: {self._describe_page_classes(classes)}")
             extracted_content.append("=" * 70)
             
-            # Process each page
-            for page_num in range(total_pages):
-                print(f"      Processing page {page_num + 1}/{total_pages}...")
-                
-                page_content = self._extract_page(doc, page_num)
-                
-                if page_content:
-                    extracted_content.append(f"\n--- PAGE {page_num + 1} ---")
-                    extracted_content.append(page_content)
+            # Page results stream to the on-disk store as they complete
+            if self.document_store.enabled:
+                writer = self.document_store.writer(pdf_path, "\n".join(extracted_content))
+                self._document_writers[document_key] = writer
+            
+            # Resume from the checkpoint journal of an interrupted run of this file
+            checkpoint = ExtractionCheckpoint(source, self._extraction_namespace(), os.path.basename(pdf_path))
+            if checkpoint.completed:
+                missing = [page_num for page_num in range(total_pages) if page_num not in checkpoint.completed]
+                print(f"    Resuming: {len(checkpoint.completed)} pages already extracted"
+                      f"{f', continuing at page {missing[0] + 1}' if missing else ''}")
+            stats["resumed"] = len(checkpoint.completed)
+            stats["pages_done"] = len(checkpoint.completed)
             
-            doc.close()
+            # Carry over the pages a revised filing shares with its previous revision
+            manifest = DocumentManifest(pdf_path, self._extraction_namespace())
+            unchanged, page_hashes = self._diff_revision(doc, manifest, source, stats, checkpoint.completed)
+            unchanged = {page_num: self._page_done(stats, checkpoint, page_num, content)
+                         for page_num, content in unchanged.items()}
+            
+            # Pages the class policy skips get a marker instead of an extraction.
+            # Markers are not journaled or indexed, so a later policy change takes effect.
+            skipped = {
+                page_num: f"[Skipped {classification['kind'] or classification['label']} page: "
+                          f"{classification['reason']}]"
+                for page_num, classification in classes.items()
+                if classification["action"] == ACTION_SKIP
+                and page_num not in unchanged and page_num not in checkpoint.completed
+            }
+            for page_num, marker in skipped.items():
+                stats["routes"][page_num + 1] = "skipped"
+                self._page_done(stats, None, page_num, marker)
+            
+            # Pages resumed from the checkpoint journal never pass through _page_done();
+            # with the store on, only the pages' offsets stay in memory from here on
+            resumed = {page_num: self._page_output(stats, page_num, content)
+                       for page_num, content in checkpoint.completed.items()}
+            checkpoint.completed.clear()
+            done = {**skipped, **unchanged, **resumed}
+            if writer:
+                for page_num, content in resumed.items():
+                    writer.write_page(page_num, content)
+                done = {page_num: self._retained(stats, page_num, content) for page_num, content in done.items()}
+                unchanged = resumed = None
+            
+            # Process pages (concurrently if configured), results come back in page order.
+            # Pages that would go to the model may reuse a near-duplicate from another filing.
+            try:
+                page_contents = self._extract_pages(doc, pdf_path, total_pages, stats, done, checkpoint)
+            finally:
+                checkpoint.close()
+            checkpoint.finish()
+            done = None
+            
+            with self._fitz_lock:
+                doc.close()
+            
+            if writer:
+                # Pages the store does not hold yet
+                for page_num, page_content in enumerate(page_contents):
+                    if page_content and not writer.has_page(page_num):
+                        writer.write_page(page_num, page_content)
+                page_contents = None
+                self._document_writers.pop(document_key, None)
+                final_content = writer.close()
+                writer = None  # Published: nothing to abort from here on
+            else:
+                for page_num, page_content in enumerate(page_contents):
+                    if page_content:
+                        extracted_content.append(f"\n--- PAGE {page_num + 1} ---")
+                        extracted_content.append(page_content)
+                final_content = "\n".join(extracted_content)
+            
+            page_records = stats.pop("page_records", {})
+            
+            def page_text(page_num: int) -> str:
+                text = final_content.page(page_num + 1) if page_contents is None else page_contents[page_num] or ""
+                # The manifest keeps a page's records with its text, so they carry over with it
+                records = format_records(page_records.get(page_num))
+                return f"{text}\n\n{records}" if text and records else text or records
+            
+            # The manifest reads one page at a time (from the store when it is on).
+            # Degraded pages get no content in the manifest, so the next revision extracts them again.
+            degraded = stats.get("degraded", set())
+            manifest.update(page_hashes, ("" if page_num in skipped or page_num in degraded
+                                          else page_text(page_num) for page_num in range(total_pages)),
+                            source, os.path.basename(pdf_path))
+            self.fingerprints.save()
+            
+            # Typed records are kept next to the prose for downstream code
+            if self.output_format == 'json':
+                records = [
+                    dict(page=page_num + 1, **record.model_dump())
+                    for page_num, page in sorted(page_records.items())
+                    for record in page
+                ]
+                self.document_records[document_key] = records
+                stats["records"] = len(records)
             
-            final_content = "\n".join(extracted_content)
             print(f"    ✓ Extracted {len(final_content)} characters")
             
+            cache_stats = self.cache.get_statistics()
+            if cache_stats["enabled"]:
+                print(f"    Cache: {cache_stats['hits'] - cache_before['hits']} hits, "
+                      f"{cache_stats['misses'] - cache_before['misses']} misses "
+                      f"({cache_stats['entries']} entries, {cache_stats['size_bytes'] / 1e6:.1f} MB)")
+            
+            if self.hedger.enabled:
+                stats["hedging"] = {}
+                for stage, counters in self.hedger.get_statistics().items():
+                    before = hedging_before.get(stage, {})
+                    delta = {key: counters[key] - before.get(key, 0)
+                             for key in ("requests", "hedged", "hedge_wins", "cancelled", "capped", "no_slot")}
+                    if delta["requests"]:
+                        stats["hedging"][stage] = dict(delta, hedge_delay=counters["hedge_delay"])
+                if stats["hedging"]:
+                    print("    Hedging: " + "; ".join(
+                        f"{stage} {delta['hedged']}/{delta['requests']} hedged, "
+                        f"duplicate won {delta['hedge_wins']}"
+                        + (f", {delta['no_slot']} without a free slot" if delta['no_slot'] else "")
+                        + (f", after {delta['hedge_delay']:.1f}s" if delta['hedge_delay'] else ", warming up")
+                        for stage, delta in sorted(stats["hedging"].items())
+                    ))
+            
+            if stats["routes"]:
+                route_counts = {}
+                for route in stats["routes"].values():
+                    route_counts[route] = route_counts.get(route, 0) + 1
+                print("    Routing: " + ", ".join(
+                    f"{count} {route}" for route, count in sorted(route_counts.items())
+                ))
+            
+            if "records" in stats:
+                print(f"    Records: {stats['records']} structured records")
+            
+            if stats.get("resumed"):
+                print(f"    Resumed: {stats['resumed']} pages taken from the checkpoint journal")
+            
+            if skipped or stats.get("deferred"):
+                print(f"    Page classes: {len(skipped)} pages skipped, "
+                      f"{stats.get('deferred', 0)} deferred, {stats.get('downsampled', 0)} downsampled "
+                      f"({self._describe_page_classes(classes)})")
+            
+            if stats.get("revision"):
+                revision = stats["revision"]
+                reprocessed = format_page_ranges(revision["reprocessed"]) or "none"
+                print(f"    Revision of {revision['previous']}: reprocessed pages {reprocessed} "
+                      f"({revision['changed']} changed, {revision['inserted']} inserted, "
+                      f"{revision['removed']} removed); {revision['unchanged']} unchanged pages carried over")
+            
+            if stats.get("deduplicated"):
+                print(f"    Deduplicated: {stats['deduplicated']} near-duplicate pages reused from earlier filings")
+            
+            if stats.get("tiling"):
+                print(f"    Tiling: {stats['tiling']['pages']} sparse pages in "
+                      f"{stats['tiling']['tiles']} vision requests")
+            
+            if stats.get("layout"):
+                layout = stats["layout"]
+                print(f"    Layout: {layout['cropped_pages']} pages sent as {layout['regions']} cropped regions "
+                      f"(avg {layout['coverage'] / max(layout['cropped_pages'], 1):.0%} of page), "
+                      f"{layout['full_pages']} full pages")
+            
+            if stats.get("pipeline"):
+                pipeline = stats["pipeline"]
+                print(f"    Pipeline: render {pipeline['avg_render_ms']:.0f} ms, "
+                      f"encode {pipeline['avg_encode_ms']:.0f} ms ({pipeline['avg_image_kb']:.0f} KB), "
+                      f"infer {pipeline['avg_infer_ms']:.0f} ms per page; "
+                      f"queue depth avg {pipeline['avg_queue_depth']:.1f} / max {pipeline['max_queue_depth']}; "
+                      f"inference waited {pipeline['starved_seconds']:.2f}s for renders "
+                      f"(+{pipeline['startup_seconds']:.2f}s start-up)")
+            
             return final_content
             
         except Exception as e:
             print(f"    ✗ Error extracting from PDF: {e}")
+            if writer:
+                self._document_writers.pop(os.path.abspath(pdf_path), None)
+                writer.abort()
+            if isinstance(final_content, StoredDocument):
+                final_content.close()
             raise
     
-    def _extract_page(self, doc, page_num: int) -> str:
+    def _extract_pages(self, doc, pdf_path: str, total_pages: int, stats: Optional[dict] = None,
+                       done: Optional[dict] = None,
+                       checkpoint: Optional[ExtractionCheckpoint] = None) -> list:
+        """
+        Extract all pages of a document, keeping up to max_concurrency
+        page requests in flight
+        
+        Args:
+            doc: PyMuPDF document object
+            pdf_path: Path to the PDF file (used by render worker processes)
+            total_pages: Number of pages in the document
+            stats: Per-document statistics to record routing decisions in
+            done: Contents of pages already extracted, keyed by page number (0-indexed)
+            checkpoint: Journal to record each completed page in
+            
+        Returns:
+            List of extracted page contents, in page order; None for pages the
+            document store already holds
+        """
+        
+        done = dict(done or {})
+        
+        # Sparse pages that share a composite image are extracted up front
+        if self.tiler and self.is_vision_model:
+            done.update(self._extract_tiles(doc, pdf_path, total_pages, stats, done, checkpoint))
+        
+        if self.render_pipeline and self.is_vision_model:
+            return self._extract_pages_pipelined(doc, pdf_path, total_pages, stats, done, checkpoint)
+        
+        def extract(page_num: int) -> Optional[str]:
+            if page_num in done:
+                return self._retained(stats, page_num, done[page_num])
+            print(f"      Processing page {page_num + 1}/{total_pages}...")
+            with self.request_budget.slot(pdf_path):
+                content, extracted = self._extract_page(doc, page_num, stats)
+            return self._page_done(stats, checkpoint, page_num, content, degraded=not extracted)
+        
+        order = self._page_order(total_pages, stats)
+        if self.max_concurrency <= 1 or total_pages <= 1:
+            contents = [extract(page_num) for page_num in order]
+        else:
+            # Executor.map yields results in submission order, regardless of completion order
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                contents = list(executor.map(extract, order))
+        
+        page_contents = [""] * total_pages
+        for page_num, content in zip(order, contents):
+            page_contents[page_num] = content
+        return page_contents
+    
+    def _extract_pages_pipelined(self, doc, pdf_path: str, total_pages: int,
+                                 stats: Optional[dict] = None, done: Optional[dict] = None,
+                                 checkpoint: Optional[ExtractionCheckpoint] = None) -> list:
+        """
+        Extract pages with rendering/encoding in worker processes overlapped
+        with model inference
+        
+        Args:
+            doc: PyMuPDF document object
+            pdf_path: Path to the PDF file
+            total_pages: Number of pages in the document
+            stats: Per-document statistics to record routing and pipeline stats in
+            done: Contents of pages already extracted, keyed by page number (0-indexed)
+            checkpoint: Journal to record each completed page in
+            
+        Returns:
+            List of extracted page contents, in page order; None for pages the
+            document store already holds
+        """
+        
+        page_contents = [""] * total_pages
+        jobs = []
+        
+        # Routing and cache lookups are cheap and stay on this thread;
+        # only pages that need the vision model enter the pipeline
+        for page_num in self._page_order(total_pages, stats):
+            if done and page_num in done:
+                page_contents[page_num] = self._retained(stats, page_num, done[page_num])
+                continue
+            try:
+                with self._fitz_lock:
+                    page = doc[page_num]
+                    text_content = page.get_text()
+                    routed_content = self._route_page(page, page_num, text_content, stats)
+                    if routed_content is None:
+                        routed_content = self._table_fast_path(page, page_num, stats)
+                    if routed_content is None:
+                        fingerprint = self._fingerprint_page(page, page_num, text_content)
+                if routed_content is None:
+                    routed_content = self._find_duplicate(fingerprint, page_num, stats)
+                if routed_content is not None:
+                    page_contents[page_num] = self._page_done(stats, checkpoint, page_num, routed_content)
+                    continue
+                with self._fitz_lock:
+                    vision_plan = self._plan_vision_page(page, page_num, stats)
+                    cache_key = self._vision_cache_key(page, vision_plan)
+            except Exception as e:
+                print(f"      Warning: Could not process page {page_num + 1}: {e}")
+                continue
+            
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                page_contents[page_num] = self._page_done(stats, checkpoint, page_num, cached)
+                continue
+            
+            jobs.append({
+                "page_num": page_num,
+                "render": vision_plan["renders"],
+                "vision_plan": vision_plan,
+                "cache_key": cache_key,
+                "fallback_text": text_content,
+                "fingerprint": fingerprint
+            })
+        
+        if jobs:
+            print(f"      Sending {len(jobs)} pages through the render pipeline...")
+        
+        finished = set()  # Pages infer() recorded; the rest are fallbacks of failed renders or calls
+        
+        def infer(job: dict, rendered: dict) -> Optional[str]:
+            print(f"      Processing page {job['page_num'] + 1}/{total_pages}...")
+            with self.request_budget.slot(pdf_path):
+                content, extracted = self._infer_vision_plan(
+                    job["vision_plan"], rendered["images"], job["page_num"],
+                    job["cache_key"], job["fallback_text"]
+                )
+            if extracted:
+                self._index_page(job["fingerprint"], job["page_num"], content, stats)
+            content = self._page_done(stats, checkpoint, job["page_num"], content, degraded=not extracted)
+            finished.add(job["page_num"])
+            return content
+        
+        pipeline_stats = {}
+        results = self.render_pipeline.run(pdf_path, jobs, infer, infer_workers=self.max_concurrency,
+                                           statistics=pipeline_stats)
+        for page_num, content in results.items():
+            if page_num not in finished:
+                content = self._page_done(stats, checkpoint, page_num, content, degraded=True)
+            page_contents[page_num] = content
+        
+        if stats is not None and jobs:
+            stats["pipeline"] = pipeline_stats
+        
+        return page_contents
+    
+    def _extract_tiles(self, doc, pdf_path: str, total_pages: int, stats: Optional[dict] = None,
+                       done: Optional[dict] = None,
+                       checkpoint: Optional[ExtractionCheckpoint] = None) -> dict:
+        """
+        Extract sparse vision pages by packing them into composite images
+        
+        Args:
+            doc: PyMuPDF document object
+            pdf_path: Path to the PDF file
+            total_pages: Number of pages in the document
+            stats: Per-document statistics to record tiling in
+            done: Pages already extracted, which are skipped
+            checkpoint: Journal to record each completed page in
+            
+        Returns:
+            Dictionary mapping page number (0-indexed) to content for tiled
+            pages (and sparse pages reused from a near-duplicate); None for
+            pages the document store already holds
+        """
+        
+        candidates = []
+        fallback_texts, fingerprints = {}, {}
+        reused = {}
+        for page_num in range(total_pages):
+            if done and page_num in done:
+                continue
+            try:
+                with self._fitz_lock:
+                    page = doc[page_num]
+                    text_content = page.get_text()
+                    # Pages the text layer already covers never need a vision call
+                    if self.router and self.router.decide(page, text_content)["route"] == PageRouter.ROUTE_TEXT:
+                        continue
+                    if not self.tiler.is_sparse(page, text_content):
+                        continue
+                    clip = self.image_policy.plan(page)["clip"]
+                    fingerprint = self._fingerprint_page(page, page_num, text_content)
+                duplicate = self._find_duplicate(fingerprint, page_num, stats)
+                if duplicate is not None:
+                    reused[page_num] = self._page_done(stats, checkpoint, page_num, duplicate)
+                    continue
+                candidates.append((page_num, clip))
+                fallback_texts[page_num] = text_content
+                fingerprints[page_num] = fingerprint
+            except Exception as e:
+                print(f"      Warning: Could not analyze page {page_num + 1} for tiling: {e}")
+        
+        groups = self.tiler.group(candidates)
+        if not groups:
+            return reused
+        
+        print(f"      Tiling {sum(len(group) for group in groups)} sparse pages "
+              f"into {len(groups)} composite images...")
+        
+        def extract(group: list) -> tuple:
+            with self.request_budget.slot(pdf_path):
+                return self._extract_tile(doc, group, fallback_texts)
+        
+        tiled = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for contents, failed in executor.map(extract, groups):
+                for page_num, content in contents.items():
+                    if page_num not in failed:
+                        self._index_page(fingerprints[page_num], page_num, content, stats)
+                    tiled[page_num] = self._page_done(stats, checkpoint, page_num, content,
+                                                      degraded=page_num in failed)
+        
+        if stats is not None:
+            stats["tiling"] = {"tiles": len(groups), "pages": len(tiled)}
+            for page_num in tiled:
+                stats["routes"][page_num + 1] = "tiled"
+        return {**reused, **tiled}
+    
+    def _extract_tile(self, doc, group: list, fallback_texts: dict) -> dict:
+        """
+        Extract a group of sparse pages with one vision request
+        
+        Args:
+            doc: PyMuPDF document object
+            group: (page_num, clip) tuples from PageTiler.group()
+            fallback_texts: Text layer of each page, keyed by page number
+            
+        Returns:
+            Tuple of (dictionary mapping page number (0-indexed) to content,
+            set of pages that fell back to their text layer)
+        """
+        
+        page_numbers = [page_num + 1 for page_num, _ in group]
+        markers = ", ".join(PAGE_MARKER.format(page=page) for page in page_numbers)
+        prompt = VISION_TILE_PROMPT.format(count=len(group), markers=markers)
+        
+        try:
+            with self._fitz_lock:
+                composite = self.tiler.compose(doc, group)
+                try:
+                    render_plan = self.image_policy.plan(composite[0])
+                    cache_key = make_cache_key(
+                        "vision-tile", [page_content_hash(doc[page_num]) for page_num, _ in group],
+                        group, render_plan, self.model_name, prompt,
+                        self.generation_options, self.output_limits
+                    )
+                    response = self.cache.get(cache_key)
+                    if response is None:
+                        rendered = encode_page(composite[0], render_plan)
+                finally:
+                    composite.close()
+            
+            print(f"      Processing pages {', '.join(map(str, page_numbers))} as one tile...")
+            if response is None:
+                response = self._call_ollama_api_with_image(prompt, rendered["image_base64"], stage="tile")
+            sections = split_tile_response(response or "", page_numbers)
+        except Exception as e:
+            print(f"      Warning: Tiled extraction failed for pages {page_numbers}: {e}")
+            sections = {}
+        
+        contents, failed = {}, set()
+        for page_num, _ in group:
+            section = sections.get(page_num + 1)
+            if section:
+                contents[page_num] = section
+            else:
+                print(f"      Warning: Tiled response had no section for page {page_num + 1}, using text layer")
+                contents[page_num] = fallback_texts[page_num].strip()
+                failed.add(page_num)
+        
+        # Only cache responses that split cleanly into every page
+        if len(sections) == len(group):
+            self.cache.put(cache_key, response)
+        return contents, failed
+    
+    def _page_done(self, stats: Optional[dict], checkpoint: Optional[ExtractionCheckpoint],
+                   page_num: int, content: str, degraded: bool = False) -> Optional[str]:
+        """
+        Record a completed page in the checkpoint journal, document store and
+        progress counters; returns what to keep of it in memory (see _retained()).
+        Degraded pages (fallbacks after a failed call) are not journaled, so a
+        resumed run extracts them again, and are listed in stats["degraded"].
+        """
+        
+        if degraded:
+            if stats is not None:
+                with self._progress_lock:
+                    stats.setdefault("degraded", set()).add(page_num)
+        elif checkpoint:
+            checkpoint.record(page_num, content)
+        content = self._page_output(stats, page_num, content)
+        writer = self._document_writers.get(stats.get("path")) if stats is not None else None
+        if writer:
+            writer.write_page(page_num, content)
+        if stats is not None:
+            with self._progress_lock:
+                stats["pages_done"] = stats.get("pages_done", 0) + 1
+        return self._retained(stats, page_num, content)
+    
+    def _page_output(self, stats: Optional[dict], page_num: int, content: str) -> str:
+        """
+        Page text for the document: in json mode the record lines are split
+        off into stats["page_records"], so the document keeps only the prose
+        """
+        
+        if self.output_format != 'json' or not content:
+            return content
+        prose, records = split_records(content)
+        if records and stats is not None:
+            with self._progress_lock:
+                stats.setdefault("page_records", {})[page_num] = records
+        return prose
+    
+    def _retained(self, stats: Optional[dict], page_num: int, content: str) -> Optional[str]:
+        """Page content to keep in memory: None once the document store holds the page"""
+        
+        writer = self._document_writers.get(stats.get("path")) if stats is not None else None
+        return None if writer and writer.has_page(page_num) else content
+    
+    def get_progress(self, pdf_path: str) -> Optional[tuple]:
+        """
+        Extraction progress of a document
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            Tuple of (pages done, total pages), or None if extraction has not started
+        """
+        
+        stats = self.document_stats.get(os.path.abspath(pdf_path))
+        if not stats:
+            return None
+        return stats.get("pages_done", 0), stats["total_pages"]
+    
+    def _extraction_namespace(self) -> str:
+        """
+        Identifies the extraction configuration that reused page content must
+        match (near-duplicates, checkpoint journals and revision manifests):
+        the model and prompts, and every setting that decides how a page is
+        extracted (image encoding, routing, region crops, tiling, the table
+        fast path and the page class policy)
+        """
+        
+        return make_cache_key(
+            self.model_name, self.is_vision_model, VISION_EXTRACTION_PROMPT, VISION_REGION_PROMPT,
+            VISION_TILE_PROMPT, self.generation_options, self.output_limits, self.output_format,
+            VISION_JSON_PROMPT if self.output_format == 'json' else None,
+            ENHANCE_PROMPT, self.enhance_reserve_tokens,
+            _settings(self.image_policy), _settings(self.router), _settings(self.layout_analyzer),
+            self.region_dpi_scale, _settings(self.tiler), _settings(self.table_extractor),
+            _settings(self.page_classifier)
+        )
+    
+    def _classify_pages(self, doc, stats: Optional[dict] = None) -> dict:
+        """
+        Classify every page of a document by type
+        
+        Args:
+            doc: PyMuPDF document object
+            stats: Per-document statistics to record the classes in
+            
+        Returns:
+            Classifications keyed by page number (0-indexed)
+        """
+        
+        classes = {}
+        for page_num in range(len(doc)):
+            try:
+                with self._fitz_lock:
+                    classes[page_num] = self.page_classifier.classify(doc[page_num], page_num)
+            except Exception as e:
+                print(f"      Warning: Could not classify page {page_num + 1}: {e}")
+        
+        if stats is not None:
+            stats["classes"] = {page_num + 1: classification for page_num, classification in classes.items()}
+            stats["deferred"] = sum(1 for classification in classes.values()
+                                    if classification["action"] == ACTION_DEFER)
+        return classes
+    
+    def _describe_page_classes(self, classes: dict) -> str:
+        """One-line summary of page classes and policy actions, e.g. 'mdna 2-12; boilerplate 1 (cover, skip)'"""
+        
+        groups = {}
+        for page_num, classification in sorted(classes.items()):
+            detail = ", ".join(part for part in (classification["kind"], classification["action"])
+                               if part and part != "extract")
+            key = (classification["label"], detail)
+            groups.setdefault(key, []).append(page_num + 1)
+        return "; ".join(
+            f"{label} {format_page_ranges(pages)}{f' ({detail})' if detail else ''}"
+            for (label, detail), pages in groups.items()
+        ) or "none"
+    
+    def _page_order(self, total_pages: int, stats: Optional[dict] = None) -> list:
+        """Page numbers (0-indexed) in extraction order, with deferred page classes last"""
+        
+        classes = (stats or {}).get("classes", {})
+        return sorted(range(total_pages), key=lambda page_num: (
+            classes.get(page_num + 1, {}).get("action") == ACTION_DEFER, page_num
+        ))
+    
+    def _diff_revision(self, doc, manifest: DocumentManifest, source: str,
+                       stats: Optional[dict] = None, skip: Optional[dict] = None) -> tuple:
+        """
+        Diff a document page by page against the previous revision of the same filing
+        
+        Args:
+            doc: PyMuPDF document object
+            manifest: Manifest of the logical document
+            source: Content hash of the PDF file
+            stats: Per-document statistics to record the revision in
+            skip: Pages already extracted, which are not carried over
+            
+        Returns:
+            Tuple of (unchanged contents keyed by page number, none for a rerun of
+            the same file; page hashes in page order)
+        """
+        
+        if not manifest.enabled:
+            return {}, []
+        if manifest.outdated:
+            print(f"    Extraction settings changed since {manifest.outdated} was extracted; "
+                  f"no pages carried over")
+        
+        page_hashes = []
+        for page_num in range(len(doc)):
+            with self._fitz_lock:
+                page_hashes.append(page_content_hash(doc[page_num]))
+        revision = manifest.diff(page_hashes, source)
+        # A rerun of the same file is served by the extraction cache; only revisions carry pages over
+        unchanged = {page_num: content for page_num, content in revision["unchanged"].items()
+                     if not (skip and page_num in skip)} if revision["revision"] else {}
+        
+        if stats is not None:
+            for page_num in unchanged:
+                stats["routes"][page_num + 1] = "unchanged"
+            if revision["revision"]:
+                stats["revision"] = {
+                    "previous": revision["previous"],
+                    "reprocessed": sorted(page_num + 1 for page_num in revision["changed"] + revision["inserted"]),
+                    "changed": len(revision["changed"]),
+                    "inserted": len(revision["inserted"]),
+                    "removed": len(revision["removed"]),
+                    "unchanged": len(revision["unchanged"])
+                }
+        if revision["revision"]:
+            reprocessed = [page_num + 1 for page_num in revision["changed"] + revision["inserted"]]
+            message = f"    Revision of {revision['previous']}: {len(revision['unchanged'])} pages unchanged"
+            if reprocessed:
+                message += f", re-extracting pages {format_page_ranges(reprocessed)}"
+            if revision["removed"]:
+                message += f", {len(revision['removed'])} removed"
+            print(message)
+        return unchanged, page_hashes
+    
+    def _fingerprint_page(self, page, page_num: int, text_content: str) -> Optional[dict]:
+        """
+        Fingerprint a page that is about to go to the model (caller holds the PyMuPDF lock)
+        
+        Args:
+            page: PyMuPDF page object
+            page_num: Page number (0-indexed)
+            text_content: Text layer of the page
+            
+        Returns:
+            Fingerprint, or None if deduplication is disabled or the page has too little text
+        """
+        
+        if not self.fingerprints.enabled:
+            return None
+        try:
+            return self.fingerprints.fingerprint(page, text_content)
+        except Exception as e:
+            print(f"      Warning: Could not fingerprint page {page_num + 1}: {e}")
+            return None
+    
+    def _find_duplicate(self, fingerprint: Optional[dict], page_num: int,
+                        stats: Optional[dict] = None) -> Optional[str]:
+        """
+        Look up the extraction of a near-duplicate page from another filing
+        
+        Only pages that routing and the table fast path leave for the model
+        are looked up: the text layer of any other page is exact and free.
+        
+        Args:
+            fingerprint: Fingerprint from _fingerprint_page()
+            page_num: Page number (0-indexed)
+            stats: Per-document statistics to record the reuse in
+            
+        Returns:
+            Reused page content, or None if there is no near-duplicate
+        """
+        
+        if fingerprint is None:
+            return None
+        match = self.fingerprints.find(fingerprint, self._extraction_namespace(),
+                                       exclude_source=(stats or {}).get("source"))
+        if not match:
+            return None
+        
+        print(f"      Page {page_num + 1}: near-duplicate of {match['source_name']} "
+              f"page {match['page']} (similarity {match['similarity']:.2f}), reusing extraction")
+        if stats is not None:
+            stats["routes"][page_num + 1] = "deduplicated"
+            with self._progress_lock:
+                stats["deduplicated"] = stats.get("deduplicated", 0) + 1
+        return match["content"]
+    
+    def _index_page(self, fingerprint: Optional[dict], page_num: int, content: str,
+                    stats: Optional[dict] = None):
+        """
+        Add a model extraction to the near-duplicate index (only pages the
+        model extracted completely; never text-layer fallbacks of failed calls)
+        
+        Args:
+            fingerprint: Fingerprint from _fingerprint_page()
+            page_num: Page number (0-indexed)
+            content: Extracted page content
+            stats: Per-document statistics with the document's name and source hash
+        """
+        
+        if fingerprint is None or stats is None or not content:
+            return
+        self.fingerprints.add(fingerprint, self._extraction_namespace(), stats["source"],
+                              stats["document"], page_num + 1, content)
+    
+    def _route_page(self, page, page_num: int, text_content: str,
+                    stats: Optional[dict] = None) -> Optional[str]:
+        """
+        Apply text-layer routing to a page (caller holds the PyMuPDF lock)
+        
+        Args:
+            page: PyMuPDF page object
+            page_num: Page number (0-indexed)
+            text_content: Text layer of the page
+            stats: Per-document statistics to record the routing decision in
+            
+        Returns:
+            Page content if the page was routed to the text layer, otherwise None
+        """
+        
+        if not (self.is_vision_model and self.router):
+            return None
+        
+        decision = self.router.decide(page, text_content)
+        print(f"      Page {page_num + 1}: {decision['route']} ({decision['reason']}; "
+              f"density {decision['text_density']:.1f}, table {decision['table_score']:.2f}, "
+              f"images {decision['image_coverage']:.2f})")
+        if stats is not None:
+            stats["routes"][page_num + 1] = decision["route"]
+        
+        # Born-digital narrative: the text layer is already exact
+        if decision["route"] == PageRouter.ROUTE_TEXT:
+            return text_content.strip()
+        return None
+    
+    def _table_fast_path(self, page, page_num: int, stats: Optional[dict] = None) -> Optional[str]:
+        """
+        Try deterministic table reconstruction on a page (caller holds the PyMuPDF lock)
+        
+        Args:
+            page: PyMuPDF page object
+            page_num: Page number (0-indexed)
+            stats: Per-document statistics to record the decision in
+            
+        Returns:
+            Page content with the rebuilt tables if confidence is high enough, otherwise None
+        """
+        
+        if not self.table_extractor:
+            return None
+        
+        try:
+            result = self.table_extractor.extract(page)
+        except Exception as e:
+            print(f"      Warning: Table reconstruction failed for page {page_num + 1}: {e}")
+            return None
+        
+        if result["confidence"] < self.table_extractor.min_confidence:
+            if result["tables"]:
+                print(f"      Page {page_num + 1}: table reconstruction confidence "
+                      f"{result['confidence']:.2f} too low ({result['reason']}), using the model")
+            return None
+        
+        print(f"      Page {page_num + 1}: table (rebuilt from text layer, confidence "
+              f"{result['confidence']:.2f}; {result['reason']})")
+        if stats is not None:
+            stats["routes"][page_num + 1] = "table"
+            with self._progress_lock:
+                self.document_tables.setdefault(stats.get("path", ""), {})[page_num + 1] = result["tables"]
+        if self.output_format != 'json':
+            return result["content"]
+        
+        # Same record lines as a structured model answer, so split_records() finds them
+        records = [record for frame in result["tables"] for record in table_records(frame, result["content"])]
+        return "\n\n".join(part for part in (result["content"], format_records(records)) if part)
+    
+    def _extract_page(self, doc, page_num: int, stats: Optional[dict] = None) -> str:
         """
         Extract content from a single page
         
         Args:
             doc: PyMuPDF document object
             page_num: Page number (0-indexed)
+            stats: Per-document statistics to record the routing decision in
             
         Returns:
-            Extracted text content from the page
+            Tuple of (extracted text content from the page, whether it was
+            extracted as configured; False for fallbacks after a failure)
         """
         
         try:
-            page = doc[page_num]
+            with self._fitz_lock:
+                page = doc[page_num]
+                
+                # First try text extraction (faster)
+                text_content = page.get_text()
+                routed_content = self._route_page(page, page_num, text_content, stats)
+                if routed_content is None:
+                    routed_content = self._table_fast_path(page, page_num, stats)
+                if routed_content is None:
+                    fingerprint = self._fingerprint_page(page, page_num, text_content)
             
-            # First try text extraction (faster)
-            text_content = page.get_text()
+            if routed_content is None:
+                routed_content = self._find_duplicate(fingerprint, page_num, stats)
+            if routed_content is not None:
+                return routed_content, True
             
             # If vision model is available, use image-based extraction
             if self.is_vision_model:
-                return self._vision_extract_page(page, page_num, text_content)
+                content, extracted = self._vision_extract_page(page, page_num, text_content, stats)
             else:
                 # Fall back to text-based extraction with LLM enhancement
                 if text_content and len(text_content.strip()) > 100:
-                    return self._enhance_with_llm(text_content, page_num)
+                    content, extracted = self._enhance_with_llm(text_content, page_num)
                 else:
-                    return text_content
+                    return text_content, True
+            
+            # Fallbacks after a failed call are not reused for other filings
+            if extracted:
+                self._index_page(fingerprint, page_num, content, stats)
+            return content, extracted
                 
         except Exception as e:
             print(f"      Warning: Could not process page {page_num + 1}: {e}")
-            return ""
+            return "", False
     
     def _enhance_with_llm(self, text_content: str, page_num: int) -> str:
         """
         Enhance extracted text with LLM analysis (non-vision)
         
+        Pages longer than the model's context window allows are split into
+        chunks that are enhanced and merged, so no text is dropped. The chunks
+        run under the page's request slot; they only run concurrently on extra
+        slots the request budget has free right away (try_acquire), so a page
+        never has more requests in flight than the budget grants it.
+        
         Args:
             text_content: Text extracted from page
             page_num: Page number
             
         Returns:
-            Enhanced content with LLM analysis
+            Tuple of (enhanced content with LLM analysis, whether the model
+            enhanced it; False when the plain text is returned after a failure)
         """
         
-        prompt = f"""Analyze this financial document page content and extract structured information.
-
-Raw text from page:
-{text_content[:3000]}
-
-Extract and organize:
-1. All numerical financial data (revenue, profit, expenses, etc.)
-2. Key financial metrics and ratios
-3. Important dates and periods
-4. Company information
-5. Any tables or structured data
-
-Format your response as clear, organized text with all numbers and their labels."""
-
-        try:
+        chunker = TextChunker(self.enhance_chunk_tokens)
+        chunks = chunker.split(text_content)
+        
+        def enhance(index: int) -> str:
+            part = f" (part {index + 1} of {len(chunks)})" if len(chunks) > 1 else ""
+            prompt = ENHANCE_PROMPT.format(part=part, text=chunks[index])
+            cache_key = make_cache_key("enhance", self.model_name, prompt, self.generation_options)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
             response = self.llm.invoke(prompt)
+            self.cache.put(cache_key, response)
             return response
+        
+        if len(chunks) == 1:
+            try:
+                return enhance(0), True
+            except Exception as e:
+                print(f"      Warning: LLM enhancement failed for page {page_num + 1}, using text: {e}")
+                return text_content, False
+        
+        owner = self.request_budget.current_owner()
+        extra_slots = 0
+        while owner and extra_slots < min(len(chunks), self.max_concurrency) - 1 \
+                and self.request_budget.try_acquire(owner):
+            extra_slots += 1
+        try:
+            print(f"      Page {page_num + 1}: enhancing {len(chunks)} chunks of "
+                  f"~{chunker.max_tokens} tokens, {extra_slots + 1} at a time")
+            if extra_slots:
+                with ThreadPoolExecutor(max_workers=extra_slots + 1) as executor:
+                    outputs = list(executor.map(enhance, range(len(chunks))))
+            else:
+                outputs = [enhance(index) for index in range(len(chunks))]
+            return merge_chunk_outputs(outputs), True
         except Exception as e:
             print(f"      Warning: LLM enhancement failed for page {page_num + 1}, using text: {e}")
-            return text_content
+            return text_content, False
+        finally:
+            for _ in range(extra_slots):
+                self.request_budget.release(owner)
+    
+    def _plan_vision_page(self, page, page_num: int, stats: Optional[dict] = None) -> dict:
+        """
+        Decide what to send to the vision model for a page (caller holds the PyMuPDF lock)
+        
+        Pages whose table/chart regions cover only part of the page are sent as
+        cropped regions rendered at a higher DPI; everything else is sent whole.
+        
+        Args:
+            page: PyMuPDF page object
+            page_num: Page number (0-indexed)
+            stats: Per-document statistics to record layout decisions in
+            
+        Returns:
+            Vision plan: 'renders' (one render plan per image), 'regions' and
+            'text_blocks' (empty when the whole page is sent)
+        """
+        
+        # Low-value page classes may be rendered at a reduced DPI
+        dpi_scale = 1.0
+        classification = (stats or {}).get("classes", {}).get(page_num + 1)
+        if classification and classification["action"] == ACTION_DOWNSAMPLE:
+            dpi_scale = self.page_classifier.downsample_scale
+            with self._progress_lock:
+                stats["downsampled"] = stats.get("downsampled", 0) + 1
+        
+        layout = self.layout_analyzer.analyze(page) if self.layout_analyzer else None
+        if stats is not None:
+            layout_stats = stats.setdefault(
+                "layout", {"cropped_pages": 0, "regions": 0, "coverage": 0.0, "full_pages": 0}
+            )
+        
+        if not (layout and layout["croppable"]):
+            if stats is not None:
+                layout_stats["full_pages"] += 1
+            return {"renders": [self.image_policy.plan(page, dpi_scale=dpi_scale)], "regions": [], "text_blocks": []}
+        
+        regions = [
+            {"kind": region["kind"], "rect": [round(value, 2) for value in region["rect"]],
+             "text": page.get_text(clip=region["rect"]).strip()}
+            for region in layout["regions"]
+        ]
+        print(f"      Page {page_num + 1}: {len(regions)} region(s) "
+              f"({', '.join(region['kind'] for region in regions)}, "
+              f"{layout['coverage']:.0%} of page) sent as crops")
+        if stats is not None:
+            layout_stats["cropped_pages"] += 1
+            layout_stats["regions"] += len(regions)
+            layout_stats["coverage"] += layout["coverage"]
+        
+        return {
+            "renders": [
+                self.image_policy.plan(page, clip=region["rect"], dpi_scale=self.region_dpi_scale * dpi_scale)
+                for region in regions
+            ],
+            "regions": regions,
+            "text_blocks": [
+                {"rect": [round(value, 2) for value in block["rect"]], "text": block["text"]}
+                for block in layout["text_blocks"]
+            ]
+        }
+    
+    def _vision_cache_key(self, page, vision_plan: dict) -> str:
+        """
+        Cache key for a vision extraction of a page (caller holds the PyMuPDF lock)
+        
+        Args:
+            page: PyMuPDF page object
+            vision_plan: Vision plan from _plan_vision_page()
+            
+        Returns:
+            Content-addressed cache key
+        """
+        
+        if self.output_format == 'json':
+            prompt = [VISION_JSON_PROMPT, PAGE_EXTRACTION_SCHEMA]
+        else:
+            prompt = VISION_REGION_PROMPT if vision_plan["regions"] else VISION_EXTRACTION_PROMPT
+        return make_cache_key(
+            "vision", page_content_hash(page), vision_plan["renders"], vision_plan["regions"],
+            self.model_name, prompt, self.generation_options, self.output_limits
+        )
     
-    def _vision_extract_page(self, page, page_num: int, fallback_text: str = "") -> str:
+    def _vision_extract_page(self, page, page_num: int, fallback_text: str = "",
+                             stats: Optional[dict] = None) -> str:
         """
         Extract content using vision model with image input
         
@@ -224,75 +1397,127 @@ Format your response as clear, organized text with all numbers and their labels.
             page: PyMuPDF page object
             page_num: Page number
             fallback_text: Text to use if vision extraction fails
+            stats: Per-document statistics to record layout decisions in
             
         Returns:
-            Extracted content via vision analysis
+            Tuple of (extracted content, whether the model extracted it; False
+            when the content is a fallback)
         """
         
         if not FITZ_AVAILABLE:
             print(f"      Warning: PyMuPDF not available, cannot extract page {page_num + 1}")
-            return fallback_text
+            return fallback_text, False
         
         try:
-            # Render page to high-quality image
-            mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better quality
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("png")
-            
-            # Convert to base64
-            img_base64 = base64.b64encode(img_data).decode('utf-8')
+            with self._fitz_lock:
+                vision_plan = self._plan_vision_page(page, page_num, stats)
+                cache_key = self._vision_cache_key(page, vision_plan)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached, True
             
-            # Create vision prompt
-            prompt = """You are analyzing a financial document page image. Extract ALL relevant information you can see including:
-
-1. FINANCIAL FIGURES
-   - All revenue, sales, income numbers
-   - All expenses, costs
-   - Profits, margins, percentages
-   - Cash flow data
-   - Balance sheet items
-   - Year/quarter labels for all numbers
-
-2. KEY METRICS
-   - Growth rates
-   - Financial ratios (P/E, ROE, margins, debt ratios, etc.)
-   - Per-share data (EPS, dividends, book value, etc.)
-   - KPIs and performance indicators
-
-3. TEXTUAL INFORMATION
-   - Company name and ticker
-   - Time periods (Q1 2024, FY2023, etc.)
-   - Section headers and titles
-   - Business descriptions
-   - Risk factors or important notes
-
-4. TABLES AND CHARTS
-   - Extract all data from tables with row and column labels
-   - Describe trends visible in charts
-   - Note any footnotes or references
-
-5. STRUCTURE
-   - Identify if this is: income statement, balance sheet, cash flow, or narrative section
-   - Note any comparative periods (current vs prior year)
-
-Be EXTREMELY thorough and precise. Extract every number with its label and context. Format as organized, structured text."""
-
-            # Call Ollama API directly with image
-            response = self._call_ollama_api_with_image(prompt, img_base64)
+            # Render and encode the page (or region) images according to the encoding policy
+            with self._fitz_lock:
+                images = [encode_page(page, render_plan) for render_plan in vision_plan["renders"]]
             
-            if response and len(response.strip()) > 50:
-                return response
-            else:
-                print(f"      Warning: Vision extraction returned minimal content, using fallback")
-                return fallback_text if fallback_text else "No content extracted from this page."
+            return self._infer_vision_plan(vision_plan, images, page_num, cache_key, fallback_text)
             
         except Exception as e:
             print(f"      Warning: Vision extraction failed for page {page_num + 1}: {e}")
-            return fallback_text if fallback_text else ""
+            return (fallback_text if fallback_text else ""), False
+    
+    def _infer_vision_plan(self, vision_plan: dict, images: list, page_num: int,
+                           cache_key: str, fallback_text: str = "") -> str:
+        """
+        Run the vision model on the rendered images of a page
+        
+        Args:
+            vision_plan: Vision plan from _plan_vision_page()
+            images: Encoded images, one per render plan
+            page_num: Page number
+            cache_key: Cache key to store a successful result under
+            fallback_text: Text to use if vision extraction fails
+            
+        Returns:
+            Tuple of (extracted content, whether the model extracted it; False
+            when the content is a fallback)
+        """
+        
+        if vision_plan["regions"]:
+            return self._infer_regions(vision_plan, images, page_num, cache_key)
+        
+        # Call Ollama API directly with image
+        response = self._run_vision(VISION_EXTRACTION_PROMPT, images[0]["image_base64"])
+        
+        if response and len(response.strip()) > 50:
+            self.cache.put(cache_key, response)
+            return response, True
+        else:
+            print(f"      Warning: Vision extraction returned minimal content for page {page_num + 1}, using fallback")
+            return (fallback_text if fallback_text else "No content extracted from this page."), False
+    
+    def _run_vision(self, prompt: str, image_base64: str, stage: str = "page") -> str:
+        """
+        Run one vision request in the configured output format
+        
+        Args:
+            prompt: Prose prompt (used in text mode)
+            image_base64: Base64-encoded image
+            stage: Request stage ('page' or 'region')
+            
+        Returns:
+            Model output as page content; in json mode the page text followed
+            by the validated records (empty if the output was unusable)
+        """
+        
+        if self.output_format != 'json':
+            return self._call_ollama_api_with_image(prompt, image_base64, stage=stage)
+        
+        response = self._call_ollama_api_with_image(VISION_JSON_PROMPT, image_base64, PAGE_EXTRACTION_SCHEMA, stage)
+        extraction = parse_page_extraction(response)
+        if extraction is None or not (extraction.content or extraction.records or extraction.summary):
+            return ""
+        return format_page_extraction(extraction)
+    
+    def _infer_regions(self, vision_plan: dict, images: list, page_num: int, cache_key: str) -> str:
+        """
+        Run the vision model on each cropped region and stitch the page back together
+        
+        Args:
+            vision_plan: Vision plan with 'regions' and 'text_blocks'
+            images: Encoded region images, in region order
+            page_num: Page number
+            cache_key: Cache key to store the stitched page under
+            
+        Returns:
+            Tuple of (page content with region extractions placed among the
+            text-layer blocks, whether the model extracted every region)
+        """
+        
+        region_outputs = []
+        complete = True
+        for region, image in zip(vision_plan["regions"], images):
+            response = self._run_vision(VISION_REGION_PROMPT, image["image_base64"], stage="region")
+            if not (response and len(response.strip()) > 20):
+                print(f"      Warning: Vision extraction returned minimal content for a "
+                      f"{region['kind']} on page {page_num + 1}, using its text layer")
+                response = region["text"]
+                complete = False
+            region_outputs.append({"kind": region["kind"], "rect": fitz.Rect(region["rect"]),
+                                   "content": response})
+        
+        text_blocks = [{"rect": fitz.Rect(block["rect"]), "text": block["text"]}
+                       for block in vision_plan["text_blocks"]]
+        content = stitch_layout(text_blocks, region_outputs)
+        
+        if complete:
+            self.cache.put(cache_key, content)
+        return content, complete
     
     def extract_from_multiple_pdfs(self, pdf_paths: list) -> dict:
         """
-        Extract content from multiple PDF files
+        Extract content from multiple PDF files concurrently, sharing the
+        page request budget fairly between them
         
         Args:
             pdf_paths: List of paths to PDF files
@@ -301,18 +1526,16 @@ Be EXTREMELY thorough and precise. Extract every number with its label and conte
             Dictionary mapping filenames to extracted content
         """
         
-        results = {}
+        contents, errors = DocumentScheduler().run(pdf_paths, self.extract_from_pdf, self.get_progress)
         
+        results = {}
         for pdf_path in pdf_paths:
             filename = os.path.basename(pdf_path)
-            print(f"\n  Extracting {filename}...")
-            
-            try:
-                content = self.extract_from_pdf(pdf_path)
-                results[filename] = content
-            except Exception as e:
-                print(f"  ✗ Failed to extract {filename}: {e}")
+            if filename in errors:
+                print(f"  ✗ Failed to extract {filename}: {errors[filename]}")
                 results[filename] = f"ERROR: Could not extract content from {filename}"
+            else:
+                results[filename] = contents[filename]
         
         return results
 